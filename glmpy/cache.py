@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import pandas as pd
+
+from typing import Union, List, Any, TYPE_CHECKING
+from glmpy.runner import RunResult, _file_digest
+
+if TYPE_CHECKING:
+    from glmpy.sim import Sim
+
+
+def _hash_json(obj: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(obj, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _hash_df(df: pd.DataFrame) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in df.columns]).encode())
+    h.update(json.dumps([str(d) for d in df.dtypes]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def _sim_config(sim: "Sim") -> dict:
+    """Digests of everything in a sim that determines the GLM outputs.
+
+    The simulation name is excluded so that identically configured sims
+    with different names share a key.
+    """
+    nml_dict = sim.nml._to_dict(none_blocks=False, none_params=False)
+    glm_setup = nml_dict.get("glm", {}).get("glm_setup")
+    if glm_setup is not None:
+        glm_setup.pop("sim_name", None)
+    return {
+        "nml": _hash_json(nml_dict),
+        "bcs": {name: _hash_df(df) for name, df in sim.bcs.items()},
+        "aed_dbase": {
+            os.path.basename(path): _file_digest(path)
+            for path in sim.aed_dbase
+        },
+    }
+
+
+class SimCache:
+    """Content-addressed cache of GLM outputs.
+
+    Outputs are keyed on a digest of the rendered NMLs, the boundary
+    condition DataFrames, the AED database files and the GLM binary. When
+    the total size of the cache exceeds `max_bytes`, the least recently
+    used entries are evicted.
+
+    Attributes
+    ----------
+    cache_dir : str
+        Directory to store the cached outputs in.
+    max_bytes : Union[int, None]
+        Maximum total size of the cached outputs in bytes. `None` for no
+        limit.
+    link : bool
+        If `True`, the output directory of a sim is restored as a symlink
+        into the cache rather than a copy. Linked outputs must be treated as
+        read-only. Outputs written to the sim directory itself are always
+        copied.
+
+    Examples
+    --------
+    >>> from glmpy.cache import SimCache
+    >>> from glmpy.example_sims import SparklingSim
+    >>> cache = SimCache("glmpy_cache", max_bytes=10 * 1024**3)
+    >>> sim = SparklingSim()
+    >>> sim.run(cache=cache)
+    >>> sim.run(cache=cache).cached
+    True
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: Union[int, None] = None,
+        link: bool = False,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.link = link
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, sim: "Sim", glm_path: str) -> str:
+        config = _sim_config(sim)
+        config["glm"] = _file_digest(glm_path)
+        return _hash_json(config)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.isdir(self._entry_dir(key))
+
+    def restore(self, key: str, sim: "Sim") -> Union[RunResult, None]:
+        """Restore the outputs of `key` into `sim`'s output directory.
+
+        Returns `None` on a cache miss.
+        """
+        entry_dir = self._entry_dir(key)
+        start_time = time.perf_counter()
+        try:
+            # Touch the entry to mark it as recently used
+            os.utime(entry_dir)
+        except FileNotFoundError:
+            return None
+        src = os.path.join(entry_dir, "outputs")
+        dst = sim.get_out_dir()
+        # Linking would replace the sim directory, inputs included
+        link = self.link and (
+            os.path.abspath(dst) != os.path.abspath(sim.get_sim_dir())
+        )
+        try:
+            if link:
+                if os.path.islink(dst) or os.path.isfile(dst):
+                    os.remove(dst)
+                elif os.path.isdir(dst):
+                    shutil.rmtree(dst)
+                os.symlink(os.path.abspath(src), dst)
+            else:
+                shutil.copytree(src, dst, dirs_exist_ok=True)
+        except FileNotFoundError:
+            # Evicted by another process after the lookup
+            return None
+        return RunResult(
+            sim_name=sim.sim_name,
+            returncode=0,
+            wall_time=time.perf_counter() - start_time,
+            cached=True,
+        )
+
+    def store(self, key: str, sim: "Sim", result: RunResult):
+        entry_dir = self._entry_dir(key)
+        if os.path.isdir(entry_dir):
+            return
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp_", dir=self.cache_dir)
+        try:
+            shutil.copytree(
+                sim.get_out_dir(), os.path.join(tmp_dir, "outputs")
+            )
+            size = 0
+            for root, _, files in os.walk(tmp_dir):
+                for fl in files:
+                    size += os.path.getsize(os.path.join(root, fl))
+            with open(os.path.join(tmp_dir, "entry.json"), "w") as f:
+                json.dump(
+                    {
+                        "size": size,
+                        "sim_name": sim.sim_name,
+                        "wall_time": result.wall_time,
+                    },
+                    f,
+                )
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same key first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(entry_dir):
+                raise
+        if self.max_bytes is not None:
+            self.evict()
+
+    def _entries(self) -> List[tuple]:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = self._entry_dir(name)
+            if name.startswith(".") or not os.path.isdir(entry_dir):
+                continue
+            try:
+                with open(os.path.join(entry_dir, "entry.json")) as f:
+                    size = json.load(f)["size"]
+                mtime = os.stat(entry_dir).st_mtime
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((mtime, size, entry_dir))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, max_bytes: Union[int, None] = None):
+        """Remove least recently used entries until under `max_bytes`."""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        if max_bytes is None:
+            return
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total <= max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        self.evict(max_bytes=0)
+
+
+class BcStore:
+    """Shared store of boundary condition CSVs.
+
+    Each distinct boundary condition DataFrame is written to the store once,
+    named by a digest of its contents, and then hardlinked into the sim
+    directories that use it. Where a hardlink is not possible (e.g., across
+    filesystems) a symlink is used, and failing that a copy. Linked files
+    share their contents with the store and must not be modified in place.
+
+    Attributes
+    ----------
+    store_dir : str
+        Directory to store the boundary condition CSVs in.
+
+    Examples
+    --------
+    >>> from glmpy.sim import MultiSim
+    >>> from glmpy.cache import BcStore
+    >>> bc_store = BcStore("shared_bcs")
+    >>> multi_sim = MultiSim(glm_sims)
+    >>> multi_sim.run(bc_store=bc_store)
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def path(self, df: pd.DataFrame, digest: Union[str, None] = None) -> str:
+        """Return the path of `df` in the store, writing it if needed."""
+        if digest is None:
+            digest = _hash_df(df)
+        path = os.path.join(self.store_dir, f"{digest}.csv")
+        if not os.path.isfile(path):
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=".tmp_", suffix=".csv", dir=self.store_dir
+            )
+            os.close(fd)
+            try:
+                df.to_csv(tmp_path, index=False)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        return path
+
+    def link(
+        self, df: pd.DataFrame, dst: str, digest: Union[str, None] = None
+    ):
+        """Link the stored CSV of `df` to `dst`."""
+        src = self.path(df, digest)
+        if os.path.lexists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+        try:
+            os.symlink(os.path.abspath(src), dst)
+        except OSError:
+            shutil.copyfile(src, dst)
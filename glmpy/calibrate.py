@@ -0,0 +1,486 @@
+import os
+import pickle
+import tempfile
+import warnings
+import numpy as np
+import pandas as pd
+
+from typing import Union, List, Dict, Any, Callable, Tuple
+from glmpy.sim import GLMSim
+from glmpy.runner import SimFailure
+from glmpy.executor import SimExecutor
+from glmpy.ensemble import Ensemble, ParameterSpace
+
+
+def rmse(observed: np.ndarray, simulated: np.ndarray) -> float:
+    return float(np.sqrt(np.mean((simulated - observed) ** 2)))
+
+
+def mae(observed: np.ndarray, simulated: np.ndarray) -> float:
+    return float(np.mean(np.abs(simulated - observed)))
+
+
+def nse_loss(observed: np.ndarray, simulated: np.ndarray) -> float:
+    """One minus the Nash-Sutcliffe efficiency (0 is a perfect fit)."""
+    return float(
+        np.sum((simulated - observed) ** 2)
+        / np.sum((observed - np.mean(observed)) ** 2)
+    )
+
+
+def kge_loss(observed: np.ndarray, simulated: np.ndarray) -> float:
+    """One minus the Kling-Gupta efficiency (0 is a perfect fit)."""
+    r = np.corrcoef(observed, simulated)[0, 1]
+    alpha = np.std(simulated) / np.std(observed)
+    beta = np.mean(simulated) / np.mean(observed)
+    return float(np.sqrt((r - 1) ** 2 + (alpha - 1) ** 2 + (beta - 1) ** 2))
+
+
+METRICS = {"rmse": rmse, "mae": mae, "nse": nse_loss, "kge": kge_loss}
+
+
+class LakeColumn:
+    """Reads a column of the lake CSV output of a sim as a time series."""
+
+    def __init__(self, column: str):
+        self.column = column
+
+    def __call__(self, glm_sim: GLMSim) -> pd.Series:
+        params = glm_sim.nml["glm"].blocks.peek("output").params
+        csv_lake_fname = params["csv_lake_fname"].value or "lake"
+        path = os.path.join(glm_sim.get_out_dir(), f"{csv_lake_fname}.csv")
+        lake = pd.read_csv(path, usecols=["time", self.column])
+        lake["time"] = pd.to_datetime(lake["time"])
+        return lake.set_index("time")[self.column]
+
+
+class SeriesObjective:
+    """Misfit between an observed and a simulated time series.
+
+    The simulated series is read from a finished sim by `read` and
+    compared with `observed` at the times they share, with a metric from
+    `METRICS` (`"rmse"`, `"mae"`, `"nse"` or `"kge"`) or a callable of
+    `(observed, simulated)` arrays. Lower is better. Runs with no times in
+    common score `inf`.
+
+    Instances are called in the worker processes of a `MultiSim` so
+    `read` and `metric` must be picklable (e.g., module-level functions).
+
+    Examples
+    --------
+    >>> from glmpy.calibrate import SeriesObjective, LakeColumn
+    >>> objective = SeriesObjective(
+    ...     observed_surface_temp, LakeColumn("Surface Temp"), "rmse"
+    ... )
+    """
+
+    def __init__(
+        self,
+        observed: pd.Series,
+        read: Callable[[GLMSim], pd.Series],
+        metric: Union[str, Callable] = "rmse",
+    ):
+        if isinstance(metric, str):
+            if metric not in METRICS:
+                raise ValueError(
+                    f"metric must be one of {list(METRICS)}. Got {metric}"
+                )
+            metric = METRICS[metric]
+        self.observed = observed
+        self.read = read
+        self.metric = metric
+
+    def __call__(self, glm_sim: GLMSim) -> float:
+        simulated = self.read(glm_sim)
+        pairs = pd.concat(
+            [self.observed.rename("obs"), simulated.rename("sim")],
+            axis=1,
+            join="inner",
+        ).dropna()
+        if pairs.empty:
+            return np.inf
+        return self.metric(pairs["obs"].to_numpy(), pairs["sim"].to_numpy())
+
+
+class WeightedObjective:
+    """Weighted sum of several objectives."""
+
+    def __init__(self, objectives: List[Tuple[Callable, float]]):
+        self.objectives = objectives
+
+    def __call__(self, glm_sim: GLMSim) -> float:
+        return float(
+            sum(weight * obj(glm_sim) for obj, weight in self.objectives)
+        )
+
+
+class DifferentialEvolution:
+    """Differential evolution (DE/rand/1/bin) in the unit hypercube.
+
+    Use with `ask()` to get a generation of points to evaluate and
+    `tell()` to report their objective values.
+
+    Attributes
+    ----------
+    dim : int
+        Number of parameters.
+    pop_size : int
+        Number of points per generation. Default: `10 * dim`.
+    mutation : float
+        Differential weight `F`.
+    crossover : float
+        Crossover probability `CR`.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        pop_size: Union[int, None] = None,
+        mutation: float = 0.8,
+        crossover: float = 0.9,
+        x0: Union[np.ndarray, None] = None,
+        seed: Union[int, None] = None,
+    ):
+        self.dim = dim
+        self.pop_size = max(pop_size or 10 * dim, 4)
+        self.mutation = mutation
+        self.crossover = crossover
+        self.rng = np.random.default_rng(seed)
+        self.population = self.rng.random((self.pop_size, dim))
+        if x0 is not None:
+            self.population[0] = x0
+        self.fitness = None
+        self.best_x = None
+        self.best_f = np.inf
+
+    def ask(self) -> np.ndarray:
+        if self.fitness is None:
+            return self.population.copy()
+        n, d = self.population.shape
+        # Three distinct donors other than the target for each member
+        donors = np.argsort(self.rng.random((n, n - 1)), axis=1)[:, :3]
+        donors += donors >= np.arange(n)[:, np.newaxis]
+        a, b, c = (self.population[donors[:, k]] for k in range(3))
+        mutant = a + self.mutation * (b - c)
+        # Reflect mutants that leave the unit hypercube back into it
+        mutant = np.abs(mutant)
+        mutant = np.where(mutant > 1.0, 2.0 - mutant, mutant)
+        mutant = np.clip(mutant, 0.0, 1.0)
+        cross = self.rng.random((n, d)) < self.crossover
+        cross[np.arange(n), self.rng.integers(0, d, n)] = True
+        return np.where(cross, mutant, self.population)
+
+    def tell(self, x: np.ndarray, f: np.ndarray):
+        f = np.asarray(f, dtype=float)
+        if self.fitness is None:
+            self.population = np.array(x, dtype=float)
+            self.fitness = f
+        else:
+            better = f <= self.fitness
+            self.population[better] = x[better]
+            self.fitness[better] = f[better]
+        best = int(np.argmin(self.fitness))
+        if self.fitness[best] < self.best_f:
+            self.best_f = float(self.fitness[best])
+            self.best_x = self.population[best].copy()
+
+
+class CMAES:
+    """Covariance matrix adaptation evolution strategy in the unit hypercube.
+
+    Follows Hansen's "The CMA Evolution Strategy: A Tutorial". Samples
+    outside the unit hypercube are clipped to it (repaired) before they
+    are evaluated and used in the update.
+
+    Attributes
+    ----------
+    dim : int
+        Number of parameters.
+    pop_size : int
+        Number of points per generation. Default: `4 + 3 * ln(dim)`.
+    sigma : float
+        Step size.
+    mean : np.ndarray
+        Mean of the search distribution.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        pop_size: Union[int, None] = None,
+        sigma0: float = 0.3,
+        x0: Union[np.ndarray, None] = None,
+        seed: Union[int, None] = None,
+    ):
+        self.dim = dim
+        self.pop_size = pop_size or 4 + int(3 * np.log(dim))
+        self.rng = np.random.default_rng(seed)
+        self.mean = (
+            np.full(dim, 0.5) if x0 is None else np.array(x0, dtype=float)
+        )
+        self.sigma = sigma0
+        mu = self.pop_size // 2
+        weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        self.weights = weights / weights.sum()
+        self.mu_eff = 1 / np.sum(self.weights**2)
+        n, mu_eff = dim, self.mu_eff
+        self.cc = (4 + mu_eff / n) / (n + 4 + 2 * mu_eff / n)
+        self.cs = (mu_eff + 2) / (n + mu_eff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + mu_eff)
+        self.cmu = min(
+            1 - self.c1,
+            2 * (mu_eff - 2 + 1 / mu_eff) / ((n + 2) ** 2 + mu_eff),
+        )
+        self.damps = (
+            1 + 2 * max(0.0, np.sqrt((mu_eff - 1) / (n + 1)) - 1) + self.cs
+        )
+        self.chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n**2))
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.cov = np.eye(n)
+        self.generation = 0
+        self.best_x = None
+        self.best_f = np.inf
+
+    def ask(self) -> np.ndarray:
+        eigvals, eigvecs = np.linalg.eigh(self.cov)
+        scale = eigvecs * np.sqrt(np.maximum(eigvals, 1e-20))
+        z = self.rng.standard_normal((self.pop_size, self.dim))
+        return np.clip(self.mean + self.sigma * z @ scale.T, 0.0, 1.0)
+
+    def tell(self, x: np.ndarray, f: np.ndarray):
+        f = np.asarray(f, dtype=float)
+        order = np.argsort(f)
+        if f[order[0]] < self.best_f:
+            self.best_f = float(f[order[0]])
+            self.best_x = np.array(x[order[0]], dtype=float)
+        mu = len(self.weights)
+        y = (x[order[:mu]] - self.mean) / self.sigma
+        y_w = self.weights @ y
+        self.mean = self.mean + self.sigma * y_w
+        eigvals, eigvecs = np.linalg.eigh(self.cov)
+        inv_sqrt = (
+            eigvecs / np.sqrt(np.maximum(eigvals, 1e-20))
+        ) @ eigvecs.T
+        self.ps = (1 - self.cs) * self.ps + np.sqrt(
+            self.cs * (2 - self.cs) * self.mu_eff
+        ) * (inv_sqrt @ y_w)
+        self.generation += 1
+        ps_norm = np.linalg.norm(self.ps)
+        h_sigma = ps_norm / np.sqrt(
+            1 - (1 - self.cs) ** (2 * self.generation)
+        ) / self.chi_n < 1.4 + 2 / (self.dim + 1)
+        self.pc = (1 - self.cc) * self.pc + h_sigma * np.sqrt(
+            self.cc * (2 - self.cc) * self.mu_eff
+        ) * y_w
+        rank_mu = (y * self.weights[:, np.newaxis]).T @ y
+        self.cov = (
+            (1 - self.c1 - self.cmu) * self.cov
+            + self.c1
+            * (
+                np.outer(self.pc, self.pc)
+                + (1 - h_sigma) * self.cc * (2 - self.cc) * self.cov
+            )
+            + self.cmu * rank_mu
+        )
+        self.cov = (self.cov + self.cov.T) / 2
+        self.sigma *= np.exp(
+            (self.cs / self.damps) * (ps_norm / self.chi_n - 1)
+        )
+
+
+OPTIMIZERS = {"de": DifferentialEvolution, "cmaes": CMAES}
+
+
+class Calibration:
+    """Calibrate the parameters of a sim with a population-based optimizer.
+
+    Each generation of the optimizer is run as an `Ensemble` of the base
+    sim, in parallel with `MultiSim`, and scored by `objective` in the
+    worker that ran it. Failed sims score `inf`. With a `checkpoint`
+    path, the optimizer state and history are saved after every
+    generation and `run(resume=True)` continues from them.
+
+    Attributes
+    ----------
+    glm_sim : GLMSim
+        The base simulation.
+    space : ParameterSpace
+        The parameters to calibrate.
+    objective : Callable[[GLMSim], float]
+        Scores a finished sim. Lower is better. Must be picklable.
+    optimizer : Union[DifferentialEvolution, CMAES]
+        Optimizer with `ask()` and `tell()` methods.
+    checkpoint : Union[str, None]
+        Path to save the optimizer state to after every generation.
+    history : pd.DataFrame
+        Parameter values and objective value of every member run.
+
+    Examples
+    --------
+    >>> from glmpy.calibrate import (
+    ...     Calibration, ParameterSpace, SeriesObjective, LakeColumn
+    ... )
+    >>> space = ParameterSpace(
+    ...     sim, ["glm.mixing.coef_mix_hyp", "glm.light.Kw"]
+    ... )
+    >>> objective = SeriesObjective(observed, LakeColumn("Surface Temp"))
+    >>> calibration = Calibration(
+    ...     sim, space, objective, "cmaes", checkpoint="calibration.pkl"
+    ... )
+    >>> best = calibration.run(generations=50, rm_sim_dir=True)
+    >>> calibration.best_params
+    """
+
+    def __init__(
+        self,
+        glm_sim: GLMSim,
+        space: ParameterSpace,
+        objective: Callable[[GLMSim], float],
+        optimizer: Union[str, Any] = "de",
+        pop_size: Union[int, None] = None,
+        seed: Union[int, None] = None,
+        checkpoint: Union[str, None] = None,
+    ):
+        self.glm_sim = glm_sim
+        self.space = space
+        self.objective = objective
+        if isinstance(optimizer, str):
+            if optimizer not in OPTIMIZERS:
+                raise ValueError(
+                    f"optimizer must be one of {list(OPTIMIZERS)}. "
+                    f"Got {optimizer}"
+                )
+            optimizer = OPTIMIZERS[optimizer](
+                space.dim,
+                pop_size,
+                x0=space.initial(glm_sim),
+                seed=seed,
+            )
+        self.optimizer = optimizer
+        self.checkpoint = checkpoint
+        self.generation = 0
+        self.history = pd.DataFrame(
+            columns=["generation", "sim_name"]
+            + space.param_paths
+            + ["objective"]
+        )
+
+    @property
+    def best_params(self) -> Dict[str, Any]:
+        """Parameter values of the best member so far."""
+        if self.optimizer.best_x is None:
+            return {}
+        # Records keep the int of integer parameters, unlike a row
+        return self.space.to_frame(self.optimizer.best_x).to_dict("records")[0]
+
+    def save(self, path: Union[str, None] = None):
+        """Save the optimizer state and history."""
+        path = path or self.checkpoint
+        if path is None:
+            raise ValueError("No path to save the checkpoint to.")
+        state = {
+            "optimizer": self.optimizer,
+            "generation": self.generation,
+            "history": self.history,
+            "param_paths": self.space.param_paths,
+        }
+        # Written to a temporary file first so a crash leaves the last one
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path))
+        )
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: Union[str, None] = None):
+        """Restore the optimizer state and history from a checkpoint."""
+        path = path or self.checkpoint
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state["param_paths"] != self.space.param_paths:
+            raise ValueError(
+                "The checkpoint is for the parameters "
+                f"{state['param_paths']}, not {self.space.param_paths}."
+            )
+        self.optimizer = state["optimizer"]
+        self.generation = state["generation"]
+        self.history = state["history"]
+
+    def evaluate(
+        self,
+        x: np.ndarray,
+        executor: Union[str, SimExecutor] = "process",
+        **run_kwargs,
+    ) -> np.ndarray:
+        """Run a generation of points and return their objective values."""
+        design = self.space.to_frame(x)
+        sim_names = [
+            f"{self.glm_sim.sim_name}_g{self.generation}_{i}"
+            for i in range(len(design))
+        ]
+        rvs = Ensemble(self.glm_sim, design, sim_names).run(
+            on_sim_end=self.objective, executor=executor, **run_kwargs
+        )
+        f = np.array(
+            [
+                np.inf if isinstance(rv, SimFailure) else float(rv)
+                for rv in rvs
+            ]
+        )
+        f[np.isnan(f)] = np.inf
+        rows = design.assign(
+            generation=self.generation, sim_name=sim_names, objective=f
+        )
+        self.history = pd.concat(
+            [self.history.astype(rows.dtypes.to_dict()), rows],
+            ignore_index=True,
+        )[self.history.columns]
+        return f
+
+    def run(
+        self,
+        generations: int = 20,
+        target: Union[float, None] = None,
+        resume: bool = False,
+        executor: Union[str, SimExecutor] = "process",
+        cpu_count: Union[int, None] = None,
+        on_generation: Union[Callable[[int, float], Any], None] = None,
+        **run_kwargs,
+    ) -> Dict[str, Any]:
+        """Run the optimizer until `generations` have been evaluated.
+
+        Stops early once the best objective value is at most `target`.
+        With `resume=True` and an existing checkpoint, continues from it.
+        All generations run on one pool of workers (or `executor`) and
+        `run_kwargs` are passed to `MultiSim.run()`. `on_generation` is
+        called with the number of generations run and the best objective
+        value after each generation. Returns the best parameter values.
+        """
+        if resume and self.checkpoint and os.path.isfile(self.checkpoint):
+            self.load()
+        run_kwargs.setdefault("time_sim", False)
+        run_kwargs.setdefault("time_multi_sim", False)
+        owns_executor = not isinstance(executor, SimExecutor)
+        if owns_executor:
+            executor = SimExecutor(executor, cpu_count).start()
+        try:
+            while self.generation < generations:
+                if target is not None and self.optimizer.best_f <= target:
+                    break
+                x = self.optimizer.ask()
+                f = self.evaluate(x, executor, **run_kwargs)
+                if np.all(np.isinf(f)):
+                    warnings.warn(
+                        f"Every sim of generation {self.generation} failed."
+                    )
+                self.optimizer.tell(x, f)
+                self.generation += 1
+                if self.checkpoint is not None:
+                    self.save()
+                if on_generation is not None:
+                    on_generation(self.generation, self.optimizer.best_f)
+        finally:
+            if owns_executor:
+                executor.shutdown(wait=executor.kind == "thread")
+        return self.best_params
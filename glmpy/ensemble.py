@@ -0,0 +1,339 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+from typing import Union, List, Dict, Any, Tuple
+from glmpy.sim import GLMSim, MultiSim
+from glmpy.executor import SimExecutor
+from glmpy.nml.nml import NMLParam
+
+
+def parse_param_path(path: str) -> Tuple[str, str, str]:
+    """Split a `"nml.block.param"` path into its parts.
+
+    Examples
+    --------
+    >>> from glmpy.ensemble import parse_param_path
+    >>> parse_param_path("glm.mixing.coef_mix_hyp")
+    ('glm', 'mixing', 'coef_mix_hyp')
+    """
+    parts = path.split(".")
+    if len(parts) != 3 or not all(parts):
+        raise ValueError(
+            "Parameter paths must be of the form 'nml.block.param'. "
+            f"Got '{path}'"
+        )
+    return parts[0], parts[1], parts[2]
+
+
+def param_bounds(
+    sim: GLMSim, path: str, rel_range: float = 0.5
+) -> Tuple[float, float]:
+    """Return the range of a numeric parameter to sample from.
+
+    Each bound is the `val_gt`/`val_gte` or `val_lt`/`val_lte` limit of the
+    `NMLParam` where it has one, and otherwise the current value of the
+    parameter in `sim` less or plus `rel_range` of its magnitude.
+
+    Examples
+    --------
+    >>> from glmpy.ensemble import param_bounds
+    >>> from glmpy.example_sims import SparklingSim
+    >>> param_bounds(SparklingSim(), "glm.light.Kw", rel_range=1.0)
+    (0.0, 0.662)
+    """
+    nml_name, block_name, param_name = parse_param_path(path)
+    block = sim.nml[nml_name].blocks.peek(block_name)
+    if block is None or param_name not in block.params:
+        raise KeyError(f"{path} is not a parameter of the sim.")
+    param = block.params[param_name]
+    if param.type not in (int, float) or param.is_list:
+        raise ValueError(f"{path} is not a numeric scalar parameter.")
+    low = param._val_gte_value
+    if low is None:
+        low = param._val_gt_value
+    high = param._val_lte_value
+    if high is None:
+        high = param._val_lt_value
+    value = param.value
+    if (low is None or high is None) and value is None:
+        raise ValueError(
+            f"Cannot determine the bounds of {path}: it has no limits and "
+            "no value in the sim."
+        )
+    if low is None:
+        low = value - rel_range * abs(value)
+    if high is None:
+        high = value + rel_range * abs(value)
+    if not low < high:
+        raise ValueError(
+            f"Cannot determine the bounds of {path}: got ({low}, {high})."
+        )
+    return float(low), float(high)
+
+
+class ParameterSpace:
+    """Maps NML parameters to a bounded float vector.
+
+    Vectors are in the unit hypercube: each element is the position of a
+    parameter between its lower and upper bound. Integer parameters are
+    rounded when mapped to parameter values. Used by `Calibration` and
+    the global sensitivity methods.
+
+    Attributes
+    ----------
+    param_paths : List[str]
+        `"nml.block.param"` paths of the parameters.
+    bounds : Dict[str, Tuple[float, float]]
+        Lower and upper bound of each parameter. Bounds not given are
+        taken from the limits of the parameters (see `param_bounds()`).
+
+    Examples
+    --------
+    >>> from glmpy.ensemble import ParameterSpace
+    >>> space = ParameterSpace(
+    ...     sim,
+    ...     ["glm.mixing.coef_mix_hyp", "glm.light.Kw"],
+    ...     bounds={"glm.light.Kw": (0.2, 1.0)},
+    ... )
+    >>> space.to_frame(np.array([[0.5, 0.5]]))
+    """
+
+    def __init__(
+        self,
+        glm_sim: GLMSim,
+        param_paths: List[str],
+        bounds: Union[Dict[str, Tuple[float, float]], None] = None,
+        rel_range: float = 0.5,
+    ):
+        if not param_paths:
+            raise ValueError("At least one parameter path is required.")
+        self.param_paths = list(param_paths)
+        bounds = bounds or {}
+        self.bounds = {}
+        self._is_int = {}
+        for path in self.param_paths:
+            nml_name, block_name, param_name = parse_param_path(path)
+            param = glm_sim.nml[nml_name].blocks.peek(block_name).params[
+                param_name
+            ]
+            self._is_int[path] = param.type is int
+            if path in bounds:
+                self.bounds[path] = tuple(float(b) for b in bounds[path])
+            else:
+                self.bounds[path] = param_bounds(glm_sim, path, rel_range)
+        self._low = np.array([self.bounds[p][0] for p in self.param_paths])
+        self._high = np.array([self.bounds[p][1] for p in self.param_paths])
+
+    @property
+    def dim(self) -> int:
+        return len(self.param_paths)
+
+    def to_unit(self, values: np.ndarray) -> np.ndarray:
+        """Map parameter values to the unit hypercube."""
+        unit = (np.asarray(values, dtype=float) - self._low) / (
+            self._high - self._low
+        )
+        return np.clip(unit, 0.0, 1.0)
+
+    def from_unit(self, unit: np.ndarray) -> np.ndarray:
+        """Map points in the unit hypercube to parameter values."""
+        unit = np.clip(np.asarray(unit, dtype=float), 0.0, 1.0)
+        return self._low + unit * (self._high - self._low)
+
+    def to_frame(self, unit: np.ndarray) -> pd.DataFrame:
+        """Return the parameter values of points as an ensemble matrix."""
+        df = pd.DataFrame(
+            self.from_unit(np.atleast_2d(unit)), columns=self.param_paths
+        )
+        for path in self.param_paths:
+            if self._is_int[path]:
+                df[path] = df[path].round().astype(int)
+        return df
+
+    def initial(self, glm_sim: GLMSim) -> np.ndarray:
+        """Return the point of the current parameter values of a sim."""
+        values = []
+        for path in self.param_paths:
+            nml_name, block_name, param_name = parse_param_path(path)
+            value = glm_sim.get_param_value(nml_name, block_name, param_name)
+            if value is None:
+                low, high = self.bounds[path]
+                value = (low + high) / 2
+            values.append(value)
+        return self.to_unit(values)
+
+
+def _to_param_value(value: Any, param: NMLParam) -> Any:
+    if isinstance(value, np.generic):
+        value = value.item()
+    # Integer columns with missing values are stored as floats
+    if (
+        param.type is int
+        and isinstance(value, float)
+        and value.is_integer()
+    ):
+        value = int(value)
+    return value
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (np.isscalar(value) and pd.isna(value))
+
+
+class Ensemble:
+    """An ensemble of simulations defined by a parameter matrix.
+
+    Holds a single base simulation and a DataFrame of parameter values with
+    one row per member and one column per `"nml.block.param"` path. Member
+    simulations are only created, as copy-on-write forks of the base
+    simulation, when they are needed to run. Missing values (`NaN`/`None`)
+    in the matrix leave the base value of that parameter unchanged.
+
+    `Ensemble` can be passed anywhere a list of simulations is accepted by
+    `MultiSim`. When run with the process executor, the base simulation is
+    sent once to each worker process and only member indices are sent per
+    simulation.
+
+    Attributes
+    ----------
+    base_sim : GLMSim
+        The simulation that members are derived from.
+    params : pd.DataFrame
+        Parameter matrix indexed by the member simulation names.
+
+    Examples
+    --------
+    >>> from glmpy.ensemble import Ensemble
+    >>> from glmpy.example_sims import SparklingSim
+    >>> ensemble = Ensemble.from_grid(
+    ...     SparklingSim(),
+    ...     {
+    ...         "glm.mixing.coef_mix_hyp": [0.3, 0.5, 0.7],
+    ...         "glm.light.Kw": [0.3, 0.5],
+    ...     }
+    ... )
+    >>> len(ensemble)
+    6
+    >>> def get_max_layers(sim):
+    ...     return sim.get_param_value("glm", "glm_setup", "max_layers")
+    >>> rvs = ensemble.run(on_sim_end=get_max_layers)  # doctest: +SKIP
+    >>> ensemble.to_frame(rvs)  # doctest: +SKIP
+    """
+
+    def __init__(
+        self,
+        base_sim: GLMSim,
+        params: pd.DataFrame,
+        sim_names: Union[List[str], None] = None,
+    ):
+        self.base_sim = base_sim
+        self._paths = [parse_param_path(str(col)) for col in params.columns]
+        for nml_name, block_name, param_name in self._paths:
+            if nml_name not in base_sim.nml:
+                raise KeyError(f"{nml_name} is not an NML of the base sim.")
+            block = base_sim.nml[nml_name].blocks.peek(block_name)
+            if block is None or param_name not in block.params:
+                raise KeyError(
+                    f"{param_name} is not a parameter of the {block_name} "
+                    f"block in the {nml_name} NML of the base sim."
+                )
+        if sim_names is None:
+            sim_names = [
+                f"{base_sim.sim_name}_{i}" for i in range(len(params))
+            ]
+        if len(sim_names) != len(params):
+            raise ValueError(
+                f"Got {len(sim_names)} sim_names for {len(params)} members."
+            )
+        if len(set(sim_names)) != len(sim_names):
+            raise ValueError("sim_names must be unique.")
+        self.params = params.copy()
+        self.params.index = pd.Index(sim_names, name="sim_name")
+
+    @classmethod
+    def from_grid(
+        cls, base_sim: GLMSim, values: Dict[str, List[Any]]
+    ) -> "Ensemble":
+        """Create an ensemble of every combination of parameter values."""
+        rows = list(itertools.product(*values.values()))
+        params = pd.DataFrame(rows, columns=list(values.keys()))
+        return cls(base_sim, params)
+
+    @property
+    def sim_names(self) -> List[str]:
+        return list(self.params.index)
+
+    def __len__(self) -> int:
+        return len(self.params)
+
+    def __getitem__(self, i: int) -> GLMSim:
+        return self.materialize(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.materialize(i)
+
+    def materialize(self, i: int) -> GLMSim:
+        """Create the simulation of the `i`th member."""
+        sim = self.base_sim.fork()
+        sim.sim_name = self.params.index[i]
+        for j, (nml_name, block_name, param_name) in enumerate(self._paths):
+            value = self.params.iat[i, j]
+            if _is_missing(value):
+                continue
+            param = sim.nml[nml_name].blocks[block_name].params[param_name]
+            param.value = _to_param_value(value, param)
+        sim.validate()
+        return sim
+
+    def subset(self, members: Any) -> "Ensemble":
+        """Select members by a boolean mask or a list of sim names."""
+        params = self.params.loc[members]
+        return Ensemble(self.base_sim, params, list(params.index))
+
+    def to_multi_sim(self) -> MultiSim:
+        return MultiSim(self)
+
+    def run(
+        self,
+        on_sim_end=None,
+        batch_size: Union[int, None] = None,
+        **kwargs,
+    ) -> list:
+        """Run the members with `MultiSim.run()`.
+
+        Keyword arguments are passed to `MultiSim.run()`. Returns the
+        `on_sim_end` return values in member order. With `batch_size`,
+        members are run `batch_size` at a time on one pool of workers,
+        e.g., to remove the sim directories of a batch (`rm_sim_dir=True`)
+        before the next is written.
+        """
+        if batch_size is None or batch_size >= len(self):
+            return self.to_multi_sim().run(on_sim_end=on_sim_end, **kwargs)
+        executor = kwargs.pop("executor", "process")
+        cpu_count = kwargs.pop("cpu_count", None)
+        owns_executor = not isinstance(executor, SimExecutor)
+        if owns_executor:
+            executor = SimExecutor(executor, cpu_count).start()
+        rvs = []
+        try:
+            for start in range(0, len(self), batch_size):
+                batch = self.params.iloc[start : start + batch_size]
+                rvs.extend(
+                    Ensemble(self.base_sim, batch, list(batch.index))
+                    .to_multi_sim()
+                    .run(on_sim_end=on_sim_end, executor=executor, **kwargs)
+                )
+        finally:
+            if owns_executor:
+                executor.shutdown(wait=executor.kind == "thread")
+        return rvs
+
+    def to_frame(self, rvs: List[Any], name: str = "result") -> pd.DataFrame:
+        """Join a list of per-member results to the parameter matrix."""
+        if len(rvs) != len(self):
+            raise ValueError(
+                f"Got {len(rvs)} results for {len(self)} members."
+            )
+        return self.params.assign(**{name: list(rvs)})
@@ -0,0 +1,608 @@
+import os
+import glob
+import time
+import queue
+import pickle
+import shutil
+import datetime
+import tempfile
+import warnings
+import itertools
+import threading
+import collections
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Union, Dict, List, Any, Callable
+
+
+def _scratch_root(workspace: str) -> str:
+    if workspace == "worker":
+        scratch_dir = getattr(_WORKER_STATE, "scratch_dir", None)
+        if scratch_dir is not None:
+            return scratch_dir
+        warnings.warn(
+            "Not running in a SimExecutor worker. Using the system "
+            "temporary directory as the workspace."
+        )
+        return tempfile.gettempdir()
+    if workspace == "tmpfs":
+        if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+            return "/dev/shm"
+        warnings.warn(
+            "/dev/shm is not available. Using the system temporary "
+            "directory as the workspace."
+        )
+        return tempfile.gettempdir()
+    os.makedirs(workspace, exist_ok=True)
+    return workspace
+
+
+def _parse_cpu_list(cpu_list: str) -> List[int]:
+    # Linux CPU list format, e.g., "0-3,8,10-11"
+    cpus = []
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+        start, _, stop = part.partition("-")
+        cpus.extend(range(int(start), int(stop or start) + 1))
+    return cpus
+
+
+def _read_text(path: str) -> Union[str, None]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_cpu_quota() -> Union[float, None]:
+    """CPUs allowed by the cgroup CPU quota of this process, if any."""
+    cgroups = _read_text("/proc/self/cgroup")
+    if cgroups is None:
+        return None
+    for line in cgroups.splitlines():
+        _, controllers, path = line.split(":", 2)
+        path = path.lstrip("/")
+        if controllers == "":
+            # cgroup v2: "<quota> <period>" or "max <period>"
+            for cpu_max_path in (
+                os.path.join("/sys/fs/cgroup", path, "cpu.max"),
+                "/sys/fs/cgroup/cpu.max",
+            ):
+                cpu_max = _read_text(cpu_max_path)
+                if cpu_max is not None:
+                    quota, period = cpu_max.split()
+                    if quota == "max":
+                        return None
+                    return int(quota) / int(period)
+        elif "cpu" in controllers.split(","):
+            for cgroup_dir in (
+                os.path.join("/sys/fs/cgroup", controllers, path),
+                os.path.join("/sys/fs/cgroup", controllers),
+                "/sys/fs/cgroup/cpu",
+            ):
+                quota = _read_text(
+                    os.path.join(cgroup_dir, "cpu.cfs_quota_us")
+                )
+                period = _read_text(
+                    os.path.join(cgroup_dir, "cpu.cfs_period_us")
+                )
+                if quota is not None and period is not None:
+                    if int(quota) <= 0:
+                        return None
+                    return int(quota) / int(period)
+    return None
+
+
+def available_cpu_count() -> Union[int, None]:
+    """Number of CPUs this process may use.
+
+    Takes the CPU affinity of the process and any cgroup CPU quota (e.g.,
+    the `--cpus` of a container) into account, unlike `os.cpu_count()`.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpu_count = len(os.sched_getaffinity(0))
+    else:
+        cpu_count = os.cpu_count()
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        quota_count = max(int(-(-quota // 1)), 1)
+        cpu_count = min(cpu_count or quota_count, quota_count)
+    return cpu_count
+
+
+_CPU_GROUPS = {}
+
+
+def _cpu_groups(pin: str) -> List[List[int]]:
+    """Group the CPUs of this process by physical core or NUMA node."""
+    groups = _CPU_GROUPS.get(pin)
+    if groups is not None:
+        return groups
+    cpus = sorted(os.sched_getaffinity(0))
+    if pin == "core":
+        keys = {}
+        for cpu in cpus:
+            topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+            keys[cpu] = (
+                _read_text(os.path.join(topology, "physical_package_id")),
+                _read_text(os.path.join(topology, "core_id")) or cpu,
+            )
+    else:
+        keys = {cpu: 0 for cpu in cpus}
+        for node_dir in glob.glob("/sys/devices/system/node/node[0-9]*"):
+            cpu_list = _read_text(os.path.join(node_dir, "cpulist"))
+            for cpu in _parse_cpu_list(cpu_list or ""):
+                if cpu in keys:
+                    keys[cpu] = int(os.path.basename(node_dir)[4:])
+    groups = collections.OrderedDict()
+    for cpu in cpus:
+        groups.setdefault(keys[cpu], []).append(cpu)
+    groups = list(groups.values())
+    _CPU_GROUPS[pin] = groups
+    return groups
+
+
+def _thread_env(threads: int) -> Dict[str, str]:
+    """Environment that caps the threads of BLAS and OpenMP runtimes."""
+    env = dict(os.environ)
+    for name in (
+        "OMP_NUM_THREADS",
+        "OPENBLAS_NUM_THREADS",
+        "MKL_NUM_THREADS",
+        "VECLIB_MAXIMUM_THREADS",
+        "NUMEXPR_NUM_THREADS",
+    ):
+        env[name] = str(threads)
+    return env
+
+
+class EnsembleProgress:
+    """Aggregates the progress that the sims of a `MultiSim` report.
+
+    Tracks the simulated date and fraction of days complete of each sim
+    to give the ensemble-wide throughput in simulated days per second of
+    wall time and an estimate of the time remaining. `to_frame()` gives
+    the throughput of each sim, e.g., to spot slow members.
+
+    Attributes
+    ----------
+    num_sims : int
+        Number of sims being run.
+    start_time : float
+        `time.perf_counter()` at the start of the run.
+
+    Examples
+    --------
+    >>> from glmpy.sim import MultiSim
+    >>> multi_sim = MultiSim(glm_sims)
+    >>> rvs = multi_sim.run(on_progress=True)
+    Progress 42.0% (4 of 10 sims finished), 1520.3 simulated days/s, ...
+    >>> multi_sim.progress.to_frame().sort_values("days_per_second")
+    """
+
+    def __init__(self, num_sims: int):
+        self.num_sims = num_sims
+        self.start_time = time.perf_counter()
+        self._sims = {}
+        self._finished = set()
+        self._lock = threading.Lock()
+
+    def update(
+        self, sim_name: str, current_date: datetime.date, fraction: float
+    ):
+        now = time.perf_counter()
+        with self._lock:
+            if sim_name in self._finished:
+                return
+            state = self._sims.get(sim_name)
+            if state is None:
+                # Days before the first report are not counted
+                state = self._sims[sim_name] = {
+                    "start_date": current_date,
+                    "start_time": now,
+                }
+            state["date"] = current_date
+            state["fraction"] = fraction
+            state["time"] = now
+
+    def finish(self, sim_name: str):
+        """Mark a sim as finished, whether or not it reported progress."""
+        with self._lock:
+            self._finished.add(sim_name)
+
+    @property
+    def simulated_days(self) -> int:
+        with self._lock:
+            return sum(
+                (state["date"] - state["start_date"]).days
+                for state in self._sims.values()
+            )
+
+    @property
+    def fraction(self) -> float:
+        """Fraction of the ensemble complete."""
+        if self.num_sims == 0:
+            return 1.0
+        with self._lock:
+            done = len(self._finished) + sum(
+                state["fraction"]
+                for sim_name, state in self._sims.items()
+                if sim_name not in self._finished
+            )
+        return min(done / self.num_sims, 1.0)
+
+    @property
+    def throughput(self) -> float:
+        """Simulated days per second of wall time."""
+        elapsed = time.perf_counter() - self.start_time
+        if elapsed <= 0:
+            return 0.0
+        return self.simulated_days / elapsed
+
+    @property
+    def eta(self) -> Union[float, None]:
+        """Estimated seconds until the ensemble is complete."""
+        fraction = self.fraction
+        if fraction <= 0:
+            return None
+        elapsed = time.perf_counter() - self.start_time
+        return elapsed * (1 - fraction) / fraction
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the latest progress of each sim that has reported."""
+        with self._lock:
+            rows = [
+                {
+                    "sim_name": sim_name,
+                    "date": state["date"],
+                    "fraction": state["fraction"],
+                    "days_per_second": (
+                        (state["date"] - state["start_date"]).days
+                        / (state["time"] - state["start_time"])
+                        if state["time"] > state["start_time"]
+                        else np.nan
+                    ),
+                    "finished": sim_name in self._finished,
+                }
+                for sim_name, state in self._sims.items()
+            ]
+        columns = [
+            "sim_name", "date", "fraction", "days_per_second", "finished"
+        ]
+        return pd.DataFrame(rows, columns=columns).set_index("sim_name")
+
+    def __str__(self):
+        eta = self.eta
+        if eta is None:
+            eta = "unknown"
+        else:
+            eta = str(datetime.timedelta(seconds=round(eta)))
+        return (
+            f"Progress {self.fraction:.1%} ({len(self._finished)} of "
+            f"{self.num_sims} sims finished), {self.throughput:.1f} "
+            f"simulated days/s, ETA {eta}"
+        )
+
+
+class _ProgressForwarder:
+    """Sends the progress of a sim in a worker to a `_ProgressMonitor`."""
+
+    def __init__(self, progress_queue, interval: float = 0.5):
+        self.progress_queue = progress_queue
+        self.interval = interval
+        self._last = None
+
+    def __call__(
+        self, sim_name: str, current_date: datetime.date, fraction: float
+    ):
+        # Throttled as every update is a round trip to the parent
+        now = time.perf_counter()
+        if (
+            self._last is None
+            or fraction >= 1.0
+            or now - self._last >= self.interval
+        ):
+            self._last = now
+            self.progress_queue.put((sim_name, current_date, fraction))
+
+
+class _ProgressMonitor:
+    """Collects the progress of the sims in `SimExecutor` workers.
+
+    Worker processes send their progress through a queue served by a
+    `multiprocessing.Manager` so that it can be passed along with each
+    task to a pool that is already running. A thread in the parent
+    process drains the queue into an `EnsembleProgress`.
+    """
+
+    def __init__(
+        self,
+        progress: EnsembleProgress,
+        on_progress: Union[Callable, bool],
+        kind: str,
+        report_interval: float = 5.0,
+    ):
+        self.progress = progress
+        self.on_progress = on_progress
+        self.kind = kind
+        self.report_interval = report_interval
+        self._manager = None
+        self._queue = None
+        self._thread = None
+
+    def start(self):
+        """Start draining and return the queue to send progress to."""
+        if self.kind == "process":
+            self._manager = multiprocessing.Manager()
+            self._queue = self._manager.Queue()
+        else:
+            self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+        return self._queue
+
+    def _drain(self):
+        last_report = time.perf_counter()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.report_interval)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                self.progress.update(*item)
+                if callable(self.on_progress):
+                    self.on_progress(*item)
+            now = time.perf_counter()
+            if (
+                self.on_progress is True
+                and now - last_report >= self.report_interval
+            ):
+                print(self.progress)
+                last_report = now
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+# Per worker thread (or process) state set up by a SimExecutor
+_WORKER_STATE = threading.local()
+
+# Lazy sim sources loaded by this worker process, most recent last
+_SHARED_SOURCES = collections.OrderedDict()
+_SHARED_SOURCES_LOCK = threading.Lock()
+_MAX_SHARED_SOURCES = 4
+
+
+class _SharedSource:
+    """Handle to a lazy sim source pickled to a file by a `SimExecutor`."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        with _SHARED_SOURCES_LOCK:
+            source = _SHARED_SOURCES.get(self.path)
+            if source is None:
+                with open(self.path, "rb") as f:
+                    source = pickle.load(f)
+                _SHARED_SOURCES[self.path] = source
+                while len(_SHARED_SOURCES) > _MAX_SHARED_SOURCES:
+                    _SHARED_SOURCES.popitem(last=False)
+            else:
+                _SHARED_SOURCES.move_to_end(self.path)
+        return source
+
+
+def _init_executor_worker(root_dir: str, slots=None):
+    _WORKER_STATE.scratch_dir = tempfile.mkdtemp(
+        prefix=f"worker_{os.getpid()}_{threading.get_ident()}_",
+        dir=root_dir,
+    )
+    if slots is not None:
+        with slots.get_lock():
+            _WORKER_STATE.slot = slots.value
+            slots.value += 1
+
+
+def _worker_affinity(pin: str) -> Union[List[int], None]:
+    """CPUs to pin the GLM processes of this worker to.
+
+    Workers are spread over the physical cores (`pin="core"`) or NUMA
+    nodes (`pin="numa"`) by the order in which they started.
+    """
+    if pin not in ("core", "numa"):
+        raise ValueError(f"pin must be 'core' or 'numa'. Got {pin}")
+    slot = getattr(_WORKER_STATE, "slot", None)
+    if slot is None or not hasattr(os, "sched_getaffinity"):
+        return None
+    groups = _cpu_groups(pin)
+    return groups[slot % len(groups)]
+
+
+def _run_chunk(fn: Callable, chunk: list) -> list:
+    return [fn(task) for task in chunk]
+
+
+class SimExecutor:
+    """Long-lived pool of workers for running simulations.
+
+    Creating worker processes and importing glmpy in them costs about a
+    second per worker. A `SimExecutor` keeps its workers alive between
+    calls so that repeated runs (e.g., the iterations of a calibration)
+    only pay this once. Pass it as the `executor` of `MultiSim.run()`,
+    `MultiSim.iter_results()` or `LocalSensitivity.run()`.
+
+    Each worker has its own scratch directory, used by runs with
+    `workspace="worker"`, and keeps the lazy sim sources (e.g., the base
+    sim of an `Ensemble`) it has loaded so they are only sent once.
+
+    Attributes
+    ----------
+    kind : str
+        `"process"` for a pool of worker processes or `"thread"` for a
+        pool of threads.
+    max_workers : int
+        Number of workers. Default: the number of CPUs.
+    scratch_dir : Union[str, None]
+        Directory to create the worker scratch directories in. `"tmpfs"`
+        uses `/dev/shm` where available. Default: the system temporary
+        directory.
+
+    Examples
+    --------
+    >>> from glmpy.sim import MultiSim
+    >>> from glmpy.executor import SimExecutor
+    >>> with SimExecutor(max_workers=4, scratch_dir="tmpfs") as executor:
+    ...     for glm_sims in generations:
+    ...         rvs = MultiSim(glm_sims).run(
+    ...             executor=executor, workspace="worker"
+    ...         )
+    """
+
+    def __init__(
+        self,
+        kind: str = "process",
+        max_workers: Union[int, None] = None,
+        scratch_dir: Union[str, None] = None,
+    ):
+        if kind not in ("process", "thread"):
+            raise ValueError(
+                f"executor must be 'process' or 'thread'. Got {kind}"
+            )
+        self.kind = kind
+        self.max_workers = max_workers or available_cpu_count() or 1
+        self.scratch_dir = scratch_dir
+        self._pool = None
+        self._root_dir = None
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def start(self) -> "SimExecutor":
+        """Start the workers if they are not already running."""
+        if self._pool is not None:
+            return self
+        scratch_root = None
+        if self.scratch_dir is not None:
+            scratch_root = _scratch_root(self.scratch_dir)
+        self._root_dir = tempfile.mkdtemp(
+            prefix="glmpy_executor_", dir=scratch_root
+        )
+        # Numbers the workers to spread them over CPUs when pinned
+        slots = multiprocessing.Value("i", 0)
+        if self.kind == "process":
+            self._pool = multiprocessing.Pool(
+                processes=self.max_workers,
+                initializer=_init_executor_worker,
+                initargs=(self._root_dir, slots),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_executor_worker,
+                initargs=(self._root_dir, slots),
+            )
+        return self
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers and remove their scratch directories.
+
+        With `wait=False`, worker processes are terminated without waiting
+        for their tasks to finish and queued thread tasks are cancelled.
+        """
+        if self._pool is None:
+            return
+        if self.kind == "process":
+            if wait:
+                self._pool.close()
+            else:
+                self._pool.terminate()
+            self._pool.join()
+        else:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._pool = None
+        shutil.rmtree(self._root_dir, ignore_errors=True)
+        self._root_dir = None
+
+    def __enter__(self) -> "SimExecutor":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=exc_type is None)
+
+    def share(self, source: Any) -> Any:
+        """Return a handle to `source` to send to the workers in tasks.
+
+        Worker processes load the source from a file once rather than
+        receiving it with every task. Threads share it directly.
+        """
+        if self.kind == "thread":
+            return source
+        fd, path = tempfile.mkstemp(
+            prefix="source_", suffix=".pkl", dir=self._root_dir
+        )
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(source, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return _SharedSource(path)
+
+    def unshare(self, handle: Any):
+        if isinstance(handle, _SharedSource):
+            try:
+                os.remove(handle.path)
+            except OSError:
+                pass
+
+    def imap_unordered(self, fn: Callable, tasks, chunksize: int = 1):
+        """Yield `fn(task)` for each of `tasks` in order of completion.
+
+        Tasks are sent to the workers `chunksize` at a time and at most two
+        chunks per worker are queued, so closing the generator stops the
+        remaining tasks from starting.
+        """
+        if self._pool is None:
+            raise RuntimeError("The SimExecutor has not been started.")
+        tasks = iter(tasks)
+        chunks = iter(lambda: list(itertools.islice(tasks, chunksize)), [])
+        done = queue.Queue()
+
+        def _submit(chunk: list):
+            if self.kind == "process":
+                self._pool.apply_async(
+                    _run_chunk,
+                    (fn, chunk),
+                    callback=done.put,
+                    error_callback=done.put,
+                )
+            else:
+                future = self._pool.submit(_run_chunk, fn, chunk)
+                future.add_done_callback(done.put)
+
+        pending = 0
+        for chunk in itertools.islice(chunks, 2 * self.max_workers):
+            _submit(chunk)
+            pending += 1
+        while pending:
+            results = done.get()
+            pending -= 1
+            if isinstance(results, Future):
+                results = results.exception() or results.result()
+            if isinstance(results, BaseException):
+                raise results
+            for chunk in itertools.islice(chunks, 1):
+                _submit(chunk)
+                pending += 1
+            yield from results
@@ -0,0 +1,232 @@
+import os
+import json
+import heapq
+import base64
+import pickle
+import datetime
+import numpy as np
+import pandas as pd
+
+from typing import Union, Dict, List, Any, TYPE_CHECKING
+from glmpy.runner import RunResult
+
+if TYPE_CHECKING:
+    from glmpy.sim import Sim
+
+
+class RunManifest:
+    """Append-only record of the simulations run by a `MultiSim`.
+
+    Each finished simulation appends one JSON line holding its name, a
+    digest of its configuration, its status, the GLM process timings and
+    the `on_sim_end` return value. Return values that do not survive a JSON
+    round trip unchanged are stored pickled. Later records for a sim name
+    supersede earlier ones.
+
+    Attributes
+    ----------
+    path : str
+        Path of the JSON lines manifest file.
+
+    Examples
+    --------
+    >>> from glmpy.sim import MultiSim
+    >>> multi_sim = MultiSim(glm_sims)
+    >>> rvs = multi_sim.run(on_sim_end=get_results, resume=True)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def records(self) -> Dict[str, dict]:
+        """Return the latest record of each sim name."""
+        records = {}
+        if not os.path.isfile(self.path):
+            return records
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partial line left by an interrupted write
+                    continue
+                records[record["sim_name"]] = record
+        return records
+
+    def append(self, records: List[dict]):
+        dir_name = os.path.dirname(self.path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        with open(self.path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+
+    @staticmethod
+    def make_record(
+        sim_name: str,
+        config_hash: str,
+        result: Union[RunResult, None],
+        rv: Any,
+    ) -> dict:
+        record = {
+            "sim_name": sim_name,
+            "config_hash": config_hash,
+            "status": "failed",
+            "time": datetime.datetime.now().isoformat(),
+        }
+        if result is not None:
+            record.update(result.to_dict())
+            record["sim_name"] = sim_name
+        try:
+            if json.loads(json.dumps(rv, allow_nan=False)) == rv:
+                record["rv"] = rv
+                return record
+        except (TypeError, ValueError):
+            pass
+        try:
+            record["rv_pickle"] = base64.b64encode(pickle.dumps(rv)).decode()
+        except Exception:
+            # Without a stored return value the sim cannot be resumed
+            record["status"] = "unrecorded"
+        return record
+
+    @staticmethod
+    def load_rv(record: dict) -> Any:
+        if "rv_pickle" in record:
+            return pickle.loads(base64.b64decode(record["rv_pickle"]))
+        return record.get("rv")
+
+
+def _peek_param(
+    sim: "Sim", nml_name: str, block_name: str, param_name: str
+):
+    nml = sim.nml.get(nml_name)
+    if nml is None:
+        return None
+    block = nml.blocks.peek(block_name)
+    if block is None or param_name not in block.params:
+        return None
+    return block.params[param_name].value
+
+
+class RuntimePredictor:
+    """Predicts GLM runtimes from simulation configurations.
+
+    Runtime is modelled as linear in the number of time steps, the time
+    steps times `max_layers`, the time steps times `max_layers` times the
+    number of AED models, and the number of saved outputs. The model is
+    fitted by least squares to observed runtimes. With too few observations
+    a fixed cost model is scaled to fit them instead, which still ranks
+    simulations by their expected cost.
+
+    Attributes
+    ----------
+    path : Union[str, None]
+        JSON file that observations are loaded from and saved to.
+    max_observations : int
+        Number of most recent observations to keep.
+
+    Examples
+    --------
+    >>> from glmpy.sim import MultiSim
+    >>> from glmpy.manifest import RuntimePredictor
+    >>> predictor = RuntimePredictor("runtimes.json")
+    >>> multi_sim = MultiSim(glm_sims)
+    >>> rvs = multi_sim.run(schedule="ljf", predictor=predictor)
+    >>> multi_sim.schedule_report
+    """
+
+    # Rough seconds per unit of each feature
+    prior = [0.0, 1e-5, 2e-7, 2e-7, 1e-5]
+
+    def __init__(
+        self, path: Union[str, None] = None, max_observations: int = 10000
+    ):
+        self.path = path
+        self.max_observations = max_observations
+        self.observations = []
+        self._coef = None
+        if path is not None and os.path.isfile(path):
+            with open(path) as f:
+                self.observations = json.load(f)["observations"]
+
+    @staticmethod
+    def features(sim: "Sim") -> List[float]:
+        """Return the cost features of `sim`."""
+        timefmt = _peek_param(sim, "glm", "time", "timefmt")
+        num_days = _peek_param(sim, "glm", "time", "num_days")
+        if timefmt == 2 or num_days is None:
+            start = _peek_param(sim, "glm", "time", "start")
+            stop = _peek_param(sim, "glm", "time", "stop")
+            if start is not None and stop is not None:
+                num_days = (
+                    pd.Timestamp(stop) - pd.Timestamp(start)
+                ).total_seconds() / 86400
+        dt = _peek_param(sim, "glm", "time", "dt") or 3600.0
+        max_layers = _peek_param(sim, "glm", "glm_setup", "max_layers") or 500
+        nsave = _peek_param(sim, "glm", "output", "nsave") or 1
+        aed_models = _peek_param(sim, "aed", "aed_models", "models") or []
+        steps = (num_days or 0) * 86400 / dt
+        return [
+            1.0,
+            steps,
+            steps * max_layers,
+            steps * max_layers * len(aed_models),
+            steps / nsave,
+        ]
+
+    def observe(self, features: List[float], runtime: float):
+        self.observations.append([list(features), runtime])
+        del self.observations[: -self.max_observations]
+        self._coef = None
+
+    def fit(self) -> np.ndarray:
+        """Fit the model to the observations and return its coefficients."""
+        prior = np.array(self.prior)
+        if not self.observations:
+            self._coef = prior
+            return self._coef
+        x = np.array([obs[0] for obs in self.observations])
+        y = np.array([obs[1] for obs in self.observations])
+        coef = None
+        if len(y) >= 2 * x.shape[1]:
+            # Least squares, refitted without features that come out
+            # negative so that costs stay positive
+            active = np.ones(x.shape[1], dtype=bool)
+            while active.any():
+                fitted, *_ = np.linalg.lstsq(x[:, active], y, rcond=None)
+                if (fitted >= 0).all():
+                    coef = np.zeros(x.shape[1])
+                    coef[active] = fitted
+                    break
+                active[np.flatnonzero(active)[fitted < 0]] = False
+        if coef is None or not coef[1:].any():
+            prior_y = x @ prior
+            scale = 1.0
+            if prior_y.any() and prior_y @ y > 0:
+                scale = (prior_y @ y) / (prior_y @ prior_y)
+            coef = prior * scale
+        self._coef = coef
+        return self._coef
+
+    def predict(self, features: List[float]) -> float:
+        """Return the predicted runtime in seconds."""
+        if self._coef is None:
+            self.fit()
+        return max(float(np.dot(self._coef, features)), 0.0)
+
+    def save(self, path: Union[str, None] = None):
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path to save the observations to.")
+        with open(path, "w") as f:
+            json.dump({"observations": self.observations}, f)
+
+    @staticmethod
+    def makespan(runtimes: List[float], cpu_count: int) -> float:
+        """Makespan of `runtimes` run in order on `cpu_count` workers."""
+        workers = [0.0] * max(cpu_count, 1)
+        for runtime in runtimes:
+            heapq.heappush(workers, heapq.heappop(workers) + runtime)
+        return max(workers)
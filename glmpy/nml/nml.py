@@ -55,7 +55,8 @@ class NMLDictBase(dict, Generic[T]):
     def validate(self):
         """Base validation logic."""
         if self.strict:
-            for name, item in self.items():
+            # Read-only, so shared blocks need not be copied
+            for name, item in dict.items(self):
                 if isinstance(item, self._value_type):
                     item.validate()
                 elif not (self._allow_none and item is None):
@@ -363,12 +364,85 @@ class NMLBlock(ABC):
                 
 
 class NMLBlockDict(NMLDictBase):
-    """Dictionary of NMLBlock objects."""
+    """Dictionary of NMLBlock objects.
+
+    Blocks can be shared copy-on-write between dictionaries created with
+    `_fork()`. A shared block is copied the first time it is accessed by
+    key or through `values()` or `items()`, or when `strict` changes it, so
+    modifying a block never affects another dictionary. Use `peek()` and
+    `peek_items()` for read-only access without copying.
+    """
     _value_type = NMLBlock
     _allow_none = True
+
+    def __init__(self, *args, **kwargs):
+        # Before the base init, which sets strict
+        self._shared = set()
+        super().__init__(*args, **kwargs)
     
     def __reduce__(self):
         return (NMLBlockDict, (), self.__getstate__())
+
+    @property
+    def strict(self) -> Any:
+        return self._strict
+
+    @strict.setter
+    def strict(self, value: bool):
+        # Only blocks whose setting changes need to be un-shared
+        for key, item in list(dict.items(self)):
+            if isinstance(item, NMLBlock) and item.strict != value:
+                self[key].strict = value
+        self._strict = value
+
+    def __getitem__(self, key: Any) -> NMLBlock:
+        if key in self._shared:
+            block = copy.deepcopy(super().__getitem__(key))
+            super(NMLDictBase, self).__setitem__(key, block)
+            self._shared.discard(key)
+            return block
+        return super().__getitem__(key)
+
+    def _unshare_all(self):
+        for key in list(self._shared):
+            self[key]
+
+    def values(self):
+        self._unshare_all()
+        return super().values()
+
+    def items(self):
+        self._unshare_all()
+        return super().items()
+
+    def pop(self, key: Any, *args) -> Union[NMLBlock, None]:
+        if key in self._shared:
+            self[key]
+        return super().pop(key, *args)
+
+    def peek_items(self):
+        """Get the items for reading without copying shared blocks."""
+        return dict.items(self)
+
+    def get(self, key: Any, default: Any = None) -> Union[NMLBlock, None]:
+        if key in self:
+            return self[key]
+        return default
+
+    def peek(self, key: Any, default: Any = None) -> Union[NMLBlock, None]:
+        """Get a block for reading without copying a shared block."""
+        return dict.get(self, key, default)
+
+    def _fork(self) -> "NMLBlockDict":
+        forked = NMLBlockDict()
+        forked._strict = self._strict
+        dict.update(forked, self)
+        shared = {
+            key for key, block in self.peek_items() if block is not None
+        }
+        self._shared |= shared
+        forked._shared = set(shared)
+        return forked
     
     def __setitem__(self, key, value):
         # if self.strict:
@@ -383,11 +457,12 @@ class NMLBlockDict(NMLDictBase):
                 f"{value} must be a instance of NMLBlock but got type "
                 f"{type(value)}"
             )
+        self._shared.discard(key)
         super(NMLDictBase, self).__setitem__(key, value)
 
     def _to_dict(self, none_blocks: bool = True, none_params: bool = True):
         nml_dict = OrderedDict()
-        for block_name, nml_block in self.items():
+        for block_name, nml_block in self.peek_items():
             if isinstance(nml_block, NMLBlock):
                 nml_dict[block_name] = nml_block.to_dict(none_params)
             elif nml_block is None and none_blocks:
@@ -396,7 +471,7 @@ class NMLBlockDict(NMLDictBase):
 
     def __str__(self):
         nml_dict = {}
-        for block_name, nml_block in self.items():
+        for block_name, nml_block in self.peek_items():
             if isinstance(nml_block, NMLBlock):
                 param_dict = {}
                 for key, nml_param in nml_block.params.items():
@@ -430,6 +505,11 @@ class NML(ABC):
     
     def get_deepcopy(self):
         return copy.deepcopy(self)
+
+    def _fork(self) -> "NML":
+        forked = copy.copy(self)
+        forked.blocks = self.blocks._fork()
+        return forked
     
     def write_nml(
             self, 
@@ -448,7 +528,7 @@ class NML(ABC):
         self.validate()
     
     def get_param_value(self, block_name:str, param_name:str) -> Any:
-        value = self.blocks[block_name].params[param_name].value
+        value = self.blocks.peek(block_name).params[param_name].value
         return value
     
     def set_block(self, block:NMLBlock):
@@ -463,11 +543,12 @@ class NML(ABC):
         pass
 
     def val_required_block(self, block_key, block_type):
-        if self.strict and not isinstance(self.blocks[block_key], block_type):
+        block = self.blocks.peek(block_key)
+        if self.strict and not isinstance(block, block_type):
             raise ValueError(
                 f'blocks["{block_key}"] must be an instance of '
                 f'{block_type.__name__}, got type '
-                f'{type(self.blocks[block_key])}'
+                f'{type(block)}'
             )
 
 
@@ -486,6 +567,15 @@ class NMLDict(NMLDictBase):
             )
         super(NMLDictBase, self).__setitem__(key, value)
 
+    def _fork(self) -> "NMLDict":
+        forked = NMLDict()
+        forked._strict = self._strict
+        for nml_name, nml in self.items():
+            dict.__setitem__(
+                forked, nml_name, nml._fork() if nml is not None else None
+            )
+        return forked
+
     def validate(self):
         """Validates NML objects with custom glm check."""
         if self.strict:
@@ -501,11 +591,11 @@ class NMLDict(NMLDictBase):
             self, none_blocks: bool = True, none_params: bool = True
         ):
         nml_dict = {}
-        for block_name, nml_block in self.items():
-            if isinstance(nml_block, NMLBlock):
-                nml_dict[block_name] = nml_block.to_dict(none_params)
-            elif nml_block is None and none_blocks:
-                nml_dict[block_name] = nml_block
+        for nml_name, nml in self.items():
+            if isinstance(nml, NML):
+                nml_dict[nml_name] = nml.to_dict(none_blocks, none_params)
+            elif nml is None and none_blocks:
+                nml_dict[nml_name] = nml
         return nml_dict
 
     def __str__(self):
@@ -0,0 +1,175 @@
+import os
+import pandas as pd
+
+from typing import Union, List, Dict, Any
+from glmpy.sim import Sim
+from glmpy.nml.glm_nml import GLMNML, OutputBlock
+
+
+class OutputPlanner:
+    """Trim the GLM output configuration to the outputs that are needed.
+
+    Declares the outputs that a run must produce and rewrites the `output`
+    block of a `GLMNML` to produce only those: point CSVs at the required
+    depths with only the required variables, no outlet CSVs, and NetCDF
+    records only as often as required.
+
+    GLM always writes the NetCDF file and the lake CSV (with all of its
+    columns). When no NetCDF variables are required, `nsave` is set to the
+    number of time steps in the simulation so that only the initial and
+    final states are written. `harvest_kwargs()` gives the `harvest` and
+    `harvest_nc_vars` arguments of `Sim.run()` that copy back only the
+    required outputs from a scratch workspace.
+
+    Attributes
+    ----------
+    point_vars : List[str]
+        Variables to write to the point CSVs, e.g., `["temp", "salt"]`.
+    depths : List[float]
+        Depths (m) of the point CSVs.
+    from_bottom : bool
+        Whether `depths` are heights above the lake bottom.
+    lake_columns : List[str]
+        Columns of the lake CSV that are needed.
+    nc_vars : List[str]
+        Variables that are needed from the NetCDF output.
+    frequency : Union[str, float, None]
+        Required interval between NetCDF records, as a pandas timedelta
+        string (e.g., `"1D"`) or in seconds. `None` for the interval of
+        the current `nsave`.
+    outlets : bool
+        Whether the outlet and overflow CSVs are needed.
+
+    Examples
+    --------
+    >>> from glmpy.output_planner import OutputPlanner
+    >>> from glmpy.example_sims import SparklingSim
+    >>> sim = SparklingSim()
+    >>> planner = OutputPlanner(point_vars=["temp"], depths=[1.0])
+    >>> planner.apply(sim)
+    >>> sim.get_param_value("glm", "output", "csv_point_vars")
+    ['temp']
+    >>> result = sim.run(workspace="tmpfs", **planner.harvest_kwargs(sim))
+    """
+
+    def __init__(
+        self,
+        point_vars: Union[List[str], None] = None,
+        depths: Union[List[float], None] = None,
+        from_bottom: bool = False,
+        lake_columns: Union[List[str], None] = None,
+        nc_vars: Union[List[str], None] = None,
+        frequency: Union[str, float, None] = None,
+        outlets: bool = False,
+    ):
+        self.point_vars = list(point_vars or [])
+        self.depths = [float(depth) for depth in depths or []]
+        self.from_bottom = from_bottom
+        self.lake_columns = list(lake_columns or [])
+        self.nc_vars = list(nc_vars or [])
+        self.frequency = frequency
+        self.outlets = outlets
+        if bool(self.point_vars) != bool(self.depths):
+            raise ValueError(
+                "point_vars and depths must both be given for point outputs."
+            )
+
+    @staticmethod
+    def _glm_nml(sim_or_nml: Union[Sim, GLMNML]) -> GLMNML:
+        if isinstance(sim_or_nml, Sim):
+            return sim_or_nml.nml["glm"]
+        return sim_or_nml
+
+    @staticmethod
+    def _num_steps(glm_nml: GLMNML, dt: float) -> int:
+        time = glm_nml.blocks.peek("time").params
+        num_days = time["num_days"].value
+        if time["timefmt"].value == 2 or num_days is None:
+            num_days = (
+                pd.Timestamp(time["stop"].value)
+                - pd.Timestamp(time["start"].value)
+            ).total_seconds() / 86400
+        return max(int(num_days * 86400 / dt), 1)
+
+    def nsave(self, sim_or_nml: Union[Sim, GLMNML]) -> Union[int, None]:
+        """Return the `nsave` that writes NetCDF records as needed.
+
+        `None` means the current `nsave` is kept.
+        """
+        glm_nml = self._glm_nml(sim_or_nml)
+        dt = glm_nml.blocks.peek("time").params["dt"].value or 3600.0
+        if not self.nc_vars:
+            return self._num_steps(glm_nml, dt)
+        if self.frequency is None:
+            return None
+        if isinstance(self.frequency, str):
+            seconds = pd.Timedelta(self.frequency).total_seconds()
+        else:
+            seconds = float(self.frequency)
+        return max(int(round(seconds / dt)), 1)
+
+    def apply(self, sim_or_nml: Union[Sim, GLMNML]):
+        """Rewrite the `output` block of a sim's or NML's GLM NML."""
+        glm_nml = self._glm_nml(sim_or_nml)
+        output = glm_nml.blocks.get("output")
+        if output is None:
+            output = OutputBlock()
+            glm_nml.blocks["output"] = output
+        params = output.params
+        nsave = self.nsave(glm_nml)
+        if nsave is not None:
+            params["nsave"].value = nsave
+        if self.point_vars:
+            params["csv_point_nlevs"].value = len(self.depths)
+            params["csv_point_at"].value = list(self.depths)
+            params["csv_point_frombot"].value = self.from_bottom
+            params["csv_point_nvars"].value = len(self.point_vars)
+            params["csv_point_vars"].value = list(self.point_vars)
+        else:
+            params["csv_point_nlevs"].value = 0
+            params["csv_point_at"].value = None
+            params["csv_point_nvars"].value = 0
+            params["csv_point_vars"].value = None
+        if not self.outlets:
+            params["csv_outlet_nvars"].value = 0
+            params["csv_outlet_vars"].value = None
+        output.validate()
+        glm_nml.validate()
+
+    def harvest_kwargs(self, sim: Sim) -> Dict[str, Any]:
+        """Return the `harvest` arguments of `Sim.run()` for the outputs.
+
+        Paths are relative to the sim directory.
+        """
+        params = sim.nml["glm"].blocks.peek("output").params
+        out_dir = params["out_dir"].value or "."
+        patterns = [
+            f"{out_dir}/{params['csv_lake_fname'].value or 'lake'}.csv",
+            "glm.log",
+        ]
+        if self.point_vars:
+            point_fname = params["csv_point_fname"].value or "WQ_"
+            patterns.append(f"{out_dir}/{point_fname}*.csv")
+        if self.outlets:
+            outlet_fname = params["csv_outlet_fname"].value or "outlet_"
+            ovrflw_fname = params["csv_ovrflw_fname"].value or "overflow"
+            patterns.append(f"{out_dir}/{outlet_fname}*.csv")
+            patterns.append(f"{out_dir}/{ovrflw_fname}.csv")
+        harvest_nc_vars = None
+        if self.nc_vars:
+            out_fn = params["out_fn"].value or "output"
+            patterns.append(f"{out_dir}/{out_fn}.nc")
+            harvest_nc_vars = list(self.nc_vars)
+        return {"harvest": patterns, "harvest_nc_vars": harvest_nc_vars}
+
+    def read_lake(self, sim: Sim) -> pd.DataFrame:
+        """Read the required columns of a sim's lake CSV output."""
+        params = sim.nml["glm"].blocks.peek("output").params
+        csv_lake_fname = params["csv_lake_fname"].value or "lake"
+        path = os.path.join(sim.get_out_dir(), f"{csv_lake_fname}.csv")
+        usecols = None
+        if self.lake_columns:
+            usecols = ["time"] + [
+                col for col in self.lake_columns if col != "time"
+            ]
+        return pd.read_csv(path, usecols=usecols)
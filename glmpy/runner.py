@@ -0,0 +1,1026 @@
+import os
+import re
+import sys
+import copy
+import json
+import time
+import queue
+import shutil
+import signal
+import asyncio
+import hashlib
+import datetime
+import tempfile
+import platform
+import warnings
+import threading
+import subprocess
+
+from typing import Union, Dict, List, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from glmpy.cache import SimCache, BcStore
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class _RunOptions:
+    """The options of `Sim.run()`, passed down the run as one object."""
+
+    def __init__(
+        self,
+        write_log: bool = False,
+        quiet: bool = False,
+        time_sim: bool = False,
+        glm_path: Union[str, None] = "./glm",
+        cache: Union["SimCache", None] = None,
+        bc_store: Union["BcStore", None] = None,
+        workspace: Union[str, None] = None,
+        harvest: Union[List[str], None] = None,
+        harvest_nc_vars: Union[List[str], None] = None,
+        limits: Union["RunLimits", None] = None,
+        on_progress: Union[Callable, None] = None,
+        affinity: Union[List[int], None] = None,
+        env: Union[Dict[str, str], None] = None,
+    ):
+        self.write_log = write_log
+        self.quiet = quiet
+        self.time_sim = time_sim
+        self.glm_path = glm_path
+        self.cache = cache
+        self.bc_store = bc_store
+        self.workspace = workspace
+        self.harvest = harvest
+        self.harvest_nc_vars = harvest_nc_vars
+        self.limits = limits
+        self.on_progress = on_progress
+        self.affinity = affinity
+        self.env = env
+
+    def replace(self, **changes) -> "_RunOptions":
+        options = copy.copy(self)
+        for name, value in changes.items():
+            if name not in vars(self):
+                raise TypeError(f"{name} is not a run option.")
+            setattr(options, name, value)
+        return options
+
+
+class RunResult:
+    """Outcome of a single GLM process.
+
+    Attributes
+    ----------
+    sim_name : str
+        Name of the simulation that was run.
+    returncode : int
+        Exit code of the GLM process. Negative values indicate the process
+        was terminated by a signal.
+    wall_time : float
+        Elapsed wall clock time of the GLM process in seconds.
+    user_time : Union[float, None]
+        User CPU time of the GLM process in seconds. `None` where resource
+        usage is unavailable.
+    sys_time : Union[float, None]
+        System CPU time of the GLM process in seconds. `None` where resource
+        usage is unavailable.
+    max_rss : Union[int, None]
+        Peak resident set size of the GLM process in bytes. `None` where
+        resource usage is unavailable.
+    log_path : Union[str, None]
+        Path to the GLM log file. `None` if no log was written.
+    cached : bool
+        `True` if the outputs were restored from a `SimCache` rather than
+        produced by running GLM.
+    status : str
+        `"completed"`, `"failed"` (non-zero exit code), `"cpu_limit"`
+        (CPU time limit exceeded), or the reason the process was killed by
+        the `RunLimits` watchdog: `"timeout"`, `"stalled"` or `"diverged"`.
+    spans : Union[List[Span], None]
+        Spans of the phases of the run if it was traced with a `Tracer`.
+    glm_version : Union[str, None]
+        Version of the GLM binary.
+    glm_digest : Union[str, None]
+        SHA-256 digest of the GLM binary.
+    """
+
+    def __init__(
+        self,
+        sim_name: str,
+        returncode: int,
+        wall_time: float,
+        user_time: Union[float, None] = None,
+        sys_time: Union[float, None] = None,
+        max_rss: Union[int, None] = None,
+        log_path: Union[str, None] = None,
+        cached: bool = False,
+        status: Union[str, None] = None,
+        glm_version: Union[str, None] = None,
+        glm_digest: Union[str, None] = None,
+    ):
+        self.sim_name = sim_name
+        self.returncode = returncode
+        self.wall_time = wall_time
+        self.user_time = user_time
+        self.sys_time = sys_time
+        self.max_rss = max_rss
+        self.log_path = log_path
+        self.cached = cached
+        if status is None:
+            status = _exit_status(returncode)
+        self.status = status
+        self.spans = None
+        self.glm_version = glm_version
+        self.glm_digest = glm_digest
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and self.status == "completed"
+
+    def to_dict(self) -> dict:
+        return {
+            "sim_name": self.sim_name,
+            "returncode": self.returncode,
+            "wall_time": self.wall_time,
+            "user_time": self.user_time,
+            "sys_time": self.sys_time,
+            "max_rss": self.max_rss,
+            "log_path": self.log_path,
+            "cached": self.cached,
+            "status": self.status,
+            "glm_version": self.glm_version,
+            "glm_digest": self.glm_digest,
+        }
+
+    def __repr__(self):
+        return (
+            f"RunResult(sim_name={self.sim_name!r}, "
+            f"returncode={self.returncode}, "
+            f"status={self.status!r}, "
+            f"wall_time={self.wall_time:.3f}, "
+            f"cached={self.cached})"
+        )
+
+
+def _exit_status(returncode: int) -> str:
+    if returncode == 0:
+        return "completed"
+    if hasattr(signal, "SIGXCPU") and returncode == -signal.SIGXCPU:
+        return "cpu_limit"
+    return "failed"
+
+
+class SimFailure:
+    """Stands in for the `on_sim_end` return value of a failed simulation.
+
+    Attributes
+    ----------
+    sim_name : str
+        Name of the simulation that failed.
+    result : RunResult
+        Outcome of the last attempt to run the simulation.
+    attempts : int
+        Number of times the simulation was run.
+    """
+
+    def __init__(self, sim_name: str, result: RunResult, attempts: int = 1):
+        self.sim_name = sim_name
+        self.result = result
+        self.attempts = attempts
+
+    @property
+    def status(self) -> str:
+        return self.result.status
+
+    def __repr__(self):
+        return (
+            f"SimFailure(sim_name={self.sim_name!r}, "
+            f"status={self.status!r}, attempts={self.attempts})"
+        )
+
+
+def _set_affinity(pid: int, cpus: List[int]):
+    if not hasattr(os, "sched_setaffinity"):
+        warnings.warn("CPU affinity is not supported on this system.")
+        return
+    try:
+        os.sched_setaffinity(pid, cpus)
+    except ProcessLookupError:
+        # Already exited
+        pass
+
+
+class RunLimits:
+    """Limits on a GLM process.
+
+    A watchdog kills the process when it exceeds `timeout`, produces no
+    output for `stall_timeout` seconds, or reports a NaN. Output is GLM's
+    stdout and any files the sim asks to be watched (the lake CSV).
+
+    Attributes
+    ----------
+    timeout : Union[float, None]
+        Maximum wall clock time in seconds.
+    cpu_time : Union[int, None]
+        Maximum CPU time in seconds. Enforced by the operating system with
+        `RLIMIT_CPU` where available.
+    stall_timeout : Union[float, None]
+        Maximum time in seconds without new output.
+    kill_on_nan : bool
+        Kill the process when `NaN` appears in its output.
+    poll_interval : float
+        Seconds between checks of the watched files and the time limits.
+
+    Examples
+    --------
+    >>> from glmpy.sim import MultiSim
+    >>> from glmpy.runner import RunLimits
+    >>> limits = RunLimits(timeout=600, stall_timeout=60)
+    >>> multi_sim = MultiSim(glm_sims)
+    >>> rvs = multi_sim.run(limits=limits, retries=1)
+    """
+
+    def __init__(
+        self,
+        timeout: Union[float, None] = None,
+        cpu_time: Union[int, None] = None,
+        stall_timeout: Union[float, None] = None,
+        kill_on_nan: bool = True,
+        poll_interval: float = 1.0,
+    ):
+        self.timeout = timeout
+        self.cpu_time = cpu_time
+        self.stall_timeout = stall_timeout
+        self.kill_on_nan = kill_on_nan
+        self.poll_interval = poll_interval
+
+    def needs_watchdog(self) -> bool:
+        return (
+            self.timeout is not None
+            or self.stall_timeout is not None
+            or self.kill_on_nan
+        )
+
+    def apply_cpu_limit(self, pid: Union[int, None] = None):
+        """Set `RLIMIT_CPU` of process `pid` (default: this process)."""
+        if self.cpu_time is None:
+            return
+        if resource is None or not hasattr(resource, "RLIMIT_CPU"):
+            warnings.warn("CPU time limits are not supported on this system.")
+            return
+        # SIGXCPU at the soft limit, SIGKILL at the hard limit
+        limit = (int(self.cpu_time), int(self.cpu_time) + 5)
+        if pid is None:
+            resource.setrlimit(resource.RLIMIT_CPU, limit)
+        else:
+            resource.prlimit(pid, resource.RLIMIT_CPU, limit)
+
+
+_NAN_PATTERN = re.compile(rb"(?<![A-Za-z_])nan(?![A-Za-z_])", re.IGNORECASE)
+
+
+class _Watchdog:
+    """Tracks the output of a GLM process against a `RunLimits`."""
+
+    def __init__(
+        self,
+        limits: RunLimits,
+        watch_paths: Union[List[str], None],
+        start_time: float,
+    ):
+        self.limits = limits
+        self.start_time = start_time
+        self.last_activity = start_time
+        self.last_poll = start_time
+        self.diverged = False
+        self._tails = {}
+        self._offsets = {}
+        # Only output written after the start counts
+        for path in watch_paths or []:
+            try:
+                self._offsets[path] = os.path.getsize(path)
+            except OSError:
+                self._offsets[path] = 0
+
+    def feed(self, chunk: bytes, source: str = "stdout"):
+        self.last_activity = time.perf_counter()
+        if self.limits.kill_on_nan:
+            data = self._tails.get(source, b"") + chunk
+            if _NAN_PATTERN.search(data):
+                self.diverged = True
+            self._tails[source] = data[-8:]
+
+    def _poll_files(self):
+        for path, offset in self._offsets.items():
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            if size < offset:
+                # Truncated when GLM opened it
+                offset = 0
+            if size > offset:
+                with open(path, "rb") as f:
+                    f.seek(max(offset, size - (1 << 20)))
+                    self.feed(f.read(size - offset), path)
+            self._offsets[path] = size
+
+    def final_check(self) -> Union[str, None]:
+        """Check the output written since the last poll once GLM exits."""
+        self._poll_files()
+        if self.diverged:
+            return "diverged"
+        return None
+
+    def check(self) -> Union[str, None]:
+        """Return the reason to kill the process, if any."""
+        now = time.perf_counter()
+        if now - self.last_poll >= self.limits.poll_interval:
+            self._poll_files()
+            self.last_poll = now
+        if self.diverged:
+            return "diverged"
+        timeout = self.limits.timeout
+        if timeout is not None and now - self.start_time >= timeout:
+            return "timeout"
+        stall_timeout = self.limits.stall_timeout
+        if (
+            stall_timeout is not None
+            and now - self.last_activity >= stall_timeout
+        ):
+            return "stalled"
+        return None
+
+
+_PROGRESS_PATTERN = re.compile(
+    rb"Running day\s+(\d+),\s*([\d.]+)% of days complete"
+)
+
+# Offset from a Julian day number to a proleptic Gregorian ordinal
+_JULIAN_DAY_OFFSET = 1721425
+
+
+class _ProgressParser:
+    """Parses the progress lines that GLM writes to stdout.
+
+    GLM overwrites a single line with carriage returns, so a chunk may end
+    part way through a line. Only the latest complete line of each chunk is
+    reported.
+    """
+
+    def __init__(self, sim_name: str, on_progress: Callable):
+        self.sim_name = sim_name
+        self.on_progress = on_progress
+        self._tail = b""
+
+    def feed(self, chunk: bytes):
+        data = self._tail + chunk
+        lines = re.split(rb"[\r\n]", data)
+        self._tail = lines.pop()[-256:]
+        for line in reversed(lines):
+            match = _PROGRESS_PATTERN.search(line)
+            if match is not None:
+                current_date = datetime.date.fromordinal(
+                    int(match.group(1)) - _JULIAN_DAY_OFFSET
+                )
+                fraction = min(float(match.group(2)) / 100, 1.0)
+                self.on_progress(self.sim_name, current_date, fraction)
+                return
+
+
+_GLM_BINARY_PATTERN = re.compile(
+    r"^glm_(?P<version>[^_]+)_(?P<os>[a-z]+)_(?P<arch>\w+?)(?:\.exe)?$"
+)
+_GLM_VERSION_PATTERN = re.compile(rb"Version\s+(\d[\w.]*)")
+
+# platform.machine() names of each architecture in GLM binary names
+_MACHINE_ALIASES = {
+    "amd64": "x86_64",
+    "x64": "x86_64",
+    "aarch64": "arm64",
+    "armv8": "arm64",
+}
+_OS_ALIASES = {"darwin": "macos", "win32": "windows", "cygwin": "windows"}
+
+
+def _version_key(version: Union[str, None]) -> tuple:
+    # Releases sort above their pre-releases, e.g., 3.3.1 > 3.3.1a12
+    if version is None:
+        return ()
+    match = re.match(r"^([\d.]*\d)(?:([a-z]+)(\d*))?", version)
+    if match is None:
+        return ()
+    release = tuple(int(part) for part in match.group(1).split("."))
+    if match.group(2) is None:
+        return release + (1, "", 0)
+    return release + (0, match.group(2), int(match.group(3) or 0))
+
+
+class GLMBinary:
+    """A GLM executable and the result of probing it.
+
+    Attributes
+    ----------
+    path : str
+        Path to the executable.
+    digest : str
+        SHA-256 digest of the executable.
+    version : Union[str, None]
+        Version reported by the executable, or taken from its file name.
+    runnable : bool
+        Whether the executable could be run on this system.
+    error : Union[str, None]
+        Why the executable could not be run.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        digest: str,
+        version: Union[str, None] = None,
+        runnable: bool = True,
+        error: Union[str, None] = None,
+    ):
+        self.path = path
+        self.digest = digest
+        self.version = version
+        self.runnable = runnable
+        self.error = error
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "digest": self.digest,
+            "version": self.version,
+            "runnable": self.runnable,
+            "error": self.error,
+        }
+
+    def __repr__(self):
+        return (
+            f"GLMBinary(path={self.path!r}, version={self.version!r}, "
+            f"runnable={self.runnable})"
+        )
+
+
+class GLMBinaryRegistry:
+    """Finds the GLM binary to run on this system.
+
+    Candidates are `glm` (`glm.exe` on Windows) and binaries named
+    `glm_<version>_<os>_<arch>`, e.g., `glm_3.3.3_linux_x86_64`, in the
+    `search_dirs`. `select()` picks the first candidate for the operating
+    system and `platform.machine()` that runs, preferring `glm` and then
+    the highest version. Binaries that are not executable are copied to
+    the cache directory and made executable there, so the search
+    directories are never modified.
+
+    Each binary is probed once by running it to check that it works and to
+    read its version. Probes of binaries that run are cached on disk in
+    `cache_dir` by the digest of the binary, the machine and the host
+    name, so that other processes and later sessions do not probe them
+    again but hosts sharing a home directory each probe their own.
+
+    Attributes
+    ----------
+    search_dirs : List[str]
+        Directories to look for binaries in. Default: `glmpy/bin` and
+        the `bin` directory next to the `glmpy` package.
+    cache_dir : str
+        Directory for the probe cache. Default: `glmpy` in
+        `$XDG_CACHE_HOME` or `~/.cache`.
+
+    Examples
+    --------
+    >>> from glmpy.runner import GLMRunner
+    >>> GLMRunner.registry.select()
+    GLMBinary(path='.../bin/glm_3.3.3_linux_x86_64', version='3.3.3', ...)
+    """
+
+    def __init__(
+        self,
+        search_dirs: Union[List[str], None] = None,
+        cache_dir: Union[str, None] = None,
+    ):
+        if search_dirs is None:
+            package_dir = os.path.dirname(os.path.abspath(__file__))
+            search_dirs = [
+                os.path.join(package_dir, "bin"),
+                os.path.join(os.path.dirname(package_dir), "bin"),
+            ]
+        if cache_dir is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+                os.path.expanduser("~"), ".cache"
+            )
+            cache_dir = os.path.join(cache_home, "glmpy")
+        self.search_dirs = search_dirs
+        self.cache_dir = cache_dir
+        self._probes = {}
+        self._selected = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def machine() -> str:
+        machine = platform.machine().lower()
+        return _MACHINE_ALIASES.get(machine, machine)
+
+    @staticmethod
+    def os_name() -> str:
+        os_name = sys.platform
+        if os_name.startswith("linux"):
+            return "linux"
+        return _OS_ALIASES.get(os_name, os_name)
+
+    def candidates(self, machine: Union[str, None] = None) -> List[str]:
+        """Paths of the binaries for `machine`, most preferred first."""
+        machine = machine or self.machine()
+        exe_name = "glm.exe" if os.name == "nt" else "glm"
+        plain = []
+        versioned = []
+        for search_dir in self.search_dirs:
+            if not os.path.isdir(search_dir):
+                continue
+            exe_path = os.path.join(search_dir, exe_name)
+            if os.path.isfile(exe_path):
+                plain.append(exe_path)
+            for file_name in sorted(os.listdir(search_dir)):
+                match = _GLM_BINARY_PATTERN.match(file_name)
+                if (
+                    match is not None
+                    and match.group("os") == self.os_name()
+                    and _MACHINE_ALIASES.get(
+                        match.group("arch"), match.group("arch")
+                    ) == machine
+                ):
+                    versioned.append(
+                        (
+                            _version_key(match.group("version")),
+                            os.path.join(search_dir, file_name),
+                        )
+                    )
+        versioned.sort(key=lambda item: item[0], reverse=True)
+        return plain + [path for _, path in versioned]
+
+    def _probe_cache_path(self) -> str:
+        return os.path.join(self.cache_dir, "glm_binaries.json")
+
+    def _read_probe_cache(self) -> dict:
+        try:
+            with open(self._probe_cache_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _probe_key(self, digest: str) -> str:
+        # Whether a binary runs depends on the host as well as the binary,
+        # e.g., on its shared libraries
+        return f"{digest}:{platform.machine()}:{platform.node()}"
+
+    def _write_probe_cache(self, key: str, probe: dict):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            probes = self._read_probe_cache()
+            probes[key] = probe
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, "w") as f:
+                json.dump(probes, f, indent=2)
+            os.replace(tmp_path, self._probe_cache_path())
+        except OSError:
+            # The cache only saves probing again
+            pass
+
+    def _executable(self, path: str, digest: str) -> str:
+        if os.name == "nt" or os.access(path, os.X_OK):
+            return path
+        exe_path = os.path.join(
+            self.cache_dir, "bin", digest[:16], os.path.basename(path)
+        )
+        if not os.path.isfile(exe_path):
+            os.makedirs(os.path.dirname(exe_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(exe_path))
+            os.close(fd)
+            shutil.copyfile(path, tmp_path)
+            os.chmod(tmp_path, 0o755)
+            os.replace(tmp_path, exe_path)
+        return exe_path
+
+    @staticmethod
+    def _run_probe(path: str) -> dict:
+        # Run in an empty directory so that GLM finds no NML to run
+        with tempfile.TemporaryDirectory(prefix="glmpy_probe_") as tmp_dir:
+            try:
+                proc = subprocess.run(
+                    [path, "--help"],
+                    cwd=tmp_dir,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    timeout=30,
+                )
+            except (OSError, subprocess.TimeoutExpired) as err:
+                return {"version": None, "runnable": False, "error": str(err)}
+        match = _GLM_VERSION_PATTERN.search(proc.stdout)
+        # The shell's codes for a binary that cannot be executed or loaded
+        if proc.returncode in (126, 127) or proc.returncode < 0:
+            error = proc.stdout.decode(errors="replace").strip()
+            return {
+                "version": None,
+                "runnable": False,
+                "error": error or f"Exited with code {proc.returncode}",
+            }
+        return {
+            "version": match.group(1).decode() if match else None,
+            "runnable": True,
+            "error": None,
+        }
+
+    def probe(self, path: str) -> GLMBinary:
+        """Probe the binary at `path`, once per digest."""
+        digest = _file_digest(path)
+        with self._lock:
+            binary = self._probes.get((path, digest))
+        if binary is not None:
+            return binary
+        exe_path = self._executable(path, digest)
+        key = self._probe_key(digest)
+        probe = self._read_probe_cache().get(key)
+        if probe is None:
+            probe = self._run_probe(exe_path)
+            if probe["runnable"]:
+                self._write_probe_cache(key, probe)
+        version = probe["version"]
+        if version is None:
+            match = _GLM_BINARY_PATTERN.match(os.path.basename(path))
+            if match is not None:
+                version = match.group("version")
+        binary = GLMBinary(
+            exe_path, digest, version, probe["runnable"], probe["error"]
+        )
+        with self._lock:
+            self._probes[(path, digest)] = binary
+        return binary
+
+    def select(self, machine: Union[str, None] = None) -> GLMBinary:
+        """Return the preferred binary for `machine` that runs."""
+        machine = machine or self.machine()
+        binary = self._selected.get(machine)
+        if binary is not None and os.path.isfile(binary.path):
+            return binary
+        candidates = self.candidates(machine)
+        if not candidates:
+            raise Exception(
+                f"No GLM binary for {self.os_name()} {machine} was found in "
+                f"{self.search_dirs}.\n If you have installed the source "
+                "distribution of glmpy, a GLM binary is not included. "
+                "Provide the path to an external GLM binary using the "
+                "glm_path parameter."
+            )
+        errors = []
+        for path in candidates:
+            binary = self.probe(path)
+            if binary.runnable:
+                self._selected[machine] = binary
+                return binary
+            errors.append(f"{path}: {binary.error}")
+        raise Exception(
+            "None of the GLM binaries could be run:\n" + "\n".join(errors)
+        )
+
+
+class GLMRunner:
+    registry = GLMBinaryRegistry()
+
+    @staticmethod
+    def glmpy_glm_path() -> Union[str, None]:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+        if os.name == "nt":
+            exe_name = "glm.exe"
+        else:
+            exe_name = "glm"
+        exe_path = os.path.join(base_path, "bin", exe_name)
+        if os.path.isfile(exe_path):
+            return exe_path
+        else:
+            return None
+
+    @staticmethod
+    def resolve_glm_binary(glm_path: Union[str, None] = None) -> GLMBinary:
+        """Resolve `glm_path` to a probed `GLMBinary`.
+
+        If `glm_path` is `None`, or is the default `"./glm"` and there is
+        no such file, the binary is selected by `GLMRunner.registry`.
+        """
+        if glm_path is None or (
+            glm_path == "./glm" and not os.path.isfile(glm_path)
+        ):
+            return GLMRunner.registry.select()
+        return GLMRunner.registry.probe(glm_path)
+
+    @staticmethod
+    def resolve_glm_path(glm_path: Union[str, None] = None) -> str:
+        return GLMRunner.resolve_glm_binary(glm_path).path
+
+    @staticmethod
+    def _wait(proc: subprocess.Popen):
+        """Reap the GLM process and collect its resource usage."""
+        if hasattr(os, "wait4"):
+            try:
+                _, status, rusage = os.wait4(proc.pid, 0)
+            except ChildProcessError:
+                proc.wait()
+                return None
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return rusage
+        proc.wait()
+        return None
+
+    @staticmethod
+    def _open_log(glm_nml_path: str, write_log: bool):
+        if write_log:
+            log_path = os.path.join(os.path.dirname(glm_nml_path), "glm.log")
+            return log_path, open(log_path, "wb")
+        return None, None
+
+    @staticmethod
+    def _emit(
+        chunk: bytes,
+        log_file,
+        quiet: bool,
+        progress: Union[_ProgressParser, None] = None,
+    ):
+        if log_file is not None:
+            log_file.write(chunk)
+        elif not quiet:
+            sys.stdout.write(chunk.decode(errors="replace"))
+        if progress is not None:
+            progress.feed(chunk)
+
+    @staticmethod
+    def _cpu_limit_preexec_fn(limits: Union[RunLimits, None]):
+        """Limit CPU time in the child where `prlimit` is unavailable."""
+        if limits is None or limits.cpu_time is None:
+            return None
+        if resource is not None and not hasattr(resource, "prlimit"):
+            return limits.apply_cpu_limit
+        return None
+
+    @staticmethod
+    def _watch(
+        proc: subprocess.Popen,
+        watchdog: _Watchdog,
+        log_file,
+        quiet: bool,
+        progress: Union[_ProgressParser, None] = None,
+    ) -> Union[str, None]:
+        """Relay the GLM output while checking it with `watchdog`.
+
+        Returns the reason the process was killed or `None`.
+        """
+        chunks = queue.Queue()
+
+        def _read():
+            fd = proc.stdout.fileno()
+            chunk = None
+            try:
+                while chunk != b"":
+                    chunk = os.read(fd, 65536)
+                    chunks.put(chunk)
+            except OSError:
+                chunks.put(b"")
+
+        # A reader thread rather than select() so pipes work on Windows too
+        reader = threading.Thread(target=_read, daemon=True)
+        reader.start()
+        status = None
+        while True:
+            try:
+                chunk = chunks.get(timeout=watchdog.limits.poll_interval)
+            except queue.Empty:
+                chunk = None
+            if chunk == b"":
+                break
+            if chunk is not None:
+                GLMRunner._emit(chunk, log_file, quiet, progress)
+                watchdog.feed(chunk)
+            if status is None:
+                status = watchdog.check()
+                if status is not None:
+                    proc.kill()
+        reader.join()
+        if status is None:
+            # NaNs written after the last poll
+            status = watchdog.final_check()
+        return status
+
+    @staticmethod
+    def run(
+        glm_nml_path: str,
+        sim_name: str = "simulation",
+        write_log: bool = False,
+        quiet: bool = False,
+        time_sim: bool = False,
+        glm_path: Union[str, None] = None,
+        limits: Union[RunLimits, None] = None,
+        watch_paths: Union[List[str], None] = None,
+        on_progress: Union[Callable, None] = None,
+        affinity: Union[List[int], None] = None,
+        env: Union[Dict[str, str], None] = None,
+    ) -> RunResult:
+        """Run GLM in a subprocess.
+
+        If `limits` is given, the process is killed when it breaks them and
+        `watch_paths` are files to watch for output besides stdout.
+        `on_progress(sim_name, current_date, fraction)` is called as GLM
+        reports its progress, with the simulated date as a
+        `datetime.date` and the fraction of days complete.
+
+        `affinity` is the list of CPUs to pin the process to and `env` the
+        environment of the process (default: that of this process).
+        """
+        binary = GLMRunner.resolve_glm_binary(glm_path)
+        glm_path = binary.path
+        if time_sim:
+            print(f"Starting {sim_name}")
+        log_path, log_file = GLMRunner._open_log(glm_nml_path, write_log)
+        progress = None
+        if on_progress is not None:
+            progress = _ProgressParser(sim_name, on_progress)
+        rusage = None
+        status = None
+        preexec_fn = GLMRunner._cpu_limit_preexec_fn(limits)
+        start_time = time.perf_counter()
+        try:
+            proc = subprocess.Popen(
+                [glm_path, "--nml", glm_nml_path],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                preexec_fn=preexec_fn,
+                env=env,
+            )
+            try:
+                if affinity is not None:
+                    _set_affinity(proc.pid, affinity)
+                if limits is not None and preexec_fn is None:
+                    limits.apply_cpu_limit(proc.pid)
+                if limits is not None and limits.needs_watchdog():
+                    status = GLMRunner._watch(
+                        proc,
+                        _Watchdog(limits, watch_paths, start_time),
+                        log_file,
+                        quiet,
+                        progress,
+                    )
+                else:
+                    fd = proc.stdout.fileno()
+                    while True:
+                        chunk = os.read(fd, 65536)
+                        if not chunk:
+                            break
+                        GLMRunner._emit(chunk, log_file, quiet, progress)
+            except BaseException:
+                proc.kill()
+                raise
+            finally:
+                proc.stdout.close()
+                rusage = GLMRunner._wait(proc)
+        finally:
+            if log_file is not None:
+                log_file.close()
+        wall_time = time.perf_counter() - start_time
+        result = RunResult(
+            sim_name=sim_name,
+            returncode=proc.returncode,
+            wall_time=wall_time,
+            log_path=log_path,
+            status=status,
+            glm_version=binary.version,
+            glm_digest=binary.digest,
+        )
+        if rusage is not None:
+            result.user_time = rusage.ru_utime
+            result.sys_time = rusage.ru_stime
+            # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+            if sys.platform == "darwin":
+                result.max_rss = rusage.ru_maxrss
+            else:
+                result.max_rss = rusage.ru_maxrss * 1024
+        if time_sim:
+            total_duration = datetime.timedelta(seconds=round(wall_time))
+            print(f"Finished {sim_name} in {str(total_duration)}")
+        return result
+
+    @staticmethod
+    async def run_async(
+        glm_nml_path: str,
+        sim_name: str = "simulation",
+        write_log: bool = False,
+        quiet: bool = False,
+        time_sim: bool = False,
+        glm_path: Union[str, None] = None,
+        limits: Union[RunLimits, None] = None,
+        watch_paths: Union[List[str], None] = None,
+        on_progress: Union[Callable, None] = None,
+    ) -> RunResult:
+        """Run GLM as an asyncio subprocess.
+
+        Resource usage is not available from the asyncio child watcher so
+        `user_time`, `sys_time` and `max_rss` of the returned `RunResult`
+        are `None`. `limits`, `watch_paths` and `on_progress` are as for
+        `run()`.
+        """
+        binary = GLMRunner.resolve_glm_binary(glm_path)
+        glm_path = binary.path
+        if time_sim:
+            print(f"Starting {sim_name}")
+        log_path, log_file = GLMRunner._open_log(glm_nml_path, write_log)
+        progress = None
+        if on_progress is not None:
+            progress = _ProgressParser(sim_name, on_progress)
+        status = None
+        watchdog = None
+        preexec_fn = GLMRunner._cpu_limit_preexec_fn(limits)
+        start_time = time.perf_counter()
+        if limits is not None and limits.needs_watchdog():
+            watchdog = _Watchdog(limits, watch_paths, start_time)
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                glm_path,
+                "--nml",
+                glm_nml_path,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                preexec_fn=preexec_fn,
+            )
+            try:
+                if limits is not None and preexec_fn is None:
+                    limits.apply_cpu_limit(proc.pid)
+                while True:
+                    if watchdog is None:
+                        chunk = await proc.stdout.read(65536)
+                    else:
+                        try:
+                            chunk = await asyncio.wait_for(
+                                proc.stdout.read(65536),
+                                timeout=limits.poll_interval,
+                            )
+                        except asyncio.TimeoutError:
+                            chunk = None
+                    if chunk == b"":
+                        break
+                    if chunk is not None:
+                        GLMRunner._emit(chunk, log_file, quiet, progress)
+                    if watchdog is not None and status is None:
+                        if chunk is not None:
+                            watchdog.feed(chunk)
+                        status = watchdog.check()
+                        if status is not None:
+                            proc.kill()
+                await proc.wait()
+                if watchdog is not None and status is None:
+                    # NaNs written after the last poll
+                    status = watchdog.final_check()
+            except BaseException:
+                if proc.returncode is None:
+                    proc.kill()
+                raise
+        finally:
+            if log_file is not None:
+                log_file.close()
+        wall_time = time.perf_counter() - start_time
+        if time_sim:
+            total_duration = datetime.timedelta(seconds=round(wall_time))
+            print(f"Finished {sim_name} in {str(total_duration)}")
+        return RunResult(
+            sim_name=sim_name,
+            returncode=proc.returncode,
+            wall_time=wall_time,
+            log_path=log_path,
+            status=status,
+            glm_version=binary.version,
+            glm_digest=binary.digest,
+        )
+
+def _hash_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+_FILE_DIGESTS = {}
+
+
+def _file_digest(path: str) -> str:
+    """Digest of a file, memoised on its path, size and mtime."""
+    stat = os.stat(path)
+    memo_key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _FILE_DIGESTS.get(memo_key)
+    if digest is None:
+        digest = _hash_file(path)
+        _FILE_DIGESTS[memo_key] = digest
+    return digest
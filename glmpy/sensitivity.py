@@ -1,7 +1,15 @@
+import io
+import json
+import warnings
+import numpy as np
 import pandas as pd
 
-from typing import Union, List, Any
+from typing import Union, List, Dict, Any, Callable, Tuple
 from glmpy.sim import GLMSim, MultiSim
+from glmpy.runner import RunLimits, SimFailure
+from glmpy.cache import SimCache, BcStore
+from glmpy.executor import SimExecutor
+from glmpy.ensemble import Ensemble, ParameterSpace, parse_param_path
 
 
 class LocalSensitivity:
@@ -20,7 +28,7 @@ class LocalSensitivity:
     ):
         if not isinstance(new_x_vals, list):
             new_x_vals = [new_x_vals]
-        x_val = self.glm_sim.nml[x_nml].blocks[x_block].params[x_param].value
+        x_val = self.glm_sim.get_param_value(x_nml, x_block, x_param)
         if x_val is None:
             raise ValueError(
                 f"Cannot setup sensitivity analysis when the {x_param} of the "
@@ -30,7 +38,7 @@ class LocalSensitivity:
         num_sims = len(new_x_vals)
         self._si_sims = []
         for i in range(0, num_sims):
-            si_sim = self.glm_sim.get_deepcopy()
+            si_sim = self.glm_sim.fork()
             si_sim.sim_name = f"{self.glm_sim.sim_name}_{i}"
             si_sim.nml[x_nml].blocks[x_block].params[x_param].value = new_x_vals[i]
             si_sim.validate()
@@ -45,12 +53,15 @@ class LocalSensitivity:
         self._y_func = y_func
 
     def calc_si_results(self, glm_sim: GLMSim) -> dict[str, Any]:
-        new_x_val = (
-            glm_sim.nml[self._x_nml].blocks[self._x_block].params[self._x_param].value
+        new_x_val = glm_sim.get_param_value(
+            self._x_nml, self._x_block, self._x_param
         )
         new_y_val = self._y_func(glm_sim)
+        # Array outputs (e.g., a time series) give element-wise SIs
+        if not np.isscalar(new_y_val):
+            new_y_val = np.asarray(new_y_val, dtype=float)
         delta_x_pct = (new_x_val - self._x_val) / self._x_val
-        delta_y_pct = (new_y_val - self._y_val) / self._y_val
+        delta_y_pct = (new_y_val - np.asarray(self._y_val)) / self._y_val
         si = delta_y_pct / delta_x_pct
         results = {
             "s_i": si,
@@ -72,6 +83,12 @@ class LocalSensitivity:
         time_sim: bool = True,
         time_multi_sim: bool = True,
         glm_path: Union[str, None] = "./glm",
+        cache: Union[SimCache, None] = None,
+        bc_store: Union[BcStore, None] = None,
+        executor: Union[str, SimExecutor] = "process",
+        workspace: Union[str, None] = None,
+        limits: Union[RunLimits, None] = None,
+        retries: int = 0,
     ):
         if self._si_sims is None:
             raise AttributeError(
@@ -80,13 +97,24 @@ class LocalSensitivity:
         if not multi_sim:
             results = []
             for sim in self._si_sims:
-                sim.run(
-                    write_log=write_log,
-                    quiet=quiet,
-                    time_sim=time_sim,
-                    glm_path=glm_path,
-                )
-                rvs = self.calc_si_results(sim)
+                for attempt in range(1, retries + 2):
+                    result = sim.run(
+                        write_log=write_log,
+                        quiet=quiet,
+                        time_sim=time_sim,
+                        glm_path=glm_path,
+                        cache=cache,
+                        bc_store=bc_store,
+                        workspace=workspace,
+                        limits=limits,
+                    )
+                    # A diverging sim diverges again
+                    if result.success or result.status == "diverged":
+                        break
+                if result.success:
+                    rvs = self.calc_si_results(sim)
+                else:
+                    rvs = SimFailure(sim.sim_name, result, attempt)
                 results.append(rvs)
                 if rm_sim_dir:
                     sim.rm_sim_dir()
@@ -100,6 +128,32 @@ class LocalSensitivity:
                 time_sim=time_sim,
                 time_multi_sim=time_multi_sim,
                 glm_path=glm_path,
+                cache=cache,
+                bc_store=bc_store,
+                executor=executor,
+                workspace=workspace,
+                limits=limits,
+                retries=retries,
+            )
+        results = self._fill_failures(results)
+        if results and np.ndim(results[0]["y"]) > 0:
+            labels = pd.DataFrame(
+                {
+                    "sim_name": [rv["sim_name"] for rv in results],
+                    "x": [rv["x"] for rv in results],
+                    "delta_x_pct": [rv["delta_x_pct"] for rv in results],
+                }
+            )
+            return SensitivityArrays(
+                labels,
+                {
+                    name: np.stack([rv[name] for rv in results])
+                    for name in ("s_i", "delta_y_pct", "y")
+                },
+                attrs={
+                    "x_base": self._x_val,
+                    "y_base": np.asarray(self._y_val).tolist(),
+                },
             )
         results_pd = pd.DataFrame(results)
         baseline_pd = pd.DataFrame(
@@ -126,3 +180,761 @@ class LocalSensitivity:
         ]
         results_pd = results_pd[column_order]
         return results_pd
+
+    def _fill_failures(self, results: List[Any]) -> List[dict]:
+        """Replace the `SimFailure` of each failed sim with NaN results."""
+        failed = [
+            i for i, rv in enumerate(results) if isinstance(rv, SimFailure)
+        ]
+        if not failed:
+            return results
+        sim_names = ", ".join(results[i].sim_name for i in failed)
+        if len(failed) == len(results):
+            raise RuntimeError(
+                f"All of the sensitivity simulations failed: {sim_names}."
+            )
+        warnings.warn(
+            f"{len(failed)} of {len(results)} simulations failed "
+            f"({sim_names}). Their outputs are treated as missing."
+        )
+        y = next(
+            rv["y"] for rv in results if not isinstance(rv, SimFailure)
+        )
+        nan = np.full(np.shape(y), np.nan) if np.ndim(y) > 0 else np.nan
+        results = list(results)
+        for i in failed:
+            x = self._si_sims[i].get_param_value(
+                self._x_nml, self._x_block, self._x_param
+            )
+            results[i] = {
+                "s_i": nan,
+                "delta_y_pct": nan,
+                "y": nan,
+                "delta_x_pct": (x - self._x_val) / self._x_val,
+                "x": x,
+                "sim_name": results[i].sim_name,
+            }
+        return results
+
+    def run_batch(
+        self,
+        perturbations: Union[pd.DataFrame, List[dict]],
+        y_func: Callable[[GLMSim], Any],
+        batch_size: Union[int, None] = None,
+        **run_kwargs,
+    ) -> Union[pd.DataFrame, "SensitivityArrays"]:
+        """Run the perturbations of many parameters as one batch.
+
+        `perturbations` has a row per parameter with `nml`, `block` and
+        `param` columns, and a `deltas` column of the fractional changes
+        to make to the parameter one at a time, e.g., `[-0.1, 0.1]`.
+        Changes to integer parameters are rounded to at least 1. The
+        baseline and every perturbation are run as one `Ensemble` (see
+        `Ensemble.run()` for `batch_size` and `run_kwargs`) and `y_func`
+        is called with each finished sim.
+
+        Returns a DataFrame with a row per perturbation and the baseline
+        parameter and output values in `x_base` and `y_base`. If `y_func`
+        returns arrays, the SIs are computed element-wise and returned as
+        `SensitivityArrays` instead.
+
+        Examples
+        --------
+        >>> perturbations = pd.DataFrame(
+        ...     {
+        ...         "nml": ["glm", "glm"],
+        ...         "block": ["mixing", "light"],
+        ...         "param": ["coef_mix_hyp", "Kw"],
+        ...         "deltas": [[-0.1, 0.1], [-0.1, 0.1]],
+        ...     }
+        ... )
+        >>> local = LocalSensitivity(SparklingSim())
+        >>> local.run_batch(perturbations, surface_temp)
+        """
+        perturbations = pd.DataFrame(perturbations)
+        rows = []
+        for nml, block, param, deltas in perturbations[
+            ["nml", "block", "param", "deltas"]
+        ].itertuples(index=False):
+            x_val = self.glm_sim.get_param_value(nml, block, param)
+            if x_val is None or x_val == 0:
+                raise ValueError(
+                    f"Cannot perturb {param} by a fraction of its value when "
+                    f"the {param} of the GLMSim object is {x_val}."
+                )
+            for delta in np.atleast_1d(deltas):
+                new_x_val = x_val * (1 + delta)
+                if isinstance(x_val, int):
+                    new_x_val = int(round(new_x_val))
+                    if new_x_val == x_val:
+                        # Too small to round to another integer, so take
+                        # the nearest one in the direction of the change
+                        new_x_val = x_val + int(np.sign(delta * x_val))
+                if new_x_val == x_val:
+                    raise ValueError(
+                        f"A delta of {delta} does not change {param}."
+                    )
+                rows.append((f"{nml}.{block}.{param}", x_val, new_x_val))
+        paths = list(dict.fromkeys(path for path, _, _ in rows))
+        # The first member is the baseline: NaN keeps the base values
+        design = pd.DataFrame(
+            np.nan, index=range(len(rows) + 1), columns=paths, dtype=object
+        )
+        for i, (path, _, new_x_val) in enumerate(rows, start=1):
+            design.at[i, path] = new_x_val
+        base_name = self.glm_sim.sim_name
+        sim_names = [f"{base_name}_base"] + [
+            f"{base_name}_{i}" for i in range(len(rows))
+        ]
+        rvs = Ensemble(self.glm_sim, design, sim_names).run(
+            on_sim_end=y_func, batch_size=batch_size, **run_kwargs
+        )
+        y, coords = _stack_outputs(rvs)
+        if np.isnan(y[0]).all():
+            raise RuntimeError("The baseline simulation failed.")
+        x_base = np.array([x_val for _, x_val, _ in rows], dtype=float)
+        x = np.array([new_x_val for _, _, new_x_val in rows], dtype=float)
+        delta_x_pct = (x - x_base) / x_base
+        delta_y_pct = (y[1:] - y[0]) / y[0]
+        # Broadcast the per-perturbation values over the output elements
+        s_i = delta_y_pct / delta_x_pct.reshape((-1,) + (1,) * (y.ndim - 1))
+        nml_names, block_names, param_names = zip(
+            *(parse_param_path(path) for path, _, _ in rows)
+        )
+        if y.ndim > 1:
+            labels = pd.DataFrame(
+                {
+                    "nml": nml_names,
+                    "block": block_names,
+                    "param": param_names,
+                    "delta_x_pct": delta_x_pct,
+                    "x": x,
+                    "x_base": x_base,
+                    "sim_name": sim_names[1:],
+                }
+            )
+            return SensitivityArrays(
+                labels,
+                {"s_i": s_i, "delta_y_pct": delta_y_pct, "y": y[1:]},
+                coords,
+                {"y_base": y[0].tolist()},
+            )
+        return pd.DataFrame(
+            {
+                "nml": nml_names,
+                "block": block_names,
+                "param": param_names,
+                "s_i": s_i,
+                "delta_y_pct": delta_y_pct,
+                "y": y[1:],
+                "y_base": y[0],
+                "delta_x_pct": delta_x_pct,
+                "x": x,
+                "x_base": x_base,
+                "sim_name": sim_names[1:],
+            }
+        )
+
+
+def _primes(n: int) -> List[int]:
+    primes = []
+    candidate = 2
+    while len(primes) < n:
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+def halton(
+    n: int, d: int, skip: int = 0, seed: Union[int, None] = None
+) -> np.ndarray:
+    """Return `n` points of the `d`-dimensional Halton sequence.
+
+    Points lie in the unit hypercube. The first `skip` points (and the
+    point at the origin) are skipped. If `seed` is given, the sequence is
+    randomised with a random shift modulo 1, which keeps its uniformity.
+    """
+    indices = np.arange(skip + 1, skip + n + 1)
+    points = np.empty((n, d))
+    for j, base in enumerate(_primes(d)):
+        i = indices.copy()
+        f = 1.0
+        column = np.zeros(n)
+        while np.any(i > 0):
+            f /= base
+            column += f * (i % base)
+            i //= base
+        points[:, j] = column
+    if seed is not None:
+        shift = np.random.default_rng(seed).random(d)
+        points = (points + shift) % 1.0
+    return points
+
+
+def _stack_outputs(
+    rvs: List[Any],
+) -> Tuple[np.ndarray, Union[pd.Index, None]]:
+    """Stack the outputs of `y_func` into an array of shape `(n, ...)`.
+
+    Outputs may be numbers or arrays of the same shape. The index of the
+    first output that is a `pd.Series` is returned as the coordinates of
+    the output elements. Outputs of failed sims (`SimFailure`) are NaN.
+    """
+    failed = [isinstance(rv, SimFailure) for rv in rvs]
+    if any(failed):
+        warnings.warn(
+            f"{sum(failed)} of {len(rvs)} simulations failed. Their "
+            "outputs are treated as missing."
+        )
+    outputs = [rv for f, rv in zip(failed, rvs) if not f]
+    if not outputs:
+        return np.full(len(rvs), np.nan), None
+    coords = next(
+        (rv.index for rv in outputs if isinstance(rv, pd.Series)), None
+    )
+    shape = np.shape(outputs[0])
+    y = np.full((len(rvs),) + shape, np.nan)
+    for i, (f, rv) in enumerate(zip(failed, rvs)):
+        if f:
+            continue
+        if np.shape(rv) != shape:
+            raise ValueError(
+                f"y_func returned outputs of shapes {shape} and "
+                f"{np.shape(rv)}. All outputs must have the same shape."
+            )
+        y[i] = rv
+    return y, coords
+
+
+class SensitivityArrays:
+    """Compact store of element-wise sensitivity results.
+
+    Holds one array per measure (e.g., `s_i` or `S1`) with a row per label
+    (a perturbation or a parameter) and the shape of the `y_func` output
+    after that, e.g., `(num_params, num_days)` for a daily time series.
+
+    Attributes
+    ----------
+    labels : pd.DataFrame
+        One row per leading index of the arrays.
+    arrays : Dict[str, np.ndarray]
+        The measures.
+    coords : Union[pd.Index, None]
+        Coordinates of the output elements, e.g., the dates of a series
+        returned by `y_func`.
+    attrs : dict
+        Other results, e.g., the baseline output `y_base`.
+
+    Examples
+    --------
+    >>> def surface_temp(sim):
+    ...     lake = pd.read_csv(f"{sim.get_out_dir()}/lake.csv")
+    ...     return lake.set_index("time")["Surface Temp"]
+    >>> results = local.run_batch(perturbations, surface_temp)
+    >>> results["s_i"].shape
+    (4, 365)
+    >>> results.to_frame("s_i")
+    >>> results.save("sensitivity.npz")
+    """
+
+    def __init__(
+        self,
+        labels: pd.DataFrame,
+        arrays: Dict[str, np.ndarray],
+        coords: Union[pd.Index, None] = None,
+        attrs: Union[dict, None] = None,
+    ):
+        for name, array in arrays.items():
+            if len(array) != len(labels):
+                raise ValueError(
+                    f"{name} has {len(array)} rows for {len(labels)} labels."
+                )
+        self.labels = labels.reset_index(drop=True)
+        self.arrays = arrays
+        self.coords = coords
+        self.attrs = dict(attrs or {})
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def __repr__(self):
+        shapes = {name: array.shape for name, array in self.arrays.items()}
+        return f"SensitivityArrays({shapes})"
+
+    def to_frame(self, name: str) -> pd.DataFrame:
+        """Return a measure as a DataFrame with a row per label.
+
+        Columns are the output elements (labelled by `coords` if they are
+        one-dimensional) and the index is the label columns.
+        """
+        array = self.arrays[name]
+        values = array.reshape(len(array), -1)
+        columns = None
+        if self.coords is not None and len(self.coords) == values.shape[1]:
+            columns = self.coords
+        return pd.DataFrame(
+            values,
+            index=pd.MultiIndex.from_frame(self.labels),
+            columns=columns,
+        )
+
+    def save(self, path: str):
+        """Save to a compressed NumPy `.npz` file."""
+        meta = {
+            "labels": self.labels.to_json(orient="split"),
+            "attrs": self.attrs,
+        }
+        arrays = dict(self.arrays)
+        if self.coords is not None:
+            coords = np.asarray(self.coords)
+            # Object arrays could only be loaded with pickle
+            if coords.dtype == object:
+                coords = coords.astype(str)
+            arrays["__coords__"] = coords
+        np.savez_compressed(
+            path, __meta__=np.array(json.dumps(meta, default=str)), **arrays
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SensitivityArrays":
+        with np.load(path) as npz:
+            meta = json.loads(str(npz["__meta__"]))
+            arrays = {
+                name: npz[name]
+                for name in npz.files
+                if name not in ("__meta__", "__coords__")
+            }
+            coords = None
+            if "__coords__" in npz.files:
+                coords = pd.Index(npz["__coords__"])
+        labels = pd.read_json(io.StringIO(meta["labels"]), orient="split")
+        return cls(labels, arrays, coords, meta["attrs"])
+
+
+class _GlobalSensitivity:
+    """Parameters and bounds shared by the global sensitivity methods."""
+
+    def __init__(
+        self,
+        glm_sim: GLMSim,
+        param_paths: List[str],
+        bounds: Union[Dict[str, Tuple[float, float]], None] = None,
+        rel_range: float = 0.5,
+    ):
+        self.glm_sim = glm_sim
+        self.space = ParameterSpace(glm_sim, param_paths, bounds, rel_range)
+        self.param_paths = self.space.param_paths
+        self.bounds = self.space.bounds
+        self.design = None
+        self.y = None
+        self.coords = None
+
+    def scale(self, unit: np.ndarray) -> pd.DataFrame:
+        """Map points in the unit hypercube to parameter values."""
+        return self.space.to_frame(unit)
+
+    def _evaluate(
+        self,
+        design: pd.DataFrame,
+        method: str,
+        y_func: Callable[[GLMSim], Any],
+        batch_size: Union[int, None],
+        run_kwargs: dict,
+    ) -> np.ndarray:
+        sim_names = [
+            f"{self.glm_sim.sim_name}_{method}_{i}" for i in range(len(design))
+        ]
+        ensemble = Ensemble(self.glm_sim, design, sim_names)
+        rvs = ensemble.run(
+            on_sim_end=y_func, batch_size=batch_size, **run_kwargs
+        )
+        y, self.coords = _stack_outputs(rvs)
+        return y
+
+    def _to_results(
+        self, measures: Dict[str, np.ndarray], output_shape: tuple
+    ) -> Union[pd.DataFrame, "SensitivityArrays"]:
+        # Measures have a row per parameter and a column per output element
+        index = pd.Index(self.param_paths, name="param")
+        if not output_shape:
+            return pd.DataFrame(
+                {name: values[:, 0] for name, values in measures.items()},
+                index=index,
+            )
+        return SensitivityArrays(
+            index.to_frame(index=False),
+            {
+                name: values.reshape((len(index),) + output_shape)
+                for name, values in measures.items()
+            },
+            self.coords,
+        )
+
+
+class SobolSensitivity(_GlobalSensitivity):
+    """Global variance-based (Sobol) sensitivity analysis.
+
+    Samples the parameters at `param_paths` over their bounds with the
+    Saltelli scheme: two base matrices `A` and `B` of `n` points, and a
+    matrix `AB_i` for each parameter that is `A` with the column of that
+    parameter taken from `B`. The `n * (d + 2)` members are run as an
+    `Ensemble` and the first-order (Saltelli 2010) and total (Jansen)
+    indices are estimated from the outputs of `y_func`, with bootstrap
+    confidence intervals.
+
+    Bounds not given in `bounds` are taken from the limits of the
+    parameters (see `param_bounds()`).
+
+    Attributes
+    ----------
+    glm_sim : GLMSim
+        The base simulation.
+    param_paths : List[str]
+        `"nml.block.param"` paths of the parameters to analyse.
+    bounds : Dict[str, Tuple[float, float]]
+        Lower and upper bound of each parameter.
+    space : ParameterSpace
+        Maps points in the unit hypercube to parameter values.
+    design : Union[pd.DataFrame, None]
+        Parameter values of the members of the last run.
+    y : Union[np.ndarray, None]
+        Outputs of the members of the last run.
+
+    Examples
+    --------
+    >>> from glmpy.sensitivity import SobolSensitivity
+    >>> from glmpy.example_sims import SparklingSim
+    >>> def surface_temp(sim):
+    ...     lake = pd.read_csv(f"{sim.get_out_dir()}/lake.csv")
+    ...     return lake["Surface Temp"].mean()
+    >>> sobol = SobolSensitivity(
+    ...     SparklingSim(),
+    ...     ["glm.mixing.coef_mix_hyp", "glm.light.Kw"],
+    ...     bounds={"glm.light.Kw": (0.2, 1.0)},
+    ... )
+    >>> sobol.run(surface_temp, n=256, rm_sim_dir=True)
+    """
+
+    def sample(
+        self,
+        n: int,
+        sampler: str = "halton",
+        seed: Union[int, None] = None,
+    ) -> pd.DataFrame:
+        """Return the Saltelli design of `n * (d + 2)` members.
+
+        Rows are ordered `A`, `B`, `AB_1`, ..., `AB_d`. `sampler` is
+        `"halton"` for a quasi-random (randomised with `seed`) or
+        `"random"` for a pseudo-random base sample.
+        """
+        d = len(self.param_paths)
+        if sampler == "halton":
+            base = halton(n, 2 * d, seed=seed)
+        elif sampler == "random":
+            base = np.random.default_rng(seed).random((n, 2 * d))
+        else:
+            raise ValueError(
+                f"sampler must be 'halton' or 'random'. Got {sampler}"
+            )
+        a, b = base[:, :d], base[:, d:]
+        ab = np.repeat(a[np.newaxis], d, axis=0)
+        ab[np.arange(d), :, np.arange(d)] = b.T
+        return self.scale(np.concatenate([a, b, ab.reshape(-1, d)]))
+
+    def run(
+        self,
+        y_func: Callable[[GLMSim], Any],
+        n: int = 256,
+        sampler: str = "halton",
+        seed: Union[int, None] = None,
+        batch_size: Union[int, None] = None,
+        num_resamples: int = 1000,
+        conf_level: float = 0.95,
+        **run_kwargs,
+    ) -> Union[pd.DataFrame, "SensitivityArrays"]:
+        """Sample, run and analyse the members.
+
+        `y_func` is called with each finished member and must return a
+        number or an array. Members are run `batch_size` at a time
+        (default: all at once) with `Ensemble.run()`, to which `run_kwargs`
+        are passed. Returns the indices as for `analyze()`.
+        """
+        self.design = self.sample(n, sampler, seed)
+        self.y = self._evaluate(
+            self.design, "sobol", y_func, batch_size, run_kwargs
+        )
+        return self.analyze(self.y, num_resamples, conf_level, seed)
+
+    def analyze(
+        self,
+        y: np.ndarray,
+        num_resamples: int = 1000,
+        conf_level: float = 0.95,
+        seed: Union[int, None] = None,
+    ) -> Union[pd.DataFrame, "SensitivityArrays"]:
+        """Estimate the Sobol indices from the outputs of a design.
+
+        `y` has the outputs of the members in the order of `sample()`.
+        Groups of `A`, `B` and `AB_i` rows with a missing output are
+        dropped. Returns a DataFrame indexed by parameter path with the
+        first-order (`S1`) and total (`ST`) indices and the bounds of
+        their bootstrap confidence intervals at `conf_level`. If the
+        outputs are arrays, the indices are estimated element-wise and
+        returned as `SensitivityArrays` with a label per parameter.
+        """
+        d = len(self.param_paths)
+        y = np.asarray(y, dtype=float)
+        output_shape = y.shape[1:]
+        # (d + 2, num_elements, n) so that samples are along the last axis
+        y = y.reshape(d + 2, len(y) // (d + 2), -1).transpose(0, 2, 1)
+        y = y[..., ~np.isnan(y).any(axis=(0, 1))]
+        num_samples = y.shape[-1]
+        if num_samples < 2:
+            raise ValueError("Too few complete samples to estimate indices.")
+        f_a, f_b, f_ab = y[0], y[1], y[2:]
+        s1, st = _sobol_indices(f_a, f_b, f_ab)
+        rng = np.random.default_rng(seed)
+        resamples = rng.integers(
+            0, num_samples, size=(num_resamples, num_samples)
+        )
+        # Resampled in chunks to bound the memory used by long outputs
+        chunk_size = max(
+            _BOOTSTRAP_CHUNK_ELEMENTS // (d * f_a.shape[0] * num_samples), 1
+        )
+        s1_boot, st_boot = [], []
+        for start in range(0, num_resamples, chunk_size):
+            chunk = resamples[start : start + chunk_size]
+            s1_chunk, st_chunk = _sobol_indices(
+                f_a[:, chunk], f_b[:, chunk], f_ab[:, :, chunk]
+            )
+            s1_boot.append(s1_chunk)
+            st_boot.append(st_chunk)
+        alpha = (1 - conf_level) / 2 * 100
+        s1_low, s1_high = np.percentile(
+            np.concatenate(s1_boot, axis=-1), [alpha, 100 - alpha], axis=-1
+        )
+        st_low, st_high = np.percentile(
+            np.concatenate(st_boot, axis=-1), [alpha, 100 - alpha], axis=-1
+        )
+        indices = {
+            "S1": s1,
+            "S1_low": s1_low,
+            "S1_high": s1_high,
+            "ST": st,
+            "ST_low": st_low,
+            "ST_high": st_high,
+        }
+        return self._to_results(indices, output_shape)
+
+
+_BOOTSTRAP_CHUNK_ELEMENTS = 1 << 24
+
+
+def _sobol_indices(
+    f_a: np.ndarray, f_b: np.ndarray, f_ab: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Samples are along the last axis. f_ab has the parameters along the
+    # first axis and any further axes broadcast, e.g., bootstrap resamples.
+    var = np.var(np.concatenate([f_a, f_b], axis=-1), axis=-1)
+    s1 = np.mean(f_b * (f_ab - f_a), axis=-1) / var
+    st = 0.5 * np.mean((f_a - f_ab) ** 2, axis=-1) / var
+    return s1, st
+
+
+class MorrisScreening(_GlobalSensitivity):
+    """Morris elementary effects screening.
+
+    Each trajectory starts at a random point of a grid of `num_levels`
+    levels in every parameter and moves one parameter at a time by
+    `num_levels / (2 * (num_levels - 1))` of its range. `num_trajectories`
+    trajectories are chosen from `num_candidates` random ones to maximise
+    their spread (Campolongo et al., 2007). Points shared by trajectories
+    are only simulated once and all unique points are run as one
+    `Ensemble`.
+
+    The elementary effects are the changes in the output of `y_func` per
+    step, relative to the parameter ranges. `mu_star` (the mean absolute
+    effect) ranks the overall influence of a parameter and `sigma` (the
+    standard deviation of the effects) indicates interactions and
+    non-linearity.
+
+    Bounds not given in `bounds` are taken from the limits of the
+    parameters (see `param_bounds()`).
+
+    Attributes
+    ----------
+    glm_sim : GLMSim
+        The base simulation.
+    param_paths : List[str]
+        `"nml.block.param"` paths of the parameters to screen.
+    bounds : Dict[str, Tuple[float, float]]
+        Lower and upper bound of each parameter.
+    space : ParameterSpace
+        Maps points in the unit hypercube to parameter values.
+    trajectories : Union[np.ndarray, None]
+        Points of the trajectories of the last run in the unit hypercube,
+        of shape `(num_trajectories, num_params + 1, num_params)`.
+    design : Union[pd.DataFrame, None]
+        Parameter values of the unique points of the last run.
+    y : Union[np.ndarray, None]
+        Outputs of the unique points of the last run.
+
+    Examples
+    --------
+    >>> from glmpy.sensitivity import MorrisScreening
+    >>> morris = MorrisScreening(sim, param_paths)
+    >>> screening = morris.run(surface_temp, num_trajectories=20)
+    >>> screening.head(10)
+    """
+
+    def __init__(
+        self,
+        glm_sim: GLMSim,
+        param_paths: List[str],
+        bounds: Union[Dict[str, Tuple[float, float]], None] = None,
+        rel_range: float = 0.5,
+    ):
+        super().__init__(glm_sim, param_paths, bounds, rel_range)
+        self.trajectories = None
+
+    def sample(
+        self,
+        num_trajectories: int = 10,
+        num_levels: int = 4,
+        num_candidates: Union[int, None] = None,
+        seed: Union[int, None] = None,
+    ) -> np.ndarray:
+        """Return optimised trajectories in the unit hypercube."""
+        if num_levels < 2 or num_levels % 2:
+            raise ValueError(
+                f"num_levels must be an even number. Got {num_levels}"
+            )
+        if num_candidates is None:
+            num_candidates = 4 * num_trajectories
+        num_candidates = max(num_candidates, num_trajectories)
+        rng = np.random.default_rng(seed)
+        d = len(self.param_paths)
+        step = num_levels // 2
+        # Trajectories in integer levels so that shared points are exact
+        directions = rng.choice([-1, 1], size=(num_candidates, d))
+        base = rng.integers(0, num_levels - step, size=(num_candidates, d))
+        start = base + step * (directions < 0)
+        order = np.argsort(rng.random((num_candidates, d)), axis=1)
+        moves = np.zeros((num_candidates, d + 1, d), dtype=int)
+        rows = np.arange(num_candidates)
+        for j in range(d):
+            moves[:, j + 1] = moves[:, j]
+            moves[rows, j + 1, order[:, j]] = (
+                step * directions[rows, order[:, j]]
+            )
+        levels = start[:, np.newaxis, :] + moves
+        candidates = levels / (num_levels - 1)
+        selected = _spread_trajectories(candidates, num_trajectories)
+        return candidates[selected]
+
+    def run(
+        self,
+        y_func: Callable[[GLMSim], Any],
+        num_trajectories: int = 10,
+        num_levels: int = 4,
+        num_candidates: Union[int, None] = None,
+        seed: Union[int, None] = None,
+        batch_size: Union[int, None] = None,
+        **run_kwargs,
+    ) -> Union[pd.DataFrame, "SensitivityArrays"]:
+        """Sample, run and analyse the trajectories.
+
+        `y_func` is called with each finished member and must return a
+        number or an array. `run_kwargs` are passed to `Ensemble.run()`.
+        Returns the screening as for `analyze()`.
+        """
+        self.trajectories = self.sample(
+            num_trajectories, num_levels, num_candidates, seed
+        )
+        d = len(self.param_paths)
+        points = self.scale(self.trajectories.reshape(-1, d))
+        self.design, inverse = self._unique(points)
+        self.y = self._evaluate(
+            self.design, "morris", y_func, batch_size, run_kwargs
+        )
+        y = self.y[inverse].reshape(
+            self.trajectories.shape[:2] + self.y.shape[1:]
+        )
+        return self.analyze(self.trajectories, y)
+
+    @staticmethod
+    def _unique(points: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+        # Also merges points that only differ before integers are rounded
+        codes = points.groupby(list(points.columns), sort=False).ngroup()
+        first = ~codes.duplicated()
+        design = points[first.to_numpy()].reset_index(drop=True)
+        return design, codes.to_numpy()
+
+    def analyze(
+        self, trajectories: np.ndarray, y: np.ndarray
+    ) -> Union[pd.DataFrame, "SensitivityArrays"]:
+        """Compute the screening measures from the trajectory outputs.
+
+        `y` has the output at each point of `trajectories`, of shape
+        `(num_trajectories, num_params + 1)` followed by the shape of the
+        outputs if they are arrays. Effects with a missing output are
+        ignored. Returns a DataFrame indexed by parameter path with `mu`,
+        `mu_star`, `sigma` and the `rank` by `mu_star`. Array outputs give
+        element-wise `mu`, `mu_star` and `sigma` as `SensitivityArrays`.
+        """
+        d = len(self.param_paths)
+        y = np.asarray(y, dtype=float)
+        output_shape = y.shape[2:]
+        y = y.reshape(y.shape[:2] + (-1,))
+        steps = np.diff(trajectories, axis=1)
+        changed = np.argmax(np.abs(steps), axis=2)
+        delta = np.take_along_axis(steps, changed[..., np.newaxis], axis=2)
+        effects = np.full((len(trajectories), d, y.shape[2]), np.nan)
+        rows = np.arange(len(trajectories))[:, np.newaxis]
+        effects[rows, changed] = np.diff(y, axis=1) / delta
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            mu = np.nanmean(effects, axis=0)
+            mu_star = np.nanmean(np.abs(effects), axis=0)
+            sigma = np.nanstd(effects, axis=0, ddof=1)
+        screening = self._to_results(
+            {"mu": mu, "mu_star": mu_star, "sigma": sigma}, output_shape
+        )
+        if output_shape:
+            return screening
+        screening["rank"] = (
+            screening["mu_star"]
+            .rank(ascending=False, method="min")
+            .astype("Int64")
+        )
+        return screening.sort_values("mu_star", ascending=False)
+
+
+def _spread_trajectories(
+    candidates: np.ndarray, num_trajectories: int
+) -> List[int]:
+    """Greedily pick the trajectories that are furthest apart.
+
+    The distance between two trajectories is the sum of the distances
+    between their points.
+    """
+    num_candidates, num_points, d = candidates.shape
+    if num_trajectories >= num_candidates:
+        return list(range(num_candidates))
+    points = candidates.reshape(-1, d)
+    sq_norms = np.sum(points**2, axis=1)
+    sq_dists = sq_norms[:, None] + sq_norms[None, :] - 2 * points @ points.T
+    dists = np.sqrt(np.maximum(sq_dists, 0)).reshape(
+        num_candidates, num_points, num_candidates, num_points
+    ).sum(axis=(1, 3))
+    first, second = np.unravel_index(np.argmax(dists), dists.shape)
+    selected = [int(first), int(second)]
+    total = dists[first] + dists[second]
+    total[selected] = -np.inf
+    while len(selected) < num_trajectories:
+        best = int(np.argmax(total))
+        selected.append(best)
+        total += dists[best]
+        total[selected] = -np.inf
+    return selected
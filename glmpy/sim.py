@@ -1,22 +1,107 @@
+import io
 import os
 import copy
+import glob
+import json
 import time
 import pickle
 import shutil
-import warnings
+import asyncio
+import inspect
+import zipfile
 import datetime
+import tempfile
+import contextlib
+import warnings
+import importlib
+import collections
+import importlib.util
+import collections.abc
+import importlib.metadata
+import numpy as np
 import pandas as pd
-import multiprocessing
 
-from glmpy.nml.nml import NMLDict, NML, NMLBlock
+from glmpy.nml.nml import NMLDict, NML, NMLBlock, NMLWriter, BLOCK_REGISTER
 from glmpy.nml.glm_nml import GLMNML
-from typing import Union, Dict, List, Any, Callable
+from glmpy.tracing import Tracer, Span
+# The run API lives in these modules and is re-exported from here
+from glmpy.runner import (
+    RunResult,
+    SimFailure,
+    RunLimits,
+    GLMBinary,
+    GLMBinaryRegistry,
+    GLMRunner,
+    _RunOptions,
+    _file_digest,
+)
+from glmpy.cache import SimCache, BcStore, _hash_json, _hash_df, _sim_config
+from glmpy.manifest import RunManifest, RuntimePredictor
+from glmpy.executor import (
+    EnsembleProgress,
+    SimExecutor,
+    available_cpu_count,
+    _ProgressForwarder,
+    _ProgressMonitor,
+    _SharedSource,
+    _scratch_root,
+    _thread_env,
+    _worker_affinity,
+)
+from typing import Union, Dict, List, Any, Callable, TYPE_CHECKING
 from abc import ABC, abstractmethod
 
+if TYPE_CHECKING:
+    from glmpy.ensemble import Ensemble
+
+INPUTS_MANIFEST = ".glmpy_inputs.json"
+SIM_FILE_FORMAT_VERSION = 1
+
+
+class _LazyBc:
+    """A boundary condition table in a `.glmpy` file, read on first use."""
+
+    def __init__(self, path: str, info: dict):
+        self.path = path
+        self.info = info
+        self._df = None
+
+    def load(self) -> pd.DataFrame:
+        # Cached so that forks sharing the entry also share the DataFrame
+        if self._df is None:
+            with zipfile.ZipFile(self.path) as zf:
+                self._df = _read_bc(zf, self.info)
+        return self._df
+
+
 class BcsDict(dict):
+    """Boundary condition DataFrames by name.
+
+    Tables of a sim loaded with `GLMSim.from_file()` are read from the file
+    the first time they are accessed.
+    """
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        value = super().__getitem__(key)
+        if isinstance(value, _LazyBc):
+            value = value.load()
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self:
+            return self[key]
+        return default
+
+    def items(self):
+        return collections.abc.ItemsView(self)
+
+    def values(self):
+        return collections.abc.ValuesView(self)
+
     def get_deepcopy(self):
         return copy.deepcopy(self)
 
@@ -27,6 +112,7 @@ class Sim(ABC):
         self.bcs = BcsDict()
         self.aed_dbase = {}
         self.outputs_dir = "."
+        self.bc_store = None
     
     @property
     def sim_name(self):
@@ -56,32 +142,122 @@ class Sim(ABC):
         else:
             self.sim_name = sim_name
 
+    def _read_inputs_manifest(self) -> Union[dict, None]:
+        path = os.path.join(self.get_sim_dir(), INPUTS_MANIFEST)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_input(
+        self, rel_path: str, digest: str, writer: Callable[[str], Any]
+    ) -> bool:
+        """Write an input file unless the manifest shows it is current.
+
+        `digest` identifies the content that `writer` would write to the
+        file. The file is skipped if the manifest in the sim directory
+        records the same digest and the file is untouched since. Returns
+        `True` if the file was written. The manifest itself is only saved
+        by `_save_inputs_manifest()`.
+        """
+        sim_dir = self.get_sim_dir()
+        manifest = getattr(self, "_inputs_manifest", None)
+        if manifest is None or manifest[0] != sim_dir:
+            manifest = (sim_dir, self._read_inputs_manifest() or {})
+            self._inputs_manifest = manifest
+        entries = manifest[1]
+        path = os.path.join(sim_dir, rel_path)
+        entry = entries.get(rel_path)
+        if entry is not None and entry["digest"] == digest:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stat = None
+            if (
+                stat is not None
+                and stat.st_size == entry["size"]
+                and stat.st_mtime_ns == entry["mtime_ns"]
+            ):
+                return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        writer(path)
+        stat = os.stat(path)
+        entries[rel_path] = {
+            "digest": digest,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        self._inputs_manifest_changed = True
+        return True
+
+    def _save_inputs_manifest(self):
+        """Save the manifest if `_write_input()` has changed it."""
+        if not getattr(self, "_inputs_manifest_changed", False):
+            return
+        sim_dir, entries = self._inputs_manifest
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=sim_dir)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, os.path.join(sim_dir, INPUTS_MANIFEST))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._inputs_manifest_changed = False
+
+    def _clear_outputs(self, manifest: dict):
+        """Remove the outputs of an earlier run from the sim directory.
+
+        Only the inputs recorded in `manifest` are kept, so that a run that
+        fails or exits early does not leave the previous outputs in place.
+        """
+        sim_dir = self.get_sim_dir()
+        out_dir = self.get_out_dir()
+        if os.path.islink(out_dir):
+            # Outputs linked from a SimCache must not be written through
+            os.remove(out_dir)
+        elif os.path.isdir(out_dir):
+            inputs = {os.path.normpath(rel_path) for rel_path in manifest}
+            inputs.add(INPUTS_MANIFEST)
+            for root, _, files in os.walk(out_dir):
+                for fl in files:
+                    path = os.path.join(root, fl)
+                    if os.path.relpath(path, sim_dir) not in inputs:
+                        os.remove(path)
+        log_path = os.path.join(sim_dir, "glm.log")
+        if os.path.lexists(log_path):
+            os.remove(log_path)
+
     def prepare_inputs(self):
-        if os.path.isdir(os.path.join(self.outputs_dir, self.sim_name)):
-            shutil.rmtree(os.path.join(self.outputs_dir, self.sim_name))
-        os.makedirs(os.path.join(self.outputs_dir, self.sim_name))
+        sim_dir = self.get_sim_dir()
+        manifest = self._read_inputs_manifest()
+        if manifest is None:
+            # Unknown contents, start from an empty directory
+            if os.path.isdir(sim_dir):
+                shutil.rmtree(sim_dir)
+            manifest = {}
+        os.makedirs(sim_dir, exist_ok=True)
+        self._inputs_manifest = (sim_dir, manifest)
+        self._clear_outputs(manifest)
 
         for key, value in self.nml.items():
             nml_name = value.nml_name
             if nml_name == "glm":
-                self.nml["glm"].write_nml(
-                    os.path.join(self.outputs_dir, self.sim_name, "glm3.nml")
-                )
+                rel_path = "glm3.nml"
             elif nml_name == "aed":
-                os.makedirs(
-                    os.path.join(self.outputs_dir, self.sim_name, "aed")
-                )
-                self.nml["aed"].write_nml(
-                    os.path.join(
-                        self.outputs_dir, self.sim_name, "aed", "aed.nml"
-                    )
-                )
+                rel_path = os.path.join("aed", "aed.nml")
             else:
-                self.nml[nml_name].write_nml(
-                    os.path.join(
-                        self.outputs_dir, self.sim_name, f"{nml_name}.nml"
-                    )
-                )
+                rel_path = f"{nml_name}.nml"
+            nml_dict = self.nml[nml_name].to_dict(
+                none_blocks=False, none_params=False
+            )
+            self._write_input(
+                rel_path,
+                _hash_json(nml_dict),
+                NMLWriter(nml_dict=nml_dict).to_nml,
+            )
+        self._save_inputs_manifest()
 
     @abstractmethod
     def prepare_bcs(self):
@@ -100,24 +276,21 @@ class Sim(ABC):
                     f"{bc_fl_param} was set to {bc_fl_path} in the "
                     f"{block} block."
                 )
-            os.makedirs(
-                os.path.dirname(
-                    os.path.join(self.outputs_dir, self.sim_name, bc_fl_path)
-                ),
-                exist_ok=True,
-            )
             bc_pd = self.bcs[bc_fl]
-            bc_pd.to_csv(
-                os.path.join(self.outputs_dir, self.sim_name, bc_fl_path),
-                index=False,
-            )
+            digest = _hash_df(bc_pd)
+            bc_store = getattr(self, "bc_store", None)
+            if bc_store is not None:
+                writer = lambda path: bc_store.link(bc_pd, path, digest)
+            else:
+                writer = lambda path: bc_pd.to_csv(path, index=False)
+            self._write_input(bc_fl_path, digest, writer)
         if (
             block in self.nml[nml].blocks.keys()
             and bc_fl_param
-            in self.nml[nml].blocks[block].params.keys()
+            in self.nml[nml].blocks.peek(block).params.keys()
         ):
             bc_fl_paths = (
-                self.nml[nml].blocks[block].params[bc_fl_param].value
+                self.nml[nml].blocks.peek(block).params[bc_fl_param].value
             )
             if isinstance(bc_fl_paths, list):
                 for bc_fl_path in bc_fl_paths:
@@ -125,6 +298,7 @@ class Sim(ABC):
             else:
                 bc_fl_path = bc_fl_paths
                 _write_single_fl(bc_fl_path)
+            self._save_inputs_manifest()
 
     @abstractmethod
     def validate(self):
@@ -133,21 +307,70 @@ class Sim(ABC):
     def get_deepcopy(self):
         return copy.deepcopy(self)
 
+    def fork(self) -> "Sim":
+        """Return a copy-on-write copy of the sim.
+
+        The copy shares its NML blocks and boundary condition DataFrames
+        with the original rather than duplicating them. A block is copied
+        the first time it is accessed by key in either sim, e.g., when
+        setting a parameter value. Boundary condition DataFrames remain
+        shared: replace an entry in `bcs` rather than modifying the
+        DataFrame in place.
+        """
+        forked = copy.copy(self)
+        forked.nml = self.nml._fork()
+        forked.bcs = BcsDict(self.bcs)
+        forked.aed_dbase = copy.copy(self.aed_dbase)
+        forked._inputs_manifest = None
+        forked._inputs_manifest_changed = False
+        return forked
+
     def rm_sim_dir(self):
         shutil.rmtree(self.get_sim_dir())
 
     def get_sim_dir(self):
         return os.path.join(self.outputs_dir, self.sim_name)
 
+    def get_out_dir(self) -> str:
+        out_dir = None
+        output = self.nml["glm"].blocks.peek("output")
+        if output is not None:
+            out_dir = output.params["out_dir"].value
+        return os.path.join(self.get_sim_dir(), out_dir or ".")
+
+    def _watch_paths(self) -> List[str]:
+        csv_lake_fname = None
+        output = self.nml["glm"].blocks.peek("output")
+        if output is not None:
+            csv_lake_fname = output.params["csv_lake_fname"].value
+        return [
+            os.path.join(self.get_out_dir(), f"{csv_lake_fname or 'lake'}.csv")
+        ]
+
     def to_file(self, path: str):
+        """Save the sim to a `.glmpy` file.
+
+        The file is a zip archive of a `manifest.json`, the NMLs as
+        `nml.json` and each boundary condition table in `bcs/`, as Parquet
+        if pyarrow is installed and otherwise as CSV.
+        """
         _, file_extension = os.path.splitext(path)
         if not file_extension == ".glmpy":
             raise ValueError(
                 "The `.glmpy` extension must be used with the to_file() "
                 f"method. Got {file_extension}"
             )
-        with open(path, "wb") as f:
-            pickle.dump(self, f, pickle.HIGHEST_PROTOCOL)
+        dir_name = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".tmp_", suffix=".glmpy", dir=dir_name
+        )
+        os.close(fd)
+        try:
+            _write_sim_file(self, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
 
     def set_param_value(
             self, nml_name:str, block_name:str, param_name:str, value:Any
@@ -156,7 +379,8 @@ class Sim(ABC):
         self.validate()
     
     def get_param_value(self, nml_name:str, block_name:str, param_name:str) -> Any:
-        value = self.nml[nml_name].blocks[block_name].params[param_name].value
+        block = self.nml[nml_name].blocks.peek(block_name)
+        value = block.params[param_name].value
         return value
     
     def set_block(self, nml_name:str, block:NMLBlock):
@@ -173,26 +397,280 @@ class Sim(ABC):
     def get_nml(self, nml_name: str) -> NML:
         return self.nml[nml_name]
     
+    def _prepare_run(
+        self,
+        bc_store: Union["BcStore", None] = None,
+        tracer: Union[Tracer, None] = None,
+    ) -> str:
+        prev_bc_store = getattr(self, "bc_store", None)
+        if bc_store is not None:
+            self.bc_store = bc_store
+        sim_dir = self.get_sim_dir()
+        try:
+            with _span(tracer, "validate"):
+                self.validate()
+            with _span(tracer, "prepare_inputs", sim_dir):
+                self.prepare_inputs()
+            with _span(tracer, "prepare_bcs", sim_dir):
+                self.prepare_bcs()
+            with _span(tracer, "prepare_aed_dbases", sim_dir):
+                self.prepare_aed_dbases()
+        finally:
+            self.bc_store = prev_bc_store
+        return os.path.join(self.outputs_dir, self.sim_name, "glm3.nml")
+
+    def _cache_lookup(self, cache: "SimCache", glm_path: Union[str, None]):
+        binary = GLMRunner.resolve_glm_binary(glm_path)
+        key = cache.key(self, binary.path)
+        result = cache.restore(key, self)
+        if result is not None:
+            result.glm_version = binary.version
+            result.glm_digest = binary.digest
+        return key, result
+
+    def _harvest(
+        self,
+        src_dir: str,
+        dst_dir: str,
+        harvest: Union[List[str], None],
+        harvest_nc_vars: Union[List[str], None],
+    ):
+        if harvest is None:
+            out_dir = os.path.relpath(self.get_out_dir(), self.get_sim_dir())
+            harvest = [out_dir, "glm.log"]
+        paths = set()
+        for pattern in harvest:
+            for path in glob.glob(os.path.join(src_dir, pattern)):
+                if os.path.isdir(path):
+                    for root, _, files in os.walk(path):
+                        for fl in files:
+                            paths.add(os.path.join(root, fl))
+                else:
+                    paths.add(path)
+        for src in sorted(paths):
+            dst = os.path.join(dst_dir, os.path.relpath(src, src_dir))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if harvest_nc_vars is not None and src.endswith(".nc"):
+                _subset_nc(src, dst, harvest_nc_vars)
+            else:
+                shutil.copyfile(src, dst)
+
+    def _run_in_workspace(
+        self, options: _RunOptions, tracer: Union[Tracer, None]
+    ) -> RunResult:
+        if os.path.isdir(self.get_sim_dir()):
+            # Harvesting only adds files, so clear out the last run first
+            self._clear_outputs(self._read_inputs_manifest() or {})
+        outputs_dir = self.outputs_dir
+        scratch_dir = tempfile.mkdtemp(
+            prefix="glmpy_", dir=_scratch_root(options.workspace)
+        )
+        try:
+            self.outputs_dir = scratch_dir
+            try:
+                result = self._run(
+                    options.replace(
+                        workspace=None, harvest=None, harvest_nc_vars=None
+                    ),
+                    tracer,
+                )
+                src_dir = self.get_sim_dir()
+            finally:
+                # Never leave the sim pointing at the scratch directory
+                self.outputs_dir = outputs_dir
+            with _span(tracer, "harvest", self.get_sim_dir()):
+                self._harvest(
+                    src_dir,
+                    self.get_sim_dir(),
+                    options.harvest,
+                    options.harvest_nc_vars,
+                )
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+        if result.log_path is not None:
+            result.log_path = os.path.join(self.get_sim_dir(), "glm.log")
+        return result
+
     def run(
         self,
         write_log: bool = False,
         quiet: bool = False,
         time_sim: bool = False,
         glm_path: Union[str, None] = "./glm",
-    ):
-        self.validate()
-        self.prepare_inputs()
-        self.prepare_bcs()
-        self.prepare_aed_dbases()
-        nml_file = os.path.join(self.outputs_dir, self.sim_name, "glm3.nml")
-        GLMRunner.run(
+        cache: Union["SimCache", None] = None,
+        bc_store: Union["BcStore", None] = None,
+        workspace: Union[str, None] = None,
+        harvest: Union[List[str], None] = None,
+        harvest_nc_vars: Union[List[str], None] = None,
+        limits: Union["RunLimits", None] = None,
+        tracer: Union[Tracer, None] = None,
+        on_progress: Union[Callable, None] = None,
+        affinity: Union[List[int], None] = None,
+        env: Union[Dict[str, str], None] = None,
+    ) -> "RunResult":
+        """Run the simulation.
+
+        With `workspace` set, the sim directory is built and run in a
+        scratch directory instead: `"tmpfs"` uses `/dev/shm` where
+        available, otherwise pass the path of a scratch root. Only the
+        paths matching the glob patterns in `harvest` (relative to the sim
+        directory, default: the GLM output directory and `glm.log`) are
+        copied back to the sim directory in `outputs_dir`. If
+        `harvest_nc_vars` is given, harvested NetCDF files are reduced to
+        those variables and their coordinates.
+
+        `limits` bounds the GLM process with a `RunLimits`. The lake CSV
+        output is watched along with the GLM output.
+
+        If a `tracer` is given, a span is recorded for each phase of the
+        run and the spans of the run are also kept in `RunResult.spans`.
+
+        `on_progress(sim_name, current_date, fraction)` is called as GLM
+        reports the simulated date and the fraction of days complete.
+
+        `affinity` pins GLM to a list of CPUs and `env` replaces its
+        environment.
+        """
+        options = _RunOptions(
+            write_log=write_log,
+            quiet=quiet,
+            time_sim=time_sim,
+            glm_path=glm_path,
+            cache=cache,
+            bc_store=bc_store,
+            workspace=workspace,
+            harvest=harvest,
+            harvest_nc_vars=harvest_nc_vars,
+            limits=limits,
+            on_progress=on_progress,
+            affinity=affinity,
+            env=env,
+        )
+        return self._run_with_options(options, tracer)
+
+    def _run_with_options(
+        self, options: _RunOptions, tracer: Union[Tracer, None]
+    ) -> RunResult:
+        if tracer is None:
+            return self._run(options, tracer)
+        with tracer.span("run", sim_name=self.sim_name) as span:
+            result = self._run(options, tracer)
+            span.attributes["status"] = result.status
+            span.attributes["cached"] = result.cached
+        result.spans = tracer.trace(span.trace_id)
+        return result
+
+    def _run(
+        self, options: _RunOptions, tracer: Union[Tracer, None]
+    ) -> RunResult:
+        if options.workspace is not None:
+            return self._run_in_workspace(options, tracer)
+        nml_file = self._prepare_run(options.bc_store, tracer)
+        cache = options.cache
+        if cache is not None:
+            with _span(tracer, "cache_lookup", self.get_sim_dir()):
+                key, result = self._cache_lookup(cache, options.glm_path)
+            if result is not None:
+                return result
+        with _span(tracer, "glm", self.get_sim_dir()) as span:
+            result = GLMRunner.run(
+                glm_nml_path=nml_file,
+                sim_name=self.sim_name,
+                write_log=options.write_log,
+                quiet=options.quiet,
+                time_sim=options.time_sim,
+                glm_path=options.glm_path,
+                limits=options.limits,
+                watch_paths=self._watch_paths(),
+                on_progress=options.on_progress,
+                affinity=options.affinity,
+                env=options.env,
+            )
+            if span is not None:
+                span.attributes["returncode"] = result.returncode
+                if result.user_time is not None:
+                    span.attributes["cpu_time"] = (
+                        result.user_time + result.sys_time
+                    )
+                if result.max_rss is not None:
+                    span.attributes["max_rss"] = result.max_rss
+        if cache is not None and result.success:
+            cache.store(key, self, result)
+        return result
+
+    async def run_async(
+        self,
+        write_log: bool = False,
+        quiet: bool = False,
+        time_sim: bool = False,
+        glm_path: Union[str, None] = "./glm",
+        cache: Union["SimCache", None] = None,
+        bc_store: Union["BcStore", None] = None,
+        limits: Union["RunLimits", None] = None,
+        on_progress: Union[Callable, None] = None,
+    ) -> "RunResult":
+        nml_file = await asyncio.to_thread(self._prepare_run, bc_store)
+        if cache is not None:
+            key, result = await asyncio.to_thread(
+                self._cache_lookup, cache, glm_path
+            )
+            if result is not None:
+                return result
+        result = await GLMRunner.run_async(
             glm_nml_path=nml_file,
             sim_name=self.sim_name,
             write_log=write_log,
             quiet=quiet,
             time_sim=time_sim,
             glm_path=glm_path,
+            limits=limits,
+            watch_paths=self._watch_paths(),
+            on_progress=on_progress,
         )
+        if cache is not None and result.success:
+            await asyncio.to_thread(cache.store, key, self, result)
+        return result
+
+
+def _span(tracer: Union[Tracer, None], name: str, watch_dir=None):
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.span(name, watch_dir)
+
+
+def _adopt_spans(spans: List[Span], parent: Union[Span, None]):
+    """Make the root spans of sims run in workers children of `parent`."""
+    if parent is None:
+        return
+    for span in spans:
+        span.trace_id = parent.trace_id
+        if span.parent_id is None:
+            span.parent_id = parent.span_id
+
+
+def _subset_nc(src: str, dst: str, var_names: List[str]):
+    """Copy a NetCDF file keeping only `var_names` and coordinates."""
+    import netCDF4
+
+    with netCDF4.Dataset(src) as src_nc, netCDF4.Dataset(
+        dst, "w", format=src_nc.data_model
+    ) as dst_nc:
+        dst_nc.setncatts(src_nc.__dict__)
+        for name, dim in src_nc.dimensions.items():
+            dst_nc.createDimension(
+                name, None if dim.isunlimited() else len(dim)
+            )
+        for name, var in src_nc.variables.items():
+            if name not in var_names and name not in src_nc.dimensions:
+                continue
+            fill_value = var.__dict__.get("_FillValue")
+            dst_var = dst_nc.createVariable(
+                name, var.datatype, var.dimensions, fill_value=fill_value
+            )
+            dst_var.setncatts(
+                {k: v for k, v in var.__dict__.items() if k != "_FillValue"}
+            )
+            dst_var[:] = var[:]
 
 
 class GLMSim(Sim):
@@ -230,117 +708,328 @@ class GLMSim(Sim):
         self, nml_name:str, block_name:str, param_name: str
     ):
         if nml_name in self.nml.keys():
-            if self.nml[nml_name].blocks[block_name] is not None:
-                if param_name in self.nml[nml_name].blocks[block_name].params.keys():
-                    param = self.nml[nml_name].blocks[block_name].params[param_name]
+            block = self.nml[nml_name].blocks.peek(block_name)
+            if block is not None:
+                if param_name in block.params.keys():
+                    param = block.params[param_name]
                     dest_path = param.value
                     if dest_path is not None:
                         dest_file_name = os.path.basename(dest_path)
                         for src_file_path in self.aed_dbase:
                             if dest_file_name == os.path.basename(src_file_path):
-                                shutil.copyfile(
-                                    src=src_file_path,
-                                    dst=os.path.join(
-                                        self.outputs_dir, 
-                                        self.sim_name, 
-                                        dest_path
-                                    )
+                                self._write_input(
+                                    dest_path,
+                                    _file_digest(src_file_path),
+                                    lambda dst: shutil.copyfile(
+                                        src=src_file_path, dst=dst
+                                    ),
                                 )
+                                self._save_inputs_manifest()
     
     def validate(self):
         self.nml.validate()
     
     @staticmethod
     def from_file(path: str) -> "GLMSim":
+        """Load a sim saved with `to_file()`.
+
+        Parameters are loaded immediately and boundary condition tables
+        when they are first accessed, so the file must not be moved or
+        deleted before then. Files saved by earlier versions of glmpy
+        (pickles) are also read.
+        """
         _, file_extension = os.path.splitext(path)
         if not file_extension == ".glmpy":
             raise ValueError(
                 "The `.glmpy` extension must be used with the from_file() "
                 f"method. Got {file_extension}"
             )
+        if zipfile.is_zipfile(path):
+            return _read_sim_file(path)
+        warnings.warn(
+            f"{path} is a pickled sim from an earlier version of glmpy. "
+            "Save it again with to_file() to use the current format.",
+            DeprecationWarning,
+        )
         with open(path, "rb") as f:
-            return pickle.load(f)
+            sim = pickle.load(f)
+        # Pickles from before aed_dbase was added do not have it
+        if not hasattr(sim, "aed_dbase"):
+            sim.aed_dbase = {}
+        return sim
 
 
-class GLMRunner:
-    @staticmethod
-    def glmpy_glm_path() -> Union[str, None]:
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        if os.name == "nt":
-            exe_name = "glm.exe"
-        else:
-            exe_name = "glm"
-        exe_path = os.path.join(base_path, "bin", exe_name)
-        if os.path.isfile(exe_path):
-            return exe_path
-        else:
-            return None
+def _class_path(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
 
-    @staticmethod
-    def run(
-        glm_nml_path: str,
-        sim_name: str = "simulation",
-        write_log: bool = False,
-        quiet: bool = False,
-        time_sim: bool = False,
-        glm_path: Union[str, None] = None,
-    ) -> None:
-        if glm_path is None:
-            glm_path = GLMRunner.glmpy_glm_path()
-            if glm_path is None:
-                expected_path = os.path.join(
-                    os.path.dirname(os.path.abspath(__file__)), "bin"
-                )
-                raise Exception(
-                    "The GLM binary was not found in the expected path: "
-                    f"{expected_path}"
-                    "\n If you have installed the source distribution of glmpy"
-                    ", a GLM binary is not included. Provide the path to an "
-                    "external GLM binary using the glm_path parameter."
-                )
-        run_command = f'{glm_path} --nml "{glm_nml_path}"'
-        target = None
-        if quiet:
-            target = open(os.devnull, "w")
-        if write_log:
-            log_file = os.path.join(os.path.dirname(glm_nml_path), "glm.log")
-            target = open(log_file, "w")
-        if time_sim:
-            print(f"Starting {sim_name}")
+
+def _import_class(class_path: str) -> type:
+    module_name, _, qualname = class_path.partition(":")
+    obj = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    return value
+
+
+def _nml_to_json(nml: NML) -> dict:
+    blocks = {}
+    for block_name, block in nml.blocks.peek_items():
+        if block is None:
+            blocks[block_name] = None
+            continue
+        blocks[block_name] = {
+            "class": _class_path(type(block)),
+            "strict": block.strict,
+            "params": {
+                name: _json_value(param.value)
+                for name, param in block.params.items()
+            },
+        }
+    return {
+        "class": _class_path(type(nml)),
+        "strict": nml.strict,
+        "blocks": blocks,
+    }
+
+
+def _nml_from_json(nml_json: dict) -> NML:
+    nml = _import_class(nml_json["class"])()
+    for block_name, block_json in nml_json["blocks"].items():
+        if block_json is None:
+            nml.blocks[block_name] = None
+            continue
         try:
-            if target:
-                save = os.dup(1), os.dup(2)
-                os.dup2(target.fileno(), 1)
-                os.dup2(target.fileno(), 2)
-            if time_sim:
-                start_time = time.perf_counter()
-                os.system(run_command)
-                end_time = time.perf_counter()
-                total_duration = end_time - start_time
-                total_duration = datetime.timedelta(
-                    seconds=round(total_duration)
+            block_cls = _import_class(block_json["class"])
+        except (ImportError, AttributeError):
+            block_cls = BLOCK_REGISTER.get(block_name)
+        block = block_cls()
+        for name, value in block_json["params"].items():
+            if name not in block.params:
+                warnings.warn(
+                    f"Skipping {name}, which is not a parameter of "
+                    f"{block_cls.__name__}."
                 )
+                continue
+            block.params[name].value = value
+        block.strict = block_json["strict"]
+        nml.blocks[block_name] = block
+    # Not through the setter, which would overwrite the block settings
+    nml._strict = nml.blocks._strict = nml_json["strict"]
+    return nml
+
+
+def _write_bc(zf: zipfile.ZipFile, name: str, df: pd.DataFrame) -> dict:
+    info = {
+        "columns": [str(col) for col in df.columns],
+        "dtypes": {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        "rows": len(df),
+    }
+    if importlib.util.find_spec("pyarrow") is not None:
+        info["path"] = f"bcs/{name}.parquet"
+        info["format"] = "parquet"
+        buffer = io.BytesIO()
+        df.to_parquet(buffer)
+        # Parquet is already compressed
+        zf.writestr(info["path"], buffer.getvalue(), zipfile.ZIP_STORED)
+    else:
+        info["path"] = f"bcs/{name}.csv"
+        info["format"] = "csv"
+        info["index"] = not (
+            isinstance(df.index, pd.RangeIndex)
+            and df.index.start == 0
+            and df.index.step == 1
+        )
+        zf.writestr(info["path"], df.to_csv(index=info["index"]))
+    return info
+
+
+def _read_bc(zf: zipfile.ZipFile, info: dict) -> pd.DataFrame:
+    if info["format"] == "parquet":
+        return pd.read_parquet(io.BytesIO(zf.read(info["path"])))
+    with zf.open(info["path"]) as f:
+        df = pd.read_csv(f, index_col=0 if info["index"] else None)
+    for col, dtype in info["dtypes"].items():
+        if str(df[col].dtype) == dtype:
+            continue
+        try:
+            if dtype.startswith("datetime64"):
+                df[col] = pd.to_datetime(df[col])
             else:
-                os.system(run_command)
-        finally:
-            if target:
-                os.dup2(save[0], 1)
-                os.dup2(save[1], 2)
-                os.close(save[0])
-                os.close(save[1])
-                target.close()
-        if time_sim:
-            print(f"Finished {sim_name} in {str(total_duration)}")
+                df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError):
+            pass
+    return df
+
+
+def _glmpy_version() -> Union[str, None]:
+    try:
+        return importlib.metadata.version("glmpy")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _write_sim_file(sim: Sim, path: str):
+    manifest = {
+        "format_version": SIM_FILE_FORMAT_VERSION,
+        "glmpy_version": _glmpy_version(),
+        "sim_class": _class_path(type(sim)),
+        "sim_name": sim.sim_name,
+        "outputs_dir": sim.outputs_dir,
+        "aed_dbase": list(sim.aed_dbase),
+        "nml_strict": sim.nml.strict,
+        "bcs": {},
+    }
+    nml_json = {
+        nml_name: None if nml is None else _nml_to_json(nml)
+        for nml_name, nml in sim.nml.items()
+    }
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("nml.json", json.dumps(nml_json, indent=2))
+        for name, df in sim.bcs.items():
+            manifest["bcs"][name] = _write_bc(zf, name, df)
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+
+
+def _read_sim_file(path: str) -> Sim:
+    with zipfile.ZipFile(path) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+        if manifest["format_version"] > SIM_FILE_FORMAT_VERSION:
+            raise ValueError(
+                f"{path} was saved with a newer version of glmpy "
+                f"({manifest['glmpy_version']}). Upgrade glmpy to load it."
+            )
+        nml_json = json.loads(zf.read("nml.json"))
+    sim_cls = _import_class(manifest["sim_class"])
+    # Attributes are restored directly, as unpickling does
+    sim = sim_cls.__new__(sim_cls)
+    Sim.__init__(sim)
+    for nml_name, nml in nml_json.items():
+        sim.nml[nml_name] = None if nml is None else _nml_from_json(nml)
+    sim.nml._strict = manifest["nml_strict"]
+    sim._sim_name = manifest["sim_name"]
+    sim.outputs_dir = manifest["outputs_dir"]
+    sim.aed_dbase = manifest["aed_dbase"]
+    for name, info in manifest["bcs"].items():
+        dict.__setitem__(sim.bcs, name, _LazyBc(path, info))
+    return sim
+
 
 def no_op_callback(x):
     return None
 
+
+def _run_single_sim(
+    glm_sim: GLMSim,
+    on_sim_end: Callable[[GLMSim], Any],
+    rm_sim_dir: bool = False,
+    write_log: bool = True,
+    time_sim: bool = True,
+    glm_path: Union[str, None] = "./glm",
+    **run_kwargs,
+):
+    # Module level so that pool workers receive only the sim and not the
+    # MultiSim (and every other sim) a bound method would drag along.
+    options = _RunOptions(
+        write_log=write_log,
+        time_sim=time_sim,
+        glm_path=glm_path,
+        **run_kwargs,
+    )
+    rv, _ = _run_sim_with_result(glm_sim, on_sim_end, rm_sim_dir, options)
+    return rv
+
+
+def _run_sim_with_result(
+    glm_sim: GLMSim,
+    on_sim_end: Callable[[GLMSim], Any],
+    rm_sim_dir: bool,
+    options: _RunOptions,
+    retries: int = 0,
+    trace: bool = False,
+    trace_io: bool = False,
+    progress_queue=None,
+    pin: Union[str, None] = None,
+    threads_per_sim: Union[int, None] = None,
+):
+    # Spans are recorded in the worker and returned with the result
+    tracer = Tracer(count_io=trace_io) if trace else None
+    worker_options = {"quiet": True, "on_progress": None}
+    if progress_queue is not None:
+        worker_options["on_progress"] = _ProgressForwarder(progress_queue)
+    if pin is not None:
+        worker_options["affinity"] = _worker_affinity(pin)
+    if threads_per_sim is not None:
+        worker_options["env"] = _thread_env(threads_per_sim)
+    options = options.replace(**worker_options)
+    for attempt in range(1, retries + 2):
+        result = glm_sim._run_with_options(options, tracer)
+        # A diverging sim diverges again
+        if result.success or result.status == "diverged":
+            break
+    if result.success:
+        with _span(tracer, "on_sim_end"):
+            rv = on_sim_end(glm_sim)
+    else:
+        rv = SimFailure(glm_sim.sim_name, result, attempt)
+    if tracer is not None:
+        for span in tracer.spans:
+            span.attributes.setdefault("sim_name", glm_sim.sim_name)
+        result.spans = tracer.spans
+    if rm_sim_dir:
+        glm_sim.rm_sim_dir()
+    return rv, result
+
+
+def _resolve_sim(index: int, item) -> Sim:
+    # Lazy sources (e.g., an Ensemble) are loaded by each worker once and
+    # their members created from the index on demand.
+    if isinstance(item, _SharedSource):
+        item = item.load()
+    if isinstance(item, Sim):
+        return item
+    return item.materialize(index)
+
+
+def _run_indexed_sim(task: tuple):
+    (
+        index,
+        item,
+        on_sim_end,
+        rm_sim_dir,
+        options,
+        worker_kwargs,
+        make_record,
+    ) = task
+    glm_sim = _resolve_sim(index, item)
+    config_hash = _hash_json(_sim_config(glm_sim)) if make_record else None
+    rv, result = _run_sim_with_result(
+        glm_sim, on_sim_end, rm_sim_dir, options, **worker_kwargs
+    )
+    record = None
+    if make_record:
+        # Built in the worker so that the return value is only encoded once
+        record = RunManifest.make_record(
+            glm_sim.sim_name, config_hash, result, rv
+        )
+    return index, glm_sim.sim_name, rv, result, record
+
+
 class MultiSim:
-    def __init__(self, glm_sims: List[GLMSim]):
+    def __init__(self, glm_sims: Union[List[GLMSim], "Ensemble"]):
         self.glm_sims = glm_sims
+        self.schedule_report = None
+        self.progress = None
 
     def cpu_count(self) -> Union[int, None]:
-        return os.cpu_count()
+        return available_cpu_count()
  
     def run_single_sim(
             self, 
@@ -350,17 +1039,156 @@ class MultiSim:
             write_log: bool = True,
             time_sim: bool = True,
             glm_path: Union[str, None] = "./glm",
+            **run_kwargs,
         ):
-        glm_sim.run(
-            write_log=write_log,
-            quiet=True,
-            time_sim=time_sim,
-            glm_path=glm_path,
+        return _run_single_sim(
+            glm_sim,
+            on_sim_end,
+            rm_sim_dir,
+            write_log,
+            time_sim,
+            glm_path,
+            **run_kwargs,
         )
-        rv = on_sim_end(glm_sim)
-        if rm_sim_dir:
-            glm_sim.rm_sim_dir()
-        return rv
+
+    def _check_cpu_count(
+        self, cpu_count: Union[int, None]
+    ) -> Union[int, None]:
+        sys_cpu_count = os.cpu_count()
+        available = self.cpu_count()
+        if sys_cpu_count is not None:
+            if cpu_count is None:
+                cpu_count = available or sys_cpu_count
+            if cpu_count > sys_cpu_count:
+                raise ValueError(
+                    f"cpu_count of {cpu_count} exceeds the {sys_cpu_count} "
+                    f"CPUs on the system."
+                )
+            if available is not None and cpu_count > available:
+                warnings.warn(
+                    f"cpu_count of {cpu_count} exceeds the {available} "
+                    "CPUs available to this process. GLM processes will "
+                    "compete for CPUs."
+                )
+        else:
+            warnings.warn(f"Undetermined number of CPUs on the system.")
+        return cpu_count
+
+    def _imap(
+        self,
+        on_sim_end: Callable[[GLMSim], Any],
+        cpu_count: Union[int, None],
+        rm_sim_dir: bool,
+        executor: Union[str, SimExecutor],
+        chunksize: int,
+        options: _RunOptions,
+        worker_kwargs: dict,
+        skip: Union[Dict[int, Any], None] = None,
+        manifest: Union[RunManifest, None] = None,
+        order: Union[List[int], None] = None,
+        on_progress: Union[Callable, bool, None] = None,
+    ):
+        """Yield `(index, sim_name, rv, result)` in order of completion.
+
+        Each sim is run with `options` and `worker_kwargs` by
+        `_run_sim_with_result()`. Sims are dispatched in the order of the
+        indices in `order` (default: list order) and those whose index is
+        in `skip` are not run. If `manifest` is given, a record of each
+        finished sim is appended to it. If `on_progress` is given, the
+        progress of the sims is collected in `self.progress`.
+        """
+        if worker_kwargs.get("pin") not in (None, "core", "numa"):
+            raise ValueError(
+                f"pin must be 'core' or 'numa'. Got {worker_kwargs['pin']}"
+            )
+        is_lazy = hasattr(self.glm_sims, "materialize")
+        owns_executor = not isinstance(executor, SimExecutor)
+        if owns_executor:
+            executor = SimExecutor(executor, cpu_count).start()
+        source = executor.share(self.glm_sims) if is_lazy else None
+        monitor = None
+        if on_progress is not None and on_progress is not False:
+            self.progress = EnsembleProgress(
+                len(self.glm_sims) - len(skip or {})
+            )
+            monitor = _ProgressMonitor(
+                self.progress, on_progress, executor.kind
+            )
+            worker_kwargs = dict(
+                worker_kwargs, progress_queue=monitor.start()
+            )
+        if order is None:
+            order = range(len(self.glm_sims))
+        skip = skip or {}
+        make_record = manifest is not None
+        tasks = (
+            (
+                i,
+                source if is_lazy else self.glm_sims[i],
+                on_sim_end,
+                rm_sim_dir,
+                options,
+                worker_kwargs,
+                make_record,
+            )
+            for i in order
+            if i not in skip
+        )
+        try:
+            for index, sim_name, rv, result, record in (
+                executor.imap_unordered(_run_indexed_sim, tasks, chunksize)
+            ):
+                if manifest is not None:
+                    manifest.append([record])
+                if monitor is not None:
+                    self.progress.finish(sim_name)
+                yield index, sim_name, rv, result
+        finally:
+            if monitor is not None:
+                monitor.stop()
+            executor.unshare(source)
+            if owns_executor:
+                # GLM processes are children of the worker threads, so
+                # threads are waited on while worker processes can go
+                executor.shutdown(wait=executor.kind == "thread")
+
+    def _get_manifest(
+        self, manifest: Union[str, bool, None], resume: bool = False
+    ) -> Union[RunManifest, None]:
+        if manifest is None and resume:
+            manifest = True
+        if manifest is False or manifest is None or len(self.glm_sims) == 0:
+            return None
+        if manifest is True:
+            manifest = os.path.join(
+                self.glm_sims[0].outputs_dir, "multi_sim_manifest.jsonl"
+            )
+        return RunManifest(manifest)
+
+    def _completed(self, manifest: Union[RunManifest, None]) -> Dict[int, Any]:
+        """Return the stored return values of sims that need no re-run.
+
+        A sim is complete if the latest manifest record of its name
+        succeeded and was made with the same configuration.
+        """
+        if manifest is None:
+            return {}
+        records = manifest.records()
+        # Ensemble members are only created if their name has a record
+        sim_names = getattr(self.glm_sims, "sim_names", None)
+        completed = {}
+        for i in range(len(self.glm_sims)):
+            if sim_names is not None:
+                sim_name = sim_names[i]
+            else:
+                sim_name = self.glm_sims[i].sim_name
+            record = records.get(sim_name)
+            if record is None or record["status"] != "completed":
+                continue
+            config_hash = _hash_json(_sim_config(self.glm_sims[i]))
+            if record["config_hash"] == config_hash:
+                completed[i] = RunManifest.load_rv(record)
+        return completed
 
     def run(
         self,
@@ -371,39 +1199,327 @@ class MultiSim:
         time_sim: bool = True,
         time_multi_sim: bool = True,
         glm_path: Union[str, None] = "./glm",
+        executor: Union[str, SimExecutor] = "process",
+        cache: Union[SimCache, None] = None,
+        bc_store: Union["BcStore", None] = None,
+        workspace: Union[str, None] = None,
+        harvest: Union[List[str], None] = None,
+        harvest_nc_vars: Union[List[str], None] = None,
+        manifest: Union[str, bool, None] = None,
+        resume: bool = False,
+        limits: Union[RunLimits, None] = None,
+        retries: int = 0,
+        schedule: str = "fifo",
+        predictor: Union[RuntimePredictor, None] = None,
+        tracer: Union[Tracer, None] = None,
+        on_progress: Union[Callable, bool, None] = None,
+        pin: Union[str, None] = None,
+        threads_per_sim: Union[int, None] = 1,
     ):
+        """Run the simulations and return the `on_sim_end` return values.
+
+        Parameters
+        ----------
+        cpu_count : Union[int, None]
+            Number of workers. Default: `available_cpu_count()`.
+        executor : Union[str, SimExecutor]
+            `"process"`, `"thread"` or a running `SimExecutor`.
+        manifest : Union[str, bool, None]
+            Path of a `RunManifest` to record finished sims in. `True` for
+            `multi_sim_manifest.jsonl` in the `outputs_dir` of the first
+            sim.
+        resume : bool
+            Reuse the results of sims that completed with the same
+            configuration, from the default manifest if `manifest` is not
+            given.
+        limits : Union[RunLimits, None]
+            Bounds each GLM process.
+        retries : int
+            Number of times to rerun failed sims that did not diverge.
+            Sims that still fail are not passed to `on_sim_end` and return
+            a `SimFailure`.
+        schedule : str
+            `"fifo"`, or `"ljf"` to start the sims `predictor` expects to
+            take longest first. Makespans are kept in `schedule_report`.
+        predictor : Union[RuntimePredictor, None]
+            Updated with the runtimes of the sims.
+        tracer : Union[Tracer, None]
+            Records the spans of every sim.
+        on_progress : Union[Callable, bool, None]
+            Called with `(sim_name, current_date, fraction)`, or `True` to
+            print the ensemble progress. It is kept in `progress`.
+        pin : Union[str, None]
+            `"core"` or `"numa"` to pin the GLM process of each worker.
+        threads_per_sim : Union[int, None]
+            OpenMP and BLAS threads of each GLM process. `None` leaves the
+            environment unchanged.
+        """
+        if schedule not in ("fifo", "ljf"):
+            raise ValueError(
+                f"schedule must be 'fifo' or 'ljf'. Got {schedule}"
+            )
         if on_sim_end is None:
             on_sim_end = no_op_callback
-        sys_cpu_count = self.cpu_count()
-        if sys_cpu_count is not None:
-            if cpu_count is None:
-                cpu_count = sys_cpu_count
-            if cpu_count > sys_cpu_count:
-                raise ValueError(
-                    f"cpu_count of {cpu_count} exceeds the {sys_cpu_count} "
-                    f"CPUs on the system."
-                )
+        if isinstance(executor, SimExecutor):
+            cpu_count = executor.max_workers
         else:
-            warnings.warn(f"Undetermined number of CPUs on the system.")
+            cpu_count = self._check_cpu_count(cpu_count)
+        num_sims = len(self.glm_sims)
+        run_manifest = self._get_manifest(manifest, resume)
+        completed = self._completed(run_manifest) if resume else {}
+        order = None
+        features = {}
+        if schedule == "ljf" and predictor is None:
+            predictor = RuntimePredictor()
+        if predictor is not None:
+            features = {
+                i: predictor.features(self.glm_sims[i])
+                for i in range(num_sims)
+                if i not in completed
+            }
+        if schedule == "ljf":
+            predicted = {i: predictor.predict(f) for i, f in features.items()}
+            order = sorted(predicted, key=predicted.get, reverse=True)
         if time_multi_sim:
+            if completed:
+                print(
+                    f"Resuming with {len(completed)} of {num_sims} "
+                    "simulations already completed"
+                )
             print(
-                f"Starting {len(self.glm_sims)} simulations for {cpu_count} "
-                "CPUs"
+                f"Starting {num_sims - len(completed)} simulations for "
+                f"{cpu_count} CPUs"
             )
             start_time = time.perf_counter()
-        args = [
-            (
-                glm_sim,
+        # Same chunking heuristic as Pool.starmap
+        chunksize, extra = divmod(
+            num_sims - len(completed), (cpu_count or 1) * 4
+        )
+        if extra or chunksize == 0:
+            chunksize += 1
+        if order is not None:
+            # Chunks would send runs of long sims to the same worker
+            chunksize = 1
+        options = _RunOptions(
+            write_log=write_log,
+            time_sim=time_sim,
+            glm_path=glm_path,
+            cache=cache,
+            bc_store=bc_store,
+            workspace=workspace,
+            harvest=harvest,
+            harvest_nc_vars=harvest_nc_vars,
+            limits=limits,
+        )
+        worker_kwargs = {
+            "retries": retries,
+            "trace": tracer is not None,
+            "trace_io": tracer is not None and tracer.count_io,
+            "pin": pin,
+            "threads_per_sim": threads_per_sim,
+        }
+        rvs = [None] * num_sims
+        for i, rv in completed.items():
+            rvs[i] = rv
+        dispatch_time = time.perf_counter()
+        with _span(tracer, "multi_sim") as multi_sim_span:
+            for i, _, rv, result in self._imap(
                 on_sim_end,
+                cpu_count,
                 rm_sim_dir,
-                write_log,
-                time_sim,
-                glm_path,
+                executor,
+                chunksize,
+                options,
+                worker_kwargs,
+                completed,
+                run_manifest,
+                order,
+                on_progress,
+            ):
+                rvs[i] = rv
+                if tracer is not None:
+                    _adopt_spans(result.spans, multi_sim_span)
+                    tracer.record_all(result.spans)
+                if (
+                    predictor is not None
+                    and result.success
+                    and not result.cached
+                ):
+                    predictor.observe(features[i], result.wall_time)
+        if order is not None:
+            self.schedule_report = {
+                "schedule": schedule,
+                "predicted_makespan": RuntimePredictor.makespan(
+                    [predicted[i] for i in order], cpu_count or 1
+                ),
+                "achieved_makespan": time.perf_counter() - dispatch_time,
+            }
+            if time_multi_sim:
+                print(
+                    "Predicted makespan "
+                    f"{self.schedule_report['predicted_makespan']:.1f} s, "
+                    "achieved "
+                    f"{self.schedule_report['achieved_makespan']:.1f} s"
+                )
+        if predictor is not None and predictor.path is not None:
+            predictor.save()
+        if time_multi_sim:
+            end_time = time.perf_counter()
+            total_duration = end_time - start_time
+            total_duration = datetime.timedelta(seconds=round(total_duration))
+            print(
+                f"Finished {num_sims - len(completed)} simulations in "
+                f"{str(total_duration)}"
             )
-            for glm_sim in self.glm_sims
-        ]
-        with multiprocessing.Pool(processes=cpu_count) as pool:
-            rvs = pool.starmap(self.run_single_sim, args)
+        return rvs
+
+    def iter_results(
+        self,
+        on_sim_end: Union[Callable, None] = None,
+        cpu_count: Union[int, None] = None,
+        chunksize: int = 1,
+        rm_sim_dir: bool = False,
+        write_log: bool = True,
+        time_sim: bool = False,
+        glm_path: Union[str, None] = "./glm",
+        executor: Union[str, SimExecutor] = "process",
+        cache: Union[SimCache, None] = None,
+        bc_store: Union["BcStore", None] = None,
+        workspace: Union[str, None] = None,
+        harvest: Union[List[str], None] = None,
+        harvest_nc_vars: Union[List[str], None] = None,
+        manifest: Union[str, bool, None] = None,
+        resume: bool = False,
+        limits: Union[RunLimits, None] = None,
+        retries: int = 0,
+        tracer: Union[Tracer, None] = None,
+        on_progress: Union[Callable, bool, None] = None,
+        pin: Union[str, None] = None,
+        threads_per_sim: Union[int, None] = 1,
+    ):
+        """Yield `(sim_name, rv)` in order of completion.
+
+        `chunksize` is the number of sims sent to a worker at a time.
+        Closing the generator stops the remaining sims. Other arguments
+        are as for `run()`.
+        """
+        if on_sim_end is None:
+            on_sim_end = no_op_callback
+        if isinstance(executor, SimExecutor):
+            cpu_count = executor.max_workers
+        else:
+            cpu_count = self._check_cpu_count(cpu_count)
+        run_manifest = self._get_manifest(manifest, resume)
+        completed = self._completed(run_manifest) if resume else {}
+        sim_names = getattr(self.glm_sims, "sim_names", None)
+        for i, rv in completed.items():
+            if sim_names is not None:
+                yield sim_names[i], rv
+            else:
+                yield self.glm_sims[i].sim_name, rv
+        options = _RunOptions(
+            write_log=write_log,
+            time_sim=time_sim,
+            glm_path=glm_path,
+            cache=cache,
+            bc_store=bc_store,
+            workspace=workspace,
+            harvest=harvest,
+            harvest_nc_vars=harvest_nc_vars,
+            limits=limits,
+        )
+        worker_kwargs = {
+            "retries": retries,
+            "trace": tracer is not None,
+            "trace_io": tracer is not None and tracer.count_io,
+            "pin": pin,
+            "threads_per_sim": threads_per_sim,
+        }
+        for _, sim_name, rv, result in self._imap(
+            on_sim_end,
+            cpu_count,
+            rm_sim_dir,
+            executor,
+            chunksize,
+            options,
+            worker_kwargs,
+            completed,
+            run_manifest,
+            on_progress=on_progress,
+        ):
+            if tracer is not None:
+                tracer.record_all(result.spans)
+            yield sim_name, rv
+
+    async def run_async(
+        self,
+        on_sim_end: Union[Callable, None] = None,
+        max_concurrency: Union[int, None] = None,
+        rm_sim_dir: bool = False,
+        write_log: bool = True,
+        time_sim: bool = True,
+        time_multi_sim: bool = True,
+        glm_path: Union[str, None] = "./glm",
+        cache: Union[SimCache, None] = None,
+        bc_store: Union["BcStore", None] = None,
+        limits: Union[RunLimits, None] = None,
+        retries: int = 0,
+    ):
+        """Run the simulations as GLM subprocesses of the running event loop.
+
+        At most `max_concurrency` run at once. `on_sim_end` may return an
+        awaitable. Other parameters are as for `run()`.
+        """
+        if on_sim_end is None:
+            on_sim_end = no_op_callback
+        if max_concurrency is None:
+            max_concurrency = self.cpu_count() or 1
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1. Got {max_concurrency}"
+            )
+        num_sims = len(self.glm_sims)
+        # Shared by the workers, so each member (e.g., of an Ensemble) is
+        # only created once a worker is free to run it
+        indices = iter(range(num_sims))
+        rvs = [None] * num_sims
+
+        async def _run_sim(glm_sim: GLMSim):
+            for attempt in range(1, retries + 2):
+                result = await glm_sim.run_async(
+                    write_log=write_log,
+                    quiet=True,
+                    time_sim=time_sim,
+                    glm_path=glm_path,
+                    cache=cache,
+                    bc_store=bc_store,
+                    limits=limits,
+                )
+                if result.success or result.status == "diverged":
+                    break
+            if result.success:
+                rv = on_sim_end(glm_sim)
+                if inspect.isawaitable(rv):
+                    rv = await rv
+            else:
+                rv = SimFailure(glm_sim.sim_name, result, attempt)
+            if rm_sim_dir:
+                glm_sim.rm_sim_dir()
+            return rv
+
+        async def _worker():
+            for i in indices:
+                rvs[i] = await _run_sim(self.glm_sims[i])
+
+        if time_multi_sim:
+            print(
+                f"Starting {num_sims} simulations with "
+                f"{max_concurrency} concurrent processes"
+            )
+            start_time = time.perf_counter()
+        await asyncio.gather(
+            *[_worker() for _ in range(min(max_concurrency, num_sims))]
+        )
         if time_multi_sim:
             end_time = time.perf_counter()
             total_duration = end_time - start_time
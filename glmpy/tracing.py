@@ -0,0 +1,284 @@
+import os
+import json
+import time
+import threading
+import contextlib
+import pandas as pd
+
+from typing import Union, List, Dict, Any
+
+
+class Span:
+    """A timed phase of a simulation run.
+
+    Attributes
+    ----------
+    name : str
+        Name of the phase, e.g., `"prepare_bcs"` or `"glm"`.
+    trace_id : str
+        Identifier shared by the spans of one run.
+    span_id : str
+        Identifier of the span.
+    parent_id : Union[str, None]
+        `span_id` of the enclosing span. `None` for the root span.
+    start_ns : int
+        Start time in nanoseconds since the epoch.
+    end_ns : Union[int, None]
+        End time in nanoseconds since the epoch.
+    pid : int
+        Process the span was recorded in.
+    thread_id : int
+        Thread the span was recorded in.
+    attributes : dict
+        Measurements and labels, e.g., `cpu_time`, `bytes_written`,
+        `files_created`, `max_rss` and `sim_name`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        span_id: str,
+        parent_id: Union[str, None] = None,
+        attributes: Union[Dict[str, Any], None] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.pid = os.getpid()
+        self.thread_id = threading.get_ident()
+        self.attributes = dict(attributes or {})
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        if self.end_ns is None:
+            return 0.0
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def __repr__(self):
+        return (
+            f"Span(name={self.name!r}, duration={self.duration:.6f}, "
+            f"attributes={self.attributes!r})"
+        )
+
+
+def _new_id(num_bytes: int) -> str:
+    return os.urandom(num_bytes).hex()
+
+
+def _snapshot(path: str) -> Dict[str, tuple]:
+    files = {}
+    for root, _, file_names in os.walk(path):
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            files[file_path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+class Tracer:
+    """Records spans for the phases of simulation runs.
+
+    Pass a `Tracer` to `Sim.run()` or `MultiSim.run()` to record a span for
+    each phase of a run: `validate`, `prepare_inputs`, `prepare_bcs`,
+    `prepare_aed_dbases`, `cache_lookup`, `glm`, `harvest` and, in a
+    `MultiSim`, `on_sim_end`. Each span has its duration and the CPU time
+    of the thread that recorded it (of GLM for the `glm` span). The `glm`
+    span also has the peak RSS of GLM. CPU time is per thread so that the
+    spans of sims run by concurrent worker threads do not count each
+    other's work.
+
+    With `count_io=True`, spans of phases that write to the sim directory
+    also have the number of files created and the bytes in files created
+    or modified. This lists the sim directory before and after each of
+    these phases, which is slow for sims with many output files.
+
+    Subclass and override `record()` to send spans elsewhere as they end.
+
+    Attributes
+    ----------
+    spans : List[Span]
+        The recorded spans.
+    count_io : bool
+        Whether to count the files written by each phase.
+
+    Examples
+    --------
+    >>> from glmpy.tracing import Tracer
+    >>> from glmpy.sim import MultiSim
+    >>> tracer = Tracer()
+    >>> multi_sim = MultiSim(glm_sims)
+    >>> rvs = multi_sim.run(tracer=tracer)
+    >>> tracer.summary()
+    >>> tracer.to_chrome_trace("trace.json")
+    """
+
+    def __init__(self, count_io: bool = False):
+        self.spans = []
+        self.count_io = count_io
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(
+        self, name: str, watch_dir: Union[str, None] = None, **attributes
+    ):
+        """Time the enclosed block as a span.
+
+        Spans started inside the block are its children. If `watch_dir`
+        is given and `count_io` is set, files created and modified in it
+        are counted.
+        """
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = Span(
+            name,
+            parent.trace_id if parent is not None else _new_id(16),
+            _new_id(8),
+            parent.span_id if parent is not None else None,
+            attributes,
+        )
+        before = None
+        if self.count_io and watch_dir is not None:
+            before = _snapshot(watch_dir)
+        cpu_start = time.thread_time()
+        start = time.perf_counter()
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            stack.pop()
+            span.end_ns = span.start_ns + int(
+                (time.perf_counter() - start) * 1e9
+            )
+            span.attributes.setdefault(
+                "cpu_time", time.thread_time() - cpu_start
+            )
+            if before is not None:
+                after = _snapshot(watch_dir)
+                changed = [
+                    path
+                    for path, stat in after.items()
+                    if before.get(path) != stat
+                ]
+                span.attributes["files_created"] = sum(
+                    path not in before for path in changed
+                )
+                span.attributes["bytes_written"] = sum(
+                    after[path][0] for path in changed
+                )
+            self.record(span)
+
+    def record(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def record_all(self, spans: List[Span]):
+        for span in spans:
+            self.record(span)
+
+    def trace(self, trace_id: str) -> List[Span]:
+        """Return the spans of one run."""
+        with self._lock:
+            return [span for span in self.spans if span.trace_id == trace_id]
+
+    def to_chrome_trace(self, path: Union[str, None] = None) -> dict:
+        """Export the spans in the Chrome trace event format.
+
+        The result can be opened in `chrome://tracing` or Perfetto. If
+        `path` is given, it is also written there as JSON.
+        """
+        events = []
+        for span in self.spans:
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": "glmpy",
+                    "ph": "X",
+                    "ts": span.start_ns / 1000,
+                    "dur": span.duration * 1e6,
+                    "pid": span.pid,
+                    "tid": span.thread_id,
+                    "args": span.attributes,
+                }
+            )
+        trace = {"traceEvents": events, "displayTimeUnit": "ms"}
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(trace, f)
+        return trace
+
+    def to_otel(self, path: Union[str, None] = None) -> List[dict]:
+        """Export the spans as OpenTelemetry-style span records.
+
+        If `path` is given, the records are also written there as JSON
+        lines.
+        """
+        records = []
+        for span in self.spans:
+            records.append(
+                {
+                    "name": span.name,
+                    "trace_id": span.trace_id,
+                    "span_id": span.span_id,
+                    "parent_span_id": span.parent_id,
+                    "start_time_unix_nano": span.start_ns,
+                    "end_time_unix_nano": span.end_ns,
+                    "attributes": span.attributes,
+                    "resource": {
+                        "service.name": "glmpy",
+                        "process.pid": span.pid,
+                    },
+                }
+            )
+        if path is not None:
+            with open(path, "w") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+        return records
+
+    def summary(self) -> pd.DataFrame:
+        """Aggregate the spans by phase."""
+        rows = [
+            {
+                "name": span.name,
+                "duration": span.duration,
+                "cpu_time": span.attributes.get("cpu_time"),
+                "bytes_written": span.attributes.get("bytes_written"),
+                "files_created": span.attributes.get("files_created"),
+                "max_rss": span.attributes.get("max_rss"),
+            }
+            for span in self.spans
+        ]
+        columns = [
+            "name",
+            "duration",
+            "cpu_time",
+            "bytes_written",
+            "files_created",
+            "max_rss",
+        ]
+        df = pd.DataFrame(rows, columns=columns)
+        summary = df.groupby("name", sort=False).agg(
+            count=("duration", "size"),
+            total_duration=("duration", "sum"),
+            mean_duration=("duration", "mean"),
+            cpu_time=("cpu_time", "sum"),
+            bytes_written=("bytes_written", "sum"),
+            files_created=("files_created", "sum"),
+            max_rss=("max_rss", "max"),
+        )
+        return summary.sort_values("total_duration", ascending=False)
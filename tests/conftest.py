@@ -0,0 +1,91 @@
+import sys
+import stat
+
+import pytest
+
+from glmpy.runner import GLMRunner, GLMBinaryRegistry
+
+# Stands in for GLM: reads the NML, reports progress and writes a lake CSV
+# whose values depend on the light extinction coefficient. FAKE_GLM_MODE
+# selects a failure mode, FAKE_GLM_FAIL_KW fails runs with that
+# coefficient, FAKE_GLM_CALLS counts the runs and FAKE_GLM_THREADS records
+# the OMP_NUM_THREADS of each run.
+FAKE_GLM = """\
+#!{python}
+import os
+import sys
+import time
+import f90nml
+
+if "--help" in sys.argv:
+    print("GLM Version 3.3.3")
+    sys.exit(0)
+calls = os.environ.get("FAKE_GLM_CALLS")
+if calls:
+    with open(calls, "a") as f:
+        f.write("run\\n")
+threads = os.environ.get("FAKE_GLM_THREADS")
+if threads:
+    with open(threads, "a") as f:
+        f.write(os.environ.get("OMP_NUM_THREADS", "unset") + "\\n")
+mode = os.environ.get("FAKE_GLM_MODE", "ok")
+nml_path = sys.argv[sys.argv.index("--nml") + 1]
+sim_dir = os.path.dirname(nml_path)
+nml = f90nml.read(nml_path)
+out_dir = os.path.join(sim_dir, nml["output"].get("out_dir", "."))
+os.makedirs(out_dir, exist_ok=True)
+kw = nml["light"]["kw"]
+fail_kw = os.environ.get("FAKE_GLM_FAIL_KW")
+if mode == "fail" or (fail_kw and float(fail_kw) == kw):
+    print("Fatal error")
+    sys.exit(3)
+if mode == "sleep":
+    time.sleep(60)
+if mode == "spin":
+    while time.process_time() < 60:
+        pass
+for day, pct in ((2444345, 50.0), (2444346, 100.0)):
+    sys.stdout.write(f"Running day {{day}}, {{pct:.2f}}% of days complete\\r")
+    sys.stdout.flush()
+with open(os.path.join(out_dir, "lake.csv"), "w") as f:
+    f.write("time,Kw\\n")
+    f.write(f"1980-04-15,{{kw}}\\n")
+    if mode == "nan":
+        f.write("1980-04-16,NaN\\n")
+with open(os.path.join(out_dir, "output.nc"), "w") as f:
+    f.write("nc")
+"""
+
+
+@pytest.fixture
+def fake_glm(tmp_path, monkeypatch):
+    """Path of a fake GLM executable selected by `GLMRunner.registry`."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    glm_path = bin_dir / "glm"
+    glm_path.write_text(FAKE_GLM.format(python=sys.executable))
+    glm_path.chmod(glm_path.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setattr(
+        GLMRunner,
+        "registry",
+        GLMBinaryRegistry(
+            search_dirs=[str(bin_dir)], cache_dir=str(tmp_path / "cache")
+        ),
+    )
+    monkeypatch.setenv("FAKE_GLM_CALLS", str(tmp_path / "calls.txt"))
+    monkeypatch.delenv("FAKE_GLM_MODE", raising=False)
+    monkeypatch.delenv("FAKE_GLM_FAIL_KW", raising=False)
+    monkeypatch.delenv("FAKE_GLM_THREADS", raising=False)
+    return str(glm_path)
+
+
+@pytest.fixture
+def glm_calls(tmp_path):
+    """Return the number of times the fake GLM has run."""
+    def _count():
+        path = tmp_path / "calls.txt"
+        if not path.exists():
+            return 0
+        return len(path.read_text().splitlines())
+    return _count
+
@@ -0,0 +1,55 @@
+import os
+
+from glmpy.cache import BcStore
+from glmpy.example_sims import SparklingSim
+from glmpy.sim import MultiSim
+
+
+def met_path(sim) -> str:
+    return os.path.join(sim.get_sim_dir(), "bcs", "nldas_driver.csv")
+
+
+def test_sims_share_one_hardlinked_csv(fake_glm, tmp_path):
+    bc_store = BcStore(str(tmp_path / "store"))
+    sims = [
+        SparklingSim(sim_name=f"sim_{i}", outputs_dir=str(tmp_path))
+        for i in range(3)
+    ]
+    MultiSim(sims).run(
+        glm_path=fake_glm,
+        bc_store=bc_store,
+        executor="thread",
+        cpu_count=1,
+        time_sim=False,
+        time_multi_sim=False,
+    )
+    stored = os.listdir(bc_store.store_dir)
+    assert len(stored) == 1
+    store_stat = os.stat(os.path.join(bc_store.store_dir, stored[0]))
+    assert store_stat.st_nlink == 1 + len(sims)
+    for sim in sims:
+        assert os.path.samestat(os.stat(met_path(sim)), store_stat)
+    # The sims do not keep the store
+    assert all(getattr(sim, "bc_store", None) is None for sim in sims)
+
+
+def test_changed_bcs_get_their_own_csv(tmp_path):
+    bc_store = BcStore(str(tmp_path / "store"))
+    sim = SparklingSim()
+    met = sim.bcs["nldas_driver"]
+    changed = met.copy()
+    changed.iloc[0, 1] += 1
+    assert bc_store.path(met) == bc_store.path(met.copy())
+    assert bc_store.path(changed) != bc_store.path(met)
+    assert len(os.listdir(bc_store.store_dir)) == 2
+
+
+def test_link_replaces_existing_file(tmp_path):
+    bc_store = BcStore(str(tmp_path / "store"))
+    met = SparklingSim().bcs["nldas_driver"]
+    dst = str(tmp_path / "met.csv")
+    with open(dst, "w") as f:
+        f.write("stale")
+    bc_store.link(met, dst)
+    with open(dst) as f, open(bc_store.path(met)) as g:
+        assert f.read() == g.read()
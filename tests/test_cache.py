@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from glmpy.example_sims import SparklingSim
+from glmpy.cache import SimCache
+
+
+def read_lake_kw(sim) -> str:
+    with open(os.path.join(sim.get_out_dir(), "lake.csv")) as f:
+        return f.read().splitlines()[-1].split(",")[1]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SimCache(str(tmp_path / "cache"))
+
+
+def run(sim, fake_glm, cache):
+    return sim.run(glm_path=fake_glm, quiet=True, cache=cache)
+
+
+def test_cache_miss_then_hit(fake_glm, glm_calls, cache, tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path / "a"))
+    assert not run(sim, fake_glm, cache).cached
+    assert glm_calls() == 1
+    other = SparklingSim(outputs_dir=str(tmp_path / "b"))
+    result = run(other, fake_glm, cache)
+    assert result.cached and result.success
+    assert result.glm_version == "3.3.3"
+    assert glm_calls() == 1
+    assert read_lake_kw(other) == "0.331"
+
+
+def test_cache_key_ignores_sim_name(fake_glm, glm_calls, cache, tmp_path):
+    run(SparklingSim(outputs_dir=str(tmp_path)), fake_glm, cache)
+    renamed = SparklingSim(sim_name="renamed", outputs_dir=str(tmp_path))
+    assert run(renamed, fake_glm, cache).cached
+    assert glm_calls() == 1
+
+
+def test_cache_misses_on_changed_param(fake_glm, glm_calls, cache, tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    run(sim, fake_glm, cache)
+    sim.set_param_value("glm", "light", "Kw", 0.5)
+    assert not run(sim, fake_glm, cache).cached
+    assert glm_calls() == 2
+    assert read_lake_kw(sim) == "0.5"
+
+
+def test_cache_misses_on_changed_bcs(fake_glm, glm_calls, cache, tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    run(sim, fake_glm, cache)
+    met = sim.bcs["nldas_driver"].copy()
+    met.iloc[0, 1] += 1
+    sim.bcs["nldas_driver"] = met
+    assert not run(sim, fake_glm, cache).cached
+    assert glm_calls() == 2
+
+
+def test_cache_does_not_store_failed_runs(
+    fake_glm, cache, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("FAKE_GLM_MODE", "fail")
+    run(SparklingSim(outputs_dir=str(tmp_path)), fake_glm, cache)
+    assert cache.size() == 0
+
+
+def test_cache_evicts_least_recently_used(fake_glm, cache, tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    for kw in (0.3, 0.4):
+        sim.set_param_value("glm", "light", "Kw", kw)
+        run(sim, fake_glm, cache)
+    assert len(cache._entries()) == 2
+    cache.evict(max_bytes=cache.size() - 1)
+    assert len(cache._entries()) == 1
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_linked_restore_into_sim_dir_copies(fake_glm, tmp_path):
+    cache = SimCache(str(tmp_path / "cache"), link=True)
+    sim = SparklingSim(outputs_dir=str(tmp_path / "outputs"))
+    sim.set_param_value("glm", "output", "out_dir", ".")
+    run(sim, fake_glm, cache)
+    assert run(sim, fake_glm, cache).cached
+    assert not os.path.islink(sim.get_sim_dir())
+    assert os.path.isfile(os.path.join(sim.get_sim_dir(), "glm3.nml"))
+    assert read_lake_kw(sim) == "0.331"
+
+
+def test_linked_restore_links_out_dir(fake_glm, tmp_path):
+    cache = SimCache(str(tmp_path / "cache"), link=True)
+    sim = SparklingSim(outputs_dir=str(tmp_path / "outputs"))
+    run(sim, fake_glm, cache)
+    assert run(sim, fake_glm, cache).cached
+    assert os.path.islink(sim.get_out_dir())
+    assert read_lake_kw(sim) == "0.331"
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from glmpy.calibrate import (
+    CMAES,
+    Calibration,
+    DifferentialEvolution,
+    LakeColumn,
+    ParameterSpace,
+    SeriesObjective,
+    WeightedObjective,
+    kge_loss,
+    mae,
+    nse_loss,
+    rmse,
+)
+from glmpy.example_sims import SparklingSim
+
+PARAMS = ["glm.light.Kw", "glm.glm_setup.max_layers"]
+BOUNDS = {"glm.light.Kw": (0.2, 0.6), "glm.glm_setup.max_layers": (100, 200)}
+RUN_KWARGS = {"executor": "thread", "cpu_count": 1}
+# The fake GLM writes Kw to the lake CSV on the start date
+OBSERVED_KW = pd.Series([0.45], index=pd.to_datetime(["1980-04-15"]))
+
+
+def sphere(x):
+    return np.sum((x - 0.3) ** 2, axis=1)
+
+
+def test_parameter_space_maps_the_unit_hypercube():
+    sim = SparklingSim()
+    space = ParameterSpace(sim, PARAMS, bounds={"glm.light.Kw": (0.2, 0.6)})
+    assert space.dim == 2
+    assert space.bounds["glm.glm_setup.max_layers"] == (0.0, 750.0)
+    df = space.to_frame(np.array([[0.5, 0.5], [2.0, 0.001]]))
+    assert df["glm.light.Kw"].tolist() == pytest.approx([0.4, 0.6])
+    assert df["glm.glm_setup.max_layers"].tolist() == [375, 1]
+    np.testing.assert_allclose(
+        space.to_unit([0.331, 500]), [(0.331 - 0.2) / 0.4, 500 / 750]
+    )
+    np.testing.assert_allclose(
+        space.from_unit(space.initial(sim)), [0.331, 500]
+    )
+    with pytest.raises(ValueError):
+        ParameterSpace(sim, [])
+
+
+def test_metrics():
+    observed = np.array([1.0, 2.0, 3.0])
+    for metric in (rmse, mae, nse_loss, kge_loss):
+        assert metric(observed, observed) == pytest.approx(0)
+    assert rmse(observed, observed + 2) == pytest.approx(2)
+    assert mae(observed, observed - 1) == pytest.approx(1)
+    assert nse_loss(observed, np.full(3, 2.0)) == pytest.approx(1)
+
+
+def test_series_objective_compares_shared_times():
+    observed = pd.Series([1.0, 2.0, np.nan], index=[0, 1, 2])
+    objective = SeriesObjective(
+        observed, lambda sim: pd.Series([2.0, 4.0, 5.0], index=[1, 2, 3])
+    )
+    assert objective(None) == 0
+    objective.read = lambda sim: pd.Series([1.0], index=[5])
+    assert objective(None) == np.inf
+    assert WeightedObjective([(objective, 2.0)])(None) == np.inf
+    with pytest.raises(ValueError, match="metric"):
+        SeriesObjective(observed, LakeColumn("Kw"), "r2")
+
+
+@pytest.mark.parametrize(
+    "optimizer",
+    [
+        DifferentialEvolution(2, pop_size=20, seed=0),
+        CMAES(2, pop_size=10, seed=0),
+    ],
+)
+def test_optimizers_minimize_a_quadratic(optimizer):
+    for _ in range(60):
+        x = optimizer.ask()
+        assert ((x >= 0) & (x <= 1)).all()
+        optimizer.tell(x, sphere(x))
+    np.testing.assert_allclose(optimizer.best_x, [0.3, 0.3], atol=0.02)
+
+
+def make_calibration(tmp_path, **kwargs):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    return Calibration(
+        sim,
+        ParameterSpace(sim, PARAMS, BOUNDS),
+        SeriesObjective(OBSERVED_KW, LakeColumn("Kw"), "mae"),
+        pop_size=4,
+        seed=0,
+        **kwargs,
+    )
+
+
+def test_calibration_fits_the_observations(fake_glm, tmp_path):
+    calibration = make_calibration(tmp_path, optimizer="cmaes")
+    progress = []
+    best = calibration.run(
+        generations=8,
+        glm_path=fake_glm,
+        on_generation=lambda *args: progress.append(args),
+        **RUN_KWARGS,
+    )
+    assert [generation for generation, _ in progress] == list(range(1, 9))
+    best_fs = [best_f for _, best_f in progress]
+    assert best_fs == sorted(best_fs, reverse=True)
+    assert best_fs[-1] == calibration.history["objective"].min()
+    assert len(calibration.history) == 8 * 4
+    assert abs(best["glm.light.Kw"] - 0.45) == pytest.approx(best_fs[-1])
+    assert isinstance(best["glm.glm_setup.max_layers"], int)
+
+
+def test_calibration_stops_at_the_target(fake_glm, tmp_path):
+    calibration = make_calibration(tmp_path)
+    calibration.run(
+        generations=50, target=1.0, glm_path=fake_glm, **RUN_KWARGS
+    )
+    assert calibration.generation == 1
+
+
+def test_calibration_resumes_from_its_checkpoint(
+    fake_glm, glm_calls, tmp_path
+):
+    checkpoint = str(tmp_path / "calibration.pkl")
+    make_calibration(tmp_path, checkpoint=checkpoint).run(
+        generations=2, glm_path=fake_glm, **RUN_KWARGS
+    )
+    assert glm_calls() == 8
+    calibration = make_calibration(tmp_path, checkpoint=checkpoint)
+    calibration.run(
+        generations=3, resume=True, glm_path=fake_glm, **RUN_KWARGS
+    )
+    assert glm_calls() == 12
+    generations = calibration.history["generation"].tolist()
+    assert generations == [0] * 4 + [1] * 4 + [2] * 4
+
+
+def test_checkpoint_must_match_the_parameters(tmp_path):
+    checkpoint = str(tmp_path / "calibration.pkl")
+    make_calibration(tmp_path).save(checkpoint)
+    sim = SparklingSim()
+    calibration = Calibration(
+        sim, ParameterSpace(sim, PARAMS[:1]), len, checkpoint=checkpoint
+    )
+    with pytest.raises(ValueError, match="checkpoint"):
+        calibration.load()
+
+
+def test_failed_generations_score_inf(fake_glm, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GLM_MODE", "fail")
+    calibration = make_calibration(tmp_path)
+    with pytest.warns(UserWarning, match="Every sim of generation 0 failed"):
+        calibration.run(generations=1, glm_path=fake_glm, **RUN_KWARGS)
+    assert np.isinf(calibration.history["objective"]).all()
+    assert calibration.best_params == {}
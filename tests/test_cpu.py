@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+from glmpy import executor
+from glmpy.example_sims import SparklingSim
+from glmpy.executor import available_cpu_count
+from glmpy.sim import MultiSim
+
+
+@pytest.fixture
+def sys_files(monkeypatch):
+    """Replace the files read from /proc and /sys with a dict."""
+    files = {}
+    monkeypatch.setattr(executor, "_read_text", files.get)
+    monkeypatch.setattr(executor, "_CPU_GROUPS", {})
+    monkeypatch.setattr(
+        os, "sched_getaffinity", lambda pid: set(range(8)), raising=False
+    )
+    return files
+
+
+def test_parse_cpu_list():
+    assert executor._parse_cpu_list("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert executor._parse_cpu_list("") == []
+
+
+def test_cgroup_v2_quota(sys_files):
+    sys_files["/proc/self/cgroup"] = "0::/user.slice/app"
+    sys_files["/sys/fs/cgroup/user.slice/app/cpu.max"] = "150000 100000"
+    assert executor._cgroup_cpu_quota() == 1.5
+    assert available_cpu_count() == 2
+    sys_files["/sys/fs/cgroup/user.slice/app/cpu.max"] = "max 100000"
+    assert executor._cgroup_cpu_quota() is None
+    assert available_cpu_count() == 8
+
+
+def test_cgroup_v2_quota_at_the_root(sys_files):
+    # Inside a container the cgroup path is not visible under /sys
+    sys_files["/proc/self/cgroup"] = "0::/docker/abc"
+    sys_files["/sys/fs/cgroup/cpu.max"] = "300000 100000"
+    assert available_cpu_count() == 3
+
+
+def test_cgroup_v1_quota(sys_files):
+    sys_files["/proc/self/cgroup"] = (
+        "12:memory:/app\n4:cpu,cpuacct:/app\n1:name=systemd:/app"
+    )
+    sys_files["/sys/fs/cgroup/cpu,cpuacct/app/cpu.cfs_quota_us"] = "50000"
+    sys_files["/sys/fs/cgroup/cpu,cpuacct/app/cpu.cfs_period_us"] = "100000"
+    assert executor._cgroup_cpu_quota() == 0.5
+    assert available_cpu_count() == 1
+    sys_files["/sys/fs/cgroup/cpu,cpuacct/app/cpu.cfs_quota_us"] = "-1"
+    assert executor._cgroup_cpu_quota() is None
+
+
+def test_no_cgroup(sys_files):
+    assert executor._cgroup_cpu_quota() is None
+    assert available_cpu_count() == 8
+
+
+def test_cpus_are_grouped_by_core_and_numa_node(sys_files):
+    # Two cores with two hyperthreads each: (0, 4), (1, 5), ...
+    for cpu in range(8):
+        topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        sys_files[f"{topology}/physical_package_id"] = "0"
+        sys_files[f"{topology}/core_id"] = str(cpu % 4)
+    assert executor._cpu_groups("core") == [[0, 4], [1, 5], [2, 6], [3, 7]]
+    assert executor._cpu_groups("numa") == [list(range(8))]
+
+
+def test_workers_are_spread_over_the_groups(sys_files, monkeypatch):
+    monkeypatch.setitem(executor._CPU_GROUPS, "core", [[0, 4], [1, 5]])
+    monkeypatch.setattr(executor._WORKER_STATE, "slot", 3, raising=False)
+    assert executor._worker_affinity("core") == [1, 5]
+    with pytest.raises(ValueError, match="pin"):
+        executor._worker_affinity("socket")
+
+
+def test_thread_env_caps_threads():
+    env = executor._thread_env(2)
+    assert env["OMP_NUM_THREADS"] == "2"
+    assert env["OPENBLAS_NUM_THREADS"] == "2"
+    assert env["PATH"] == os.environ["PATH"]
+
+
+@pytest.mark.parametrize("threads_per_sim, expected", [(2, "2"), (None, "3")])
+def test_threads_per_sim_sets_the_glm_environment(
+    fake_glm, tmp_path, monkeypatch, threads_per_sim, expected
+):
+    threads = tmp_path / "threads.txt"
+    monkeypatch.setenv("FAKE_GLM_THREADS", str(threads))
+    monkeypatch.setenv("OMP_NUM_THREADS", "3")
+    MultiSim([SparklingSim(outputs_dir=str(tmp_path))]).run(
+        glm_path=fake_glm,
+        executor="thread",
+        cpu_count=1,
+        pin="core",
+        threads_per_sim=threads_per_sim,
+        time_sim=False,
+        time_multi_sim=False,
+    )
+    assert threads.read_text().split() == [expected]
@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from glmpy.ensemble import Ensemble, param_bounds
+from glmpy.example_sims import SparklingSim
+
+PARAMS = pd.DataFrame(
+    {
+        "glm.light.Kw": [0.3, 0.4, np.nan],
+        "glm.glm_setup.max_layers": [400, np.nan, 600],
+    }
+)
+
+
+def kw(sim) -> float:
+    return sim.get_param_value("glm", "light", "Kw")
+
+
+def lake_kw(sim) -> str:
+    with open(os.path.join(sim.get_out_dir(), "lake.csv")) as f:
+        return f.read().splitlines()[-1].split(",")[1]
+
+
+def test_materialize_applies_row_and_leaves_base_unchanged():
+    base = SparklingSim()
+    ensemble = Ensemble(base, PARAMS)
+    sim = ensemble.materialize(0)
+    assert sim.sim_name == "sparkling_0"
+    assert kw(sim) == 0.3
+    max_layers = sim.get_param_value("glm", "glm_setup", "max_layers")
+    assert max_layers == 400 and isinstance(max_layers, int)
+    assert kw(base) == 0.331
+    # Missing values keep the base value
+    assert kw(ensemble.materialize(2)) == 0.331
+
+
+def test_unknown_param_path_raises():
+    with pytest.raises(KeyError):
+        Ensemble(SparklingSim(), pd.DataFrame({"glm.light.nope": [1.0]}))
+
+
+def test_from_grid_has_every_combination():
+    ensemble = Ensemble.from_grid(
+        SparklingSim(),
+        {"glm.light.Kw": [0.3, 0.5], "glm.mixing.coef_mix_hyp": [0.1, 0.2]},
+    )
+    assert len(ensemble) == 4
+    combos = {
+        (kw(sim), sim.get_param_value("glm", "mixing", "coef_mix_hyp"))
+        for sim in ensemble
+    }
+    assert combos == {(0.3, 0.1), (0.3, 0.2), (0.5, 0.1), (0.5, 0.2)}
+
+
+def test_subset_by_names_and_mask():
+    ensemble = Ensemble(SparklingSim(), PARAMS)
+    by_name = ensemble.subset(["sparkling_2", "sparkling_0"])
+    assert by_name.sim_names == ["sparkling_2", "sparkling_0"]
+    assert kw(by_name[1]) == 0.3
+    by_mask = ensemble.subset(ensemble.params["glm.light.Kw"] > 0.35)
+    assert by_mask.sim_names == ["sparkling_1"]
+
+
+def test_run_in_batches_keeps_member_order(fake_glm, tmp_path):
+    params = pd.DataFrame({"glm.light.Kw": [0.1, 0.2, 0.3, 0.4, 0.5]})
+    ensemble = Ensemble(SparklingSim(outputs_dir=str(tmp_path)), params)
+    rvs = ensemble.run(
+        on_sim_end=lake_kw,
+        batch_size=2,
+        glm_path=fake_glm,
+        executor="thread",
+        cpu_count=1,
+        time_sim=False,
+        time_multi_sim=False,
+    )
+    assert rvs == ["0.1", "0.2", "0.3", "0.4", "0.5"]
+    frame = ensemble.to_frame(rvs)
+    assert list(frame["result"]) == rvs
+
+
+def test_run_in_worker_processes(fake_glm, tmp_path):
+    params = pd.DataFrame({"glm.light.Kw": [0.1, 0.2, 0.3]})
+    ensemble = Ensemble(SparklingSim(outputs_dir=str(tmp_path)), params)
+    rvs = ensemble.run(
+        on_sim_end=lake_kw,
+        glm_path=fake_glm,
+        executor="process",
+        cpu_count=1,
+        time_sim=False,
+        time_multi_sim=False,
+    )
+    assert rvs == ["0.1", "0.2", "0.3"]
+
+
+def test_param_bounds_use_limits_then_the_value():
+    sim = SparklingSim()
+    # Kw has no limits, so both bounds are taken from its value of 0.331
+    assert param_bounds(sim, "glm.light.Kw", rel_range=1.0) == (0.0, 0.662)
+    low, high = param_bounds(sim, "glm.light.Kw")
+    assert (low, high) == pytest.approx((0.1655, 0.4965))
+    # coef_mix_conv (0.2) has a lower limit of 0
+    low, high = param_bounds(sim, "glm.mixing.coef_mix_conv", rel_range=0.1)
+    assert (low, high) == pytest.approx((0.0, 0.22))
+    with pytest.raises(KeyError):
+        param_bounds(sim, "glm.light.not_a_param")
+    with pytest.raises(ValueError, match="numeric"):
+        param_bounds(sim, "glm.glm_setup.sim_name")
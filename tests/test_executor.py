@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from glmpy.executor import SimExecutor, _SharedSource
+from glmpy.example_sims import SparklingSim
+from glmpy.sim import MultiSim
+
+
+def worker_pid(task):
+    return os.getpid()
+
+
+def pid_and_kw(sim):
+    with open(os.path.join(sim.get_out_dir(), "lake.csv")) as f:
+        return os.getpid(), f.read().splitlines()[-1].split(",")[1]
+
+
+def make_sims(outputs_dir, kws=(0.3, 0.4)):
+    sims = []
+    for i, kw in enumerate(kws):
+        sim = SparklingSim(sim_name=f"sim_{i}", outputs_dir=str(outputs_dir))
+        sim.set_param_value("glm", "light", "Kw", kw)
+        sims.append(sim)
+    return sims
+
+
+def test_unknown_kind_raises():
+    with pytest.raises(ValueError, match="executor"):
+        SimExecutor(kind="cluster")
+
+
+def test_imap_unordered_requires_start():
+    with pytest.raises(RuntimeError):
+        list(SimExecutor(kind="thread").imap_unordered(worker_pid, [1]))
+
+
+def test_workers_are_reused_until_shutdown():
+    executor = SimExecutor(max_workers=1)
+    with executor:
+        assert executor.running
+        root_dir = executor._root_dir
+        first = set(executor.imap_unordered(worker_pid, range(3)))
+        second = set(executor.imap_unordered(worker_pid, range(3)))
+        assert first == second
+        assert os.getpid() not in first
+    assert not executor.running
+    assert not os.path.exists(root_dir)
+
+
+def test_start_is_idempotent():
+    with SimExecutor(kind="thread", max_workers=1) as executor:
+        pool = executor._pool
+        assert executor.start()._pool is pool
+
+
+def test_worker_errors_are_raised():
+    with SimExecutor(kind="thread", max_workers=1) as executor:
+        with pytest.raises(ZeroDivisionError):
+            list(executor.imap_unordered(lambda x: 1 / x, [1, 0]))
+
+
+def test_share_pickles_sources_for_processes():
+    with SimExecutor(max_workers=1) as executor:
+        handle = executor.share({"a": 1})
+        assert isinstance(handle, _SharedSource)
+        assert handle.load() == {"a": 1}
+        assert handle.load() is handle.load()
+        executor.unshare(handle)
+        assert not os.path.exists(handle.path)
+
+
+def test_share_passes_sources_to_threads():
+    source = {"a": 1}
+    with SimExecutor(kind="thread", max_workers=1) as executor:
+        assert executor.share(source) is source
+        executor.unshare(source)
+
+
+def test_multi_sim_runs_reuse_the_executor(fake_glm, tmp_path):
+    with SimExecutor(max_workers=1) as executor:
+        runs = [
+            MultiSim(make_sims(tmp_path / str(i))).run(
+                on_sim_end=pid_and_kw,
+                glm_path=fake_glm,
+                executor=executor,
+                workspace="worker",
+                time_sim=False,
+                time_multi_sim=False,
+            )
+            for i in range(2)
+        ]
+    assert [kw for _, kw in runs[0]] == ["0.3", "0.4"]
+    assert {pid for run in runs for pid, _ in run} == {runs[0][0][0]}
+    assert os.path.isfile(tmp_path / "1" / "sim_1" / "output" / "lake.csv")
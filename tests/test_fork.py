@@ -0,0 +1,112 @@
+import pickle
+import warnings
+from importlib import resources
+
+import pandas as pd
+
+from glmpy.ensemble import Ensemble
+from glmpy.example_sims import SparklingSim
+from glmpy.sensitivity import LocalSensitivity
+from glmpy.sim import GLMSim
+
+
+def test_fork_set_param_value_does_not_change_base():
+    base = SparklingSim()
+    forked = base.fork()
+    forked.set_param_value("glm", "light", "Kw", 9.9)
+    assert base.get_param_value("glm", "light", "Kw") == 0.331
+    assert forked.get_param_value("glm", "light", "Kw") == 9.9
+
+
+def test_fork_shares_blocks_until_accessed():
+    base = SparklingSim()
+    forked = base.fork()
+    assert forked.nml["glm"].blocks.peek("light") is (
+        base.nml["glm"].blocks.peek("light")
+    )
+    assert forked.nml["glm"].blocks["light"] is not (
+        base.nml["glm"].blocks.peek("light")
+    )
+
+
+def test_fork_strict_setter_does_not_change_base():
+    base = SparklingSim()
+    forked = base.fork()
+    forked.nml["glm"].strict = False
+    for _, block in base.nml["glm"].blocks.peek_items():
+        if block is not None:
+            assert block.strict
+    assert not forked.nml["glm"].blocks.peek("glm_setup").strict
+
+
+def test_fork_values_does_not_change_base():
+    base = SparklingSim()
+    forked = base.fork()
+    for block in forked.nml["glm"].blocks.values():
+        if block is not None and "Kw" in block.params:
+            block.params["Kw"].value = 9.9
+    assert base.get_param_value("glm", "light", "Kw") == 0.331
+    assert forked.get_param_value("glm", "light", "Kw") == 9.9
+
+
+def test_fork_items_does_not_change_base():
+    base = SparklingSim()
+    forked = base.fork()
+    for block_name, block in forked.nml["glm"].blocks.items():
+        if block_name == "light":
+            block.params["Kw"].value = 9.9
+    assert base.get_param_value("glm", "light", "Kw") == 0.331
+    assert forked.get_param_value("glm", "light", "Kw") == 9.9
+
+
+def test_fork_iter_does_not_change_base():
+    base = SparklingSim()
+    forked = base.fork()
+    blocks = forked.nml["glm"].blocks
+    for block_name in blocks:
+        if block_name == "light":
+            blocks[block_name].params["Kw"].value = 9.9
+    assert base.get_param_value("glm", "light", "Kw") == 0.331
+
+
+def test_base_changes_after_fork_do_not_reach_fork():
+    base = SparklingSim()
+    forked = base.fork()
+    base.set_param_value("glm", "light", "Kw", 9.9)
+    assert forked.get_param_value("glm", "light", "Kw") == 0.331
+
+
+def test_fork_pickles():
+    forked = SparklingSim().fork()
+    forked.set_param_value("glm", "light", "Kw", 9.9)
+    unpickled = pickle.loads(pickle.dumps(forked))
+    assert unpickled.get_param_value("glm", "light", "Kw") == 9.9
+
+
+def _legacy_sim():
+    path = resources.files("glmpy.data.example_sims").joinpath(
+        "sparkling_sim.glmpy"
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return GLMSim.from_file(str(path))
+
+
+def test_fork_of_legacy_pickled_sim():
+    base = _legacy_sim()
+    forked = base.fork()
+    kw = base.get_param_value("glm", "light", "Kw")
+    forked.set_param_value("glm", "light", "Kw", kw + 1)
+    assert base.get_param_value("glm", "light", "Kw") == kw
+    assert forked.aed_dbase == {}
+
+
+def test_ensemble_and_sensitivity_of_legacy_pickled_sim():
+    base = _legacy_sim()
+    ensemble = Ensemble(base, pd.DataFrame({"glm.light.Kw": [0.3, 0.4]}))
+    assert ensemble.materialize(1).get_param_value("glm", "light", "Kw") == 0.4
+    local = LocalSensitivity(base)
+    local.prepare_sims("glm", "light", "Kw", [0.3, 0.4], 1.0, len)
+    assert [
+        sim.get_param_value("glm", "light", "Kw") for sim in local._si_sims
+    ] == [0.3, 0.4]
@@ -0,0 +1,25 @@
+import pytest
+
+from glmpy.example_sims import SparklingSim
+from glmpy.sensitivity import MorrisScreening
+
+PARAMS = ["glm.light.Kw", "glm.mixing.coef_mix_hyp"]
+UNIT_BOUNDS = {path: (0.0, 1.0) for path in PARAMS}
+
+
+def test_morris_screening_of_linear_function():
+    morris = MorrisScreening(SparklingSim(), PARAMS, bounds=UNIT_BOUNDS)
+    trajectories = morris.sample(num_trajectories=8, seed=1)
+    assert trajectories.shape == (8, len(PARAMS) + 1, len(PARAMS))
+    y = 2 * trajectories[..., 0]
+    screening = morris.analyze(trajectories, y)
+    assert screening.loc[PARAMS[0], "mu_star"] == pytest.approx(2)
+    assert screening.loc[PARAMS[0], "sigma"] == pytest.approx(0)
+    assert screening.loc[PARAMS[1], "mu_star"] == pytest.approx(0)
+    assert screening.loc[PARAMS[0], "rank"] == 1
+
+
+def test_morris_starts_without_trajectories():
+    morris = MorrisScreening(SparklingSim(), PARAMS, bounds=UNIT_BOUNDS)
+    assert morris.trajectories is None
+    assert "trajectories" in vars(morris)
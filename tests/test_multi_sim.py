@@ -0,0 +1,210 @@
+import os
+import asyncio
+
+import pandas as pd
+import pytest
+
+from glmpy.ensemble import Ensemble
+from glmpy.example_sims import SparklingSim
+from glmpy.manifest import RuntimePredictor
+from glmpy.sim import MultiSim, RunLimits, SimFailure
+
+RUN_KWARGS = {
+    "executor": "thread",
+    "cpu_count": 1,
+    "time_sim": False,
+    "time_multi_sim": False,
+}
+
+
+def make_sims(outputs_dir, kws=(0.3, 0.4, 0.5)):
+    sims = []
+    for i, kw in enumerate(kws):
+        sim = SparklingSim(sim_name=f"sim_{i}", outputs_dir=str(outputs_dir))
+        sim.set_param_value("glm", "light", "Kw", kw)
+        sims.append(sim)
+    return sims
+
+
+def lake_kw(sim) -> str:
+    with open(os.path.join(sim.get_out_dir(), "lake.csv")) as f:
+        return f.read().splitlines()[-1].split(",")[1]
+
+
+def test_run_writes_no_manifest_by_default(fake_glm, tmp_path):
+    rvs = MultiSim(make_sims(tmp_path)).run(
+        on_sim_end=lake_kw, glm_path=fake_glm, **RUN_KWARGS
+    )
+    assert rvs == ["0.3", "0.4", "0.5"]
+    assert not os.path.exists(tmp_path / "multi_sim_manifest.jsonl")
+
+
+def test_resume_skips_completed_sims(fake_glm, glm_calls, tmp_path):
+    rvs = MultiSim(make_sims(tmp_path)).run(
+        on_sim_end=lake_kw, glm_path=fake_glm, resume=True, **RUN_KWARGS
+    )
+    assert os.path.isfile(tmp_path / "multi_sim_manifest.jsonl")
+    assert glm_calls() == 3
+    resumed = MultiSim(make_sims(tmp_path)).run(
+        on_sim_end=lake_kw, glm_path=fake_glm, resume=True, **RUN_KWARGS
+    )
+    assert resumed == rvs
+    assert glm_calls() == 3
+
+
+def test_resume_reruns_changed_and_failed_sims(
+    fake_glm, glm_calls, tmp_path, monkeypatch
+):
+    manifest = str(tmp_path / "runs.jsonl")
+    monkeypatch.setenv("FAKE_GLM_FAIL_KW", "0.5")
+    rvs = MultiSim(make_sims(tmp_path)).run(
+        on_sim_end=lake_kw, glm_path=fake_glm, manifest=manifest, **RUN_KWARGS
+    )
+    assert rvs[2].status == "failed"
+    monkeypatch.delenv("FAKE_GLM_FAIL_KW")
+    rvs = MultiSim(make_sims(tmp_path, (0.3, 0.45, 0.5))).run(
+        on_sim_end=lake_kw,
+        glm_path=fake_glm,
+        manifest=manifest,
+        resume=True,
+        **RUN_KWARGS,
+    )
+    assert rvs == ["0.3", "0.45", "0.5"]
+    assert glm_calls() == 5
+
+
+def test_run_async_creates_ensemble_members_as_they_start(
+    fake_glm, tmp_path
+):
+    materialized = []
+
+    class CountingEnsemble(Ensemble):
+        def materialize(self, i):
+            materialized.append(i)
+            return super().materialize(i)
+
+    ensemble = CountingEnsemble(
+        SparklingSim(outputs_dir=str(tmp_path)),
+        pd.DataFrame({"glm.light.Kw": [0.3, 0.4, 0.5, 0.6]}),
+    )
+
+    finished = []
+
+    def on_sim_end(sim):
+        # Members created but not yet finished, including this one
+        in_flight = len(materialized) - len(finished)
+        finished.append(sim.sim_name)
+        return in_flight, lake_kw(sim)
+
+    rvs = asyncio.run(
+        MultiSim(ensemble).run_async(
+            on_sim_end=on_sim_end,
+            max_concurrency=2,
+            glm_path=fake_glm,
+            time_sim=False,
+            time_multi_sim=False,
+        )
+    )
+    assert [kw for _, kw in rvs] == ["0.3", "0.4", "0.5", "0.6"]
+    assert max(in_flight for in_flight, _ in rvs) <= 2
+    assert sorted(materialized) == [0, 1, 2, 3]
+
+
+def test_failed_sims_are_retried_then_returned_as_failures(
+    fake_glm, glm_calls, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("FAKE_GLM_FAIL_KW", "0.4")
+    rvs = MultiSim(make_sims(tmp_path)).run(
+        on_sim_end=lake_kw, glm_path=fake_glm, retries=2, **RUN_KWARGS
+    )
+    assert rvs[0] == "0.3" and rvs[2] == "0.5"
+    assert isinstance(rvs[1], SimFailure)
+    assert rvs[1].sim_name == "sim_1"
+    assert rvs[1].status == "failed"
+    assert rvs[1].attempts == 3
+    assert glm_calls() == 2 + 3
+
+
+def test_diverged_sims_are_not_retried(
+    fake_glm, glm_calls, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("FAKE_GLM_MODE", "nan")
+    limits = RunLimits(poll_interval=0.1)
+    rvs = MultiSim(make_sims(tmp_path, (0.3,))).run(
+        glm_path=fake_glm, limits=limits, retries=2, **RUN_KWARGS
+    )
+    assert rvs[0].status == "diverged"
+    assert rvs[0].attempts == 1
+    assert glm_calls() == 1
+
+
+def test_iter_results_yields_every_sim(fake_glm, tmp_path):
+    results = MultiSim(make_sims(tmp_path)).iter_results(
+        on_sim_end=lake_kw,
+        glm_path=fake_glm,
+        executor="thread",
+        cpu_count=1,
+    )
+    assert dict(results) == {"sim_0": "0.3", "sim_1": "0.4", "sim_2": "0.5"}
+
+
+def test_iter_results_in_worker_processes(fake_glm, tmp_path):
+    results = MultiSim(make_sims(tmp_path)).iter_results(
+        on_sim_end=lake_kw,
+        glm_path=fake_glm,
+        executor="process",
+        cpu_count=1,
+    )
+    assert dict(results) == {"sim_0": "0.3", "sim_1": "0.4", "sim_2": "0.5"}
+
+
+def test_closing_iter_results_stops_remaining_sims(
+    fake_glm, glm_calls, tmp_path
+):
+    sims = make_sims(tmp_path, (0.1, 0.2, 0.3, 0.4, 0.5, 0.6))
+    results = MultiSim(sims).iter_results(
+        glm_path=fake_glm, executor="thread", cpu_count=1
+    )
+    sim_name, _ = next(results)
+    assert sim_name == "sim_0"
+    results.close()
+    # Only the few sims queued ahead of the worker were run
+    assert glm_calls() < len(sims)
+
+
+def test_ljf_runs_the_longest_sims_first(fake_glm, tmp_path):
+    sims = make_sims(tmp_path)
+    for sim, num_days in zip(sims, (10, 1000, 100)):
+        sim.set_param_value("glm", "time", "num_days", num_days)
+    multi_sim = MultiSim(sims)
+    started = []
+    multi_sim.run(
+        on_sim_end=lambda sim: started.append(sim.sim_name),
+        glm_path=fake_glm,
+        schedule="ljf",
+        **RUN_KWARGS,
+    )
+    assert started == ["sim_1", "sim_2", "sim_0"]
+    report = multi_sim.schedule_report
+    assert report["schedule"] == "ljf"
+    assert report["predicted_makespan"] > 0
+    assert report["achieved_makespan"] > 0
+
+
+def test_fifo_keeps_no_schedule_report(fake_glm, tmp_path):
+    multi_sim = MultiSim(make_sims(tmp_path))
+    multi_sim.run(glm_path=fake_glm, **RUN_KWARGS)
+    assert multi_sim.schedule_report is None
+
+
+def test_unknown_schedule_raises(tmp_path):
+    with pytest.raises(ValueError, match="schedule"):
+        MultiSim(make_sims(tmp_path)).run(schedule="sjf", **RUN_KWARGS)
+
+
+def test_predictor_learns_and_saves_runtimes(fake_glm, tmp_path):
+    path = str(tmp_path / "runtimes.json")
+    MultiSim(make_sims(tmp_path)).run(
+        glm_path=fake_glm, predictor=RuntimePredictor(path), **RUN_KWARGS
+    )
+    assert len(RuntimePredictor(path).observations) == 3
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from glmpy.example_sims import SparklingSim
+from glmpy.output_planner import OutputPlanner
+
+
+def output_param(sim, param):
+    return sim.get_param_value("glm", "output", param)
+
+
+def test_point_vars_require_depths():
+    with pytest.raises(ValueError, match="depths"):
+        OutputPlanner(point_vars=["temp"])
+
+
+def test_apply_trims_point_and_outlet_csvs():
+    sim = SparklingSim()
+    OutputPlanner(point_vars=["temp"], depths=[1, 5]).apply(sim)
+    assert output_param(sim, "csv_point_vars") == ["temp"]
+    assert output_param(sim, "csv_point_nvars") == 1
+    assert output_param(sim, "csv_point_at") == [1.0, 5.0]
+    assert output_param(sim, "csv_point_nlevs") == 2
+    assert output_param(sim, "csv_outlet_nvars") == 0
+    assert output_param(sim, "csv_outlet_vars") is None
+
+
+def test_apply_without_point_vars_or_nc_vars():
+    sim = SparklingSim()
+    OutputPlanner(outlets=True).apply(sim)
+    assert output_param(sim, "csv_point_nlevs") == 0
+    assert output_param(sim, "csv_point_vars") is None
+    assert output_param(sim, "csv_outlet_nvars") == 3
+    # Only the initial and final states: 730 days of hourly steps
+    assert output_param(sim, "nsave") == 730 * 24
+
+
+def test_nsave_follows_the_required_frequency():
+    sim = SparklingSim()
+    assert OutputPlanner(nc_vars=["temp"], frequency="6h").nsave(sim) == 6
+    assert OutputPlanner(nc_vars=["temp"], frequency=7200).nsave(sim) == 2
+    assert OutputPlanner(nc_vars=["temp"], frequency="1min").nsave(sim) == 1
+    planner = OutputPlanner(nc_vars=["temp"])
+    assert planner.nsave(sim) is None
+    planner.apply(sim)
+    assert output_param(sim, "nsave") == 24
+
+
+def test_harvest_kwargs_lists_the_required_outputs():
+    sim = SparklingSim()
+    planner = OutputPlanner(
+        point_vars=["temp"], depths=[1.0], nc_vars=["temp"], outlets=True
+    )
+    assert planner.harvest_kwargs(sim) == {
+        "harvest": [
+            "output/lake.csv",
+            "glm.log",
+            "output/WQ_*.csv",
+            "output/outlet_*.csv",
+            "output/overflow.csv",
+            "output/output.nc",
+        ],
+        "harvest_nc_vars": ["temp"],
+    }
+    assert OutputPlanner().harvest_kwargs(sim) == {
+        "harvest": ["output/lake.csv", "glm.log"],
+        "harvest_nc_vars": None,
+    }
+
+
+def test_workspace_run_harvests_only_the_required_outputs(
+    fake_glm, tmp_path
+):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    planner = OutputPlanner(lake_columns=["Kw"])
+    planner.apply(sim)
+    result = sim.run(
+        glm_path=fake_glm,
+        quiet=True,
+        workspace=str(tmp_path / "scratch"),
+        **planner.harvest_kwargs(sim),
+    )
+    assert result.success
+    assert os.listdir(sim.get_out_dir()) == ["lake.csv"]
+    lake = planner.read_lake(sim)
+    assert list(lake.columns) == ["time", "Kw"]
+    assert lake["Kw"].tolist() == [0.331]
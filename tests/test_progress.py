@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+
+from glmpy.example_sims import SparklingSim
+from glmpy.executor import EnsembleProgress
+from glmpy.runner import _ProgressParser
+from glmpy.sim import MultiSim
+
+
+def test_parser_reports_the_latest_complete_line():
+    reports = []
+    parser = _ProgressParser("sim", lambda *args: reports.append(args))
+    parser.feed(b"Running day 2444345, 50.00% of days com")
+    assert reports == []
+    parser.feed(b"plete\rRunning day 2444346, 75.00% of days complete\r")
+    assert reports == [("sim", datetime.date(1980, 4, 16), 0.75)]
+    parser.feed(b"Simulation done\n")
+    assert len(reports) == 1
+
+
+def test_sim_run_reports_progress(fake_glm, tmp_path):
+    reports = []
+    result = SparklingSim(outputs_dir=str(tmp_path)).run(
+        glm_path=fake_glm,
+        quiet=True,
+        on_progress=lambda *args: reports.append(args),
+    )
+    assert reports[-1] == ("sparkling", datetime.date(1980, 4, 16), 1.0)
+    assert result.glm_version == "3.3.3"
+
+
+def test_ensemble_progress_aggregates_sims():
+    progress = EnsembleProgress(num_sims=4)
+    assert progress.fraction == 0.0
+    assert progress.eta is None
+    assert "ETA unknown" in str(progress)
+    progress.update("a", datetime.date(2000, 1, 1), 0.25)
+    progress.update("a", datetime.date(2000, 1, 11), 0.5)
+    progress.update("b", datetime.date(2000, 1, 1), 0.5)
+    progress.finish("c")
+    # Finished sims ignore late reports
+    progress.update("c", datetime.date(2000, 1, 1), 0.0)
+    assert progress.simulated_days == 10
+    assert progress.fraction == pytest.approx((0.5 + 0.5 + 1) / 4)
+    assert progress.eta > 0
+    assert "(1 of 4 sims finished)" in str(progress)
+    df = progress.to_frame()
+    assert list(df.index) == ["a", "b"]
+    assert df.loc["a", "fraction"] == 0.5
+    assert df.loc["a", "days_per_second"] > 0
+    assert not df.loc["b", "finished"]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_multi_sim_collects_progress(fake_glm, tmp_path, executor):
+    reports = []
+    sims = [
+        SparklingSim(sim_name=f"sim_{i}", outputs_dir=str(tmp_path))
+        for i in range(2)
+    ]
+    multi_sim = MultiSim(sims)
+    multi_sim.run(
+        glm_path=fake_glm,
+        executor=executor,
+        cpu_count=1,
+        on_progress=lambda *args: reports.append(args),
+        time_sim=False,
+        time_multi_sim=False,
+    )
+    assert multi_sim.progress.fraction == 1.0
+    assert set(reports) >= {
+        ("sim_0", datetime.date(1980, 4, 16), 1.0),
+        ("sim_1", datetime.date(1980, 4, 16), 1.0),
+    }
@@ -0,0 +1,41 @@
+import os
+import json
+import stat
+import platform
+
+from glmpy.runner import GLMRunner, GLMBinaryRegistry
+
+
+def test_registry_selects_and_probes_glm(fake_glm):
+    binary = GLMRunner.resolve_glm_binary(None)
+    assert binary.path == fake_glm
+    assert binary.runnable
+    assert binary.version == "3.3.3"
+
+
+def test_registry_copies_binaries_that_are_not_executable(fake_glm):
+    os.chmod(fake_glm, 0o644)
+    binary = GLMRunner.registry.select()
+    assert binary.path != fake_glm
+    assert binary.path.startswith(GLMRunner.registry.cache_dir)
+    assert os.access(binary.path, os.X_OK)
+    assert binary.runnable
+    # The binary in the search directory is left as it was
+    assert stat.S_IMODE(os.stat(fake_glm).st_mode) == 0o644
+
+
+def test_probes_are_cached_per_host(fake_glm, monkeypatch):
+    registry = GLMRunner.registry
+    probe = registry.probe(fake_glm)
+    with open(registry._probe_cache_path()) as f:
+        (key,) = json.load(f)
+    assert key == f"{probe.digest}:{platform.machine()}:{platform.node()}"
+    # A new registry on the same host reuses the probe
+    other = GLMBinaryRegistry(registry.search_dirs, registry.cache_dir)
+    assert other.probe(fake_glm).version == "3.3.3"
+    # Another host sharing the cache probes the binary itself
+    monkeypatch.setattr(platform, "node", lambda: "other-host")
+    other = GLMBinaryRegistry(registry.search_dirs, registry.cache_dir)
+    other.probe(fake_glm)
+    with open(registry._probe_cache_path()) as f:
+        assert len(json.load(f)) == 2
@@ -0,0 +1,119 @@
+import os
+import asyncio
+
+import pytest
+
+from glmpy.example_sims import SparklingSim
+from glmpy.runner import RunLimits
+from glmpy.cache import SimCache
+
+
+def test_nan_written_just_before_exit_is_diverged(
+    fake_glm, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("FAKE_GLM_MODE", "nan")
+    cache = SimCache(str(tmp_path / "cache"))
+    sim = SparklingSim(outputs_dir=str(tmp_path / "outputs"))
+    # Longer than the run, so only the final check sees the NaN
+    limits = RunLimits(poll_interval=30)
+    result = sim.run(glm_path=fake_glm, quiet=True, limits=limits, cache=cache)
+    assert result.status == "diverged"
+    assert not result.success
+    assert cache.size() == 0
+
+
+def test_nan_written_just_before_exit_is_diverged_async(
+    fake_glm, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("FAKE_GLM_MODE", "nan")
+    cache = SimCache(str(tmp_path / "cache"))
+    sim = SparklingSim(outputs_dir=str(tmp_path / "outputs"))
+    limits = RunLimits(poll_interval=30)
+    result = asyncio.run(
+        sim.run_async(
+            glm_path=fake_glm, quiet=True, limits=limits, cache=cache
+        )
+    )
+    assert result.status == "diverged"
+    assert cache.size() == 0
+
+
+def test_async_cpu_limit_without_prlimit(fake_glm, tmp_path, monkeypatch):
+    resource = pytest.importorskip("resource")
+    if hasattr(resource, "prlimit"):
+        monkeypatch.delattr(resource, "prlimit")
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    limits = RunLimits(cpu_time=60, kill_on_nan=False)
+    result = asyncio.run(
+        sim.run_async(glm_path=fake_glm, quiet=True, limits=limits)
+    )
+    assert result.success
+
+
+def test_run_returns_run_result(fake_glm, tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    result = sim.run(glm_path=fake_glm, quiet=True, write_log=True)
+    assert result.success
+    assert result.returncode == 0
+    assert result.status == "completed"
+    assert not result.cached
+    assert result.wall_time > 0
+    assert result.log_path == os.path.join(sim.get_sim_dir(), "glm.log")
+    with open(result.log_path) as f:
+        assert "100.00% of days complete" in f.read()
+
+
+def test_run_reports_failure(fake_glm, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GLM_MODE", "fail")
+    result = SparklingSim(outputs_dir=str(tmp_path)).run(
+        glm_path=fake_glm, quiet=True
+    )
+    assert not result.success
+    assert result.returncode == 3
+    assert result.status == "failed"
+
+
+def test_run_async_returns_run_result(fake_glm, tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    result = asyncio.run(sim.run_async(glm_path=fake_glm, quiet=True))
+    assert result.success
+    assert os.path.isfile(os.path.join(sim.get_out_dir(), "lake.csv"))
+
+
+def test_run_timeout_kills_glm(fake_glm, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GLM_MODE", "sleep")
+    limits = RunLimits(timeout=0.5, poll_interval=0.1)
+    result = SparklingSim(outputs_dir=str(tmp_path)).run(
+        glm_path=fake_glm, quiet=True, limits=limits
+    )
+    assert result.status == "timeout"
+    assert result.wall_time < 30
+
+
+def test_run_without_output_is_stalled(fake_glm, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GLM_MODE", "sleep")
+    limits = RunLimits(stall_timeout=0.5, poll_interval=0.1)
+    result = SparklingSim(outputs_dir=str(tmp_path)).run(
+        glm_path=fake_glm, quiet=True, limits=limits
+    )
+    assert result.status == "stalled"
+
+
+def test_run_over_cpu_time_is_killed(fake_glm, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GLM_MODE", "spin")
+    limits = RunLimits(cpu_time=1, kill_on_nan=False)
+    result = SparklingSim(outputs_dir=str(tmp_path)).run(
+        glm_path=fake_glm, quiet=True, limits=limits
+    )
+    assert result.status == "cpu_limit"
+    assert not result.success
+
+
+def test_nan_is_ignored_without_kill_on_nan(fake_glm, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GLM_MODE", "nan")
+    limits = RunLimits(kill_on_nan=False)
+    assert not limits.needs_watchdog()
+    result = SparklingSim(outputs_dir=str(tmp_path)).run(
+        glm_path=fake_glm, quiet=True, limits=limits
+    )
+    assert result.status == "completed"
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from glmpy.example_sims import SparklingSim
+from glmpy.manifest import RuntimePredictor
+
+
+def test_features_scale_with_time_steps():
+    sim = SparklingSim()
+    steps = RuntimePredictor.features(sim)[1]
+    sim.set_param_value("glm", "time", "num_days", 1460)
+    assert RuntimePredictor.features(sim)[1] == 2 * steps
+
+
+def test_fit_without_observations_uses_the_prior():
+    coef = RuntimePredictor().fit()
+    np.testing.assert_array_equal(coef, RuntimePredictor.prior)
+
+
+def test_fit_scales_the_prior_to_few_observations():
+    predictor = RuntimePredictor()
+    features = [1.0, 100.0, 1000.0, 0.0, 10.0]
+    prior_runtime = float(np.dot(RuntimePredictor.prior, features))
+    predictor.observe(features, 3 * prior_runtime)
+    np.testing.assert_allclose(
+        predictor.fit(), 3 * np.array(RuntimePredictor.prior)
+    )
+
+
+def test_fit_recovers_linear_runtimes():
+    rng = np.random.default_rng(0)
+    true_coef = np.array([0.5, 1e-4, 0.0, 0.0, 2e-3])
+    predictor = RuntimePredictor()
+    for _ in range(20):
+        features = [1.0, *rng.uniform(1, 1e4, 4)]
+        predictor.observe(features, float(true_coef @ features))
+    np.testing.assert_allclose(predictor.fit(), true_coef, atol=1e-9)
+    assert predictor.predict([1.0, 1e4, 0.0, 0.0, 0.0]) == pytest.approx(1.5)
+
+
+def test_observations_are_bounded_and_saved(tmp_path):
+    path = str(tmp_path / "runtimes.json")
+    predictor = RuntimePredictor(path, max_observations=2)
+    for runtime in (1.0, 2.0, 3.0):
+        predictor.observe([1.0, 0.0, 0.0, 0.0, 0.0], runtime)
+    predictor.save()
+    assert [obs[1] for obs in RuntimePredictor(path).observations] == [
+        2.0,
+        3.0,
+    ]
+
+
+def test_save_without_path_raises():
+    with pytest.raises(ValueError):
+        RuntimePredictor().save()
+
+
+def test_makespan_dispatches_to_the_first_free_worker():
+    assert RuntimePredictor.makespan([4, 3, 2, 1], 2) == 5
+    assert RuntimePredictor.makespan([1, 2, 3, 4], 2) == 6
+    assert RuntimePredictor.makespan([1, 2, 3], 1) == 6
+    assert RuntimePredictor.makespan([], 4) == 0
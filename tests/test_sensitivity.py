@@ -0,0 +1,158 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from glmpy.example_sims import SparklingSim
+from glmpy.sensitivity import LocalSensitivity
+
+
+def lake_kw(sim) -> float:
+    lake = pd.read_csv(os.path.join(sim.get_out_dir(), "lake.csv"))
+    return float(lake["Kw"].iloc[0])
+
+
+def lake_kw_series(sim) -> np.ndarray:
+    lake = pd.read_csv(os.path.join(sim.get_out_dir(), "lake.csv"))
+    return np.repeat(lake["Kw"].to_numpy(), 3)
+
+
+def prepare(tmp_path, y_func, y_val) -> LocalSensitivity:
+    local = LocalSensitivity(SparklingSim(outputs_dir=str(tmp_path)))
+    local.prepare_sims("glm", "light", "Kw", [0.3, 0.4, 0.5], y_val, y_func)
+    return local
+
+
+@pytest.mark.parametrize("multi_sim", [False, True])
+def test_run_treats_failed_sims_as_missing(
+    fake_glm, tmp_path, monkeypatch, multi_sim
+):
+    monkeypatch.setenv("FAKE_GLM_FAIL_KW", "0.4")
+    local = prepare(tmp_path, lake_kw, 0.331)
+    with pytest.warns(UserWarning, match="1 of 3 simulations failed"):
+        results = local.run(
+            multi_sim=multi_sim,
+            glm_path=fake_glm,
+            quiet=True,
+            time_sim=False,
+            time_multi_sim=False,
+            cpu_count=1,
+            executor="thread",
+        )
+    assert len(results) == 4
+    failed = results[results["sim_name"] == "sparkling_1"].iloc[0]
+    assert np.isnan(failed["y"]) and np.isnan(failed["s_i"])
+    assert failed["x"] == 0.4
+    ok = results[results["sim_name"] == "sparkling_2"].iloc[0]
+    assert ok["y"] == 0.5
+
+
+def test_run_array_outputs_with_failed_sim(fake_glm, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GLM_FAIL_KW", "0.4")
+    local = prepare(tmp_path, lake_kw_series, np.full(3, 0.331))
+    with pytest.warns(UserWarning):
+        results = local.run(glm_path=fake_glm, quiet=True, time_sim=False)
+    assert results["y"].shape == (3, 3)
+    assert np.isnan(results["y"][1]).all()
+    assert (results["y"][2] == 0.5).all()
+
+
+def test_run_raises_when_every_sim_fails(fake_glm, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_GLM_MODE", "fail")
+    local = prepare(tmp_path, lake_kw, 0.331)
+    with pytest.raises(RuntimeError, match="sparkling_0"):
+        local.run(glm_path=fake_glm, quiet=True, time_sim=False)
+
+
+@pytest.mark.parametrize("multi_sim", [False, True])
+def test_run_passes_retries_and_workspace(
+    fake_glm, glm_calls, tmp_path, monkeypatch, multi_sim
+):
+    monkeypatch.setenv("FAKE_GLM_FAIL_KW", "0.4")
+    local = prepare(tmp_path, lake_kw, 0.331)
+    with pytest.warns(UserWarning, match="1 of 3 simulations failed"):
+        results = local.run(
+            multi_sim=multi_sim,
+            glm_path=fake_glm,
+            quiet=True,
+            time_sim=False,
+            time_multi_sim=False,
+            cpu_count=1,
+            executor="thread",
+            workspace=str(tmp_path / "scratch"),
+            retries=2,
+        )
+    assert glm_calls() == 2 + 3
+    assert os.listdir(tmp_path / "scratch") == []
+    # Outputs are harvested from the workspace
+    assert results["y"].iloc[3] == 0.5
+    assert np.isnan(results["y"].iloc[2])
+
+
+BATCH_KWARGS = {
+    "executor": "thread",
+    "cpu_count": 1,
+    "time_sim": False,
+    "time_multi_sim": False,
+}
+
+
+def test_run_batch_perturbs_each_parameter(fake_glm, tmp_path):
+    local = LocalSensitivity(SparklingSim(outputs_dir=str(tmp_path)))
+    perturbations = [
+        {"nml": "glm", "block": "light", "param": "Kw", "deltas": [-0.5, 1]},
+        {
+            "nml": "glm",
+            "block": "glm_setup",
+            "param": "max_layers",
+            "deltas": [0.1],
+        },
+    ]
+    results = local.run_batch(
+        perturbations, lake_kw, glm_path=fake_glm, **BATCH_KWARGS
+    )
+    assert results["param"].tolist() == ["Kw", "Kw", "max_layers"]
+    assert results["x"].tolist() == pytest.approx([0.1655, 0.662, 550])
+    assert (results["y_base"] == 0.331).all()
+    # The fake GLM outputs Kw and ignores max_layers
+    assert results["s_i"].tolist() == pytest.approx([1, 1, 0])
+
+
+def test_run_batch_array_outputs(fake_glm, tmp_path):
+    local = LocalSensitivity(SparklingSim(outputs_dir=str(tmp_path)))
+    perturbations = [
+        {"nml": "glm", "block": "light", "param": "Kw", "deltas": [0.5]}
+    ]
+    results = local.run_batch(
+        perturbations, lake_kw_series, glm_path=fake_glm, **BATCH_KWARGS
+    )
+    assert results["s_i"].shape == (1, 3)
+    np.testing.assert_allclose(results["s_i"], 1)
+    assert results.attrs["y_base"] == pytest.approx([0.331] * 3)
+
+
+def test_run_batch_rounds_int_changes_to_at_least_one(fake_glm, tmp_path):
+    local = LocalSensitivity(SparklingSim(outputs_dir=str(tmp_path)))
+    perturbations = [
+        {
+            "nml": "glm",
+            "block": "glm_setup",
+            "param": "max_layers",
+            "deltas": [-0.0001, 0.0001],
+        }
+    ]
+    results = local.run_batch(
+        perturbations, lake_kw, glm_path=fake_glm, **BATCH_KWARGS
+    )
+    assert results["x"].tolist() == [499, 501]
+    assert np.isfinite(results["s_i"]).all()
+
+
+def test_run_batch_rejects_deltas_that_change_nothing(tmp_path):
+    local = LocalSensitivity(SparklingSim(outputs_dir=str(tmp_path)))
+    perturbations = [
+        {"nml": "glm", "block": "light", "param": "Kw", "deltas": [0.0]}
+    ]
+    with pytest.raises(ValueError, match="does not change Kw"):
+        local.run_batch(perturbations, lake_kw)
@@ -0,0 +1,154 @@
+import os
+import json
+
+import pytest
+
+from glmpy.example_sims import SparklingSim
+from glmpy.runner import GLMRunner
+from glmpy.sim import INPUTS_MANIFEST
+
+
+def read_lake_kw(sim) -> str:
+    with open(os.path.join(sim.get_out_dir(), "lake.csv")) as f:
+        return f.read().splitlines()[-1].split(",")[1]
+
+
+def test_rerun_removes_outputs_of_previous_run(
+    fake_glm, tmp_path, monkeypatch
+):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    assert sim.run(glm_path=fake_glm, quiet=True, write_log=True).success
+    lake_csv = os.path.join(sim.get_out_dir(), "lake.csv")
+    assert os.path.isfile(lake_csv)
+    monkeypatch.setenv("FAKE_GLM_MODE", "fail")
+    result = sim.run(glm_path=fake_glm, quiet=True)
+    assert result.returncode == 3
+    assert not os.path.exists(lake_csv)
+    assert not os.path.exists(os.path.join(sim.get_out_dir(), "output.nc"))
+    assert not os.path.exists(os.path.join(sim.get_sim_dir(), "glm.log"))
+    # Inputs are kept
+    assert os.path.isfile(os.path.join(sim.get_sim_dir(), "glm3.nml"))
+
+
+def test_rerun_in_workspace_removes_outputs_of_previous_run(
+    fake_glm, tmp_path, monkeypatch
+):
+    sim = SparklingSim(outputs_dir=str(tmp_path / "outputs"))
+    workspace = str(tmp_path / "scratch")
+    assert sim.run(glm_path=fake_glm, quiet=True, workspace=workspace).success
+    lake_csv = os.path.join(sim.get_out_dir(), "lake.csv")
+    assert os.path.isfile(lake_csv)
+    monkeypatch.setenv("FAKE_GLM_MODE", "fail")
+    sim.run(glm_path=fake_glm, quiet=True, workspace=workspace)
+    assert not os.path.exists(lake_csv)
+
+
+def test_workspace_outputs_are_harvested_into_sim_dir(fake_glm, tmp_path):
+    outputs_dir = str(tmp_path / "outputs")
+    workspace = str(tmp_path / "scratch")
+    sim = SparklingSim(outputs_dir=outputs_dir)
+    result = sim.run(
+        glm_path=fake_glm, quiet=True, write_log=True, workspace=workspace
+    )
+    assert result.success
+    assert sim.outputs_dir == outputs_dir
+    assert sim.get_sim_dir().startswith(outputs_dir)
+    assert read_lake_kw(sim) == "0.331"
+    assert os.path.isfile(os.path.join(sim.get_out_dir(), "output.nc"))
+    assert result.log_path == os.path.join(sim.get_sim_dir(), "glm.log")
+    assert os.path.isfile(result.log_path)
+    # Only outputs are harvested and the scratch directory is removed
+    assert not os.path.exists(os.path.join(sim.get_sim_dir(), "glm3.nml"))
+    assert os.listdir(workspace) == []
+
+
+def test_workspace_run_that_raises_restores_outputs_dir(
+    fake_glm, tmp_path, monkeypatch
+):
+    def _raise(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(GLMRunner, "run", _raise)
+    outputs_dir = str(tmp_path / "outputs")
+    sim = SparklingSim(outputs_dir=outputs_dir)
+    with pytest.raises(KeyboardInterrupt):
+        sim.run(glm_path=fake_glm, workspace=str(tmp_path / "scratch"))
+    assert sim.outputs_dir == outputs_dir
+
+
+def _mtimes(sim) -> dict:
+    paths = ("glm3.nml", os.path.join("bcs", "nldas_driver.csv"))
+    return {
+        path: os.stat(os.path.join(sim.get_sim_dir(), path)).st_mtime_ns
+        for path in paths
+    }
+
+
+def _prepare(sim):
+    sim.prepare_inputs()
+    sim.prepare_bcs()
+
+
+def test_prepare_inputs_skips_unchanged_inputs(tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    _prepare(sim)
+    before = _mtimes(sim)
+    _prepare(SparklingSim(outputs_dir=str(tmp_path)))
+    assert _mtimes(sim) == before
+
+
+def test_prepare_inputs_rewrites_changed_inputs(tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    _prepare(sim)
+    before = _mtimes(sim)
+    sim.set_param_value("glm", "light", "Kw", 0.5)
+    _prepare(sim)
+    after = _mtimes(sim)
+    nml_path = os.path.join(sim.get_sim_dir(), "glm3.nml")
+    assert after["glm3.nml"] != before["glm3.nml"]
+    assert "0.5" in open(nml_path).read()
+    bcs_path = os.path.join("bcs", "nldas_driver.csv")
+    assert after[bcs_path] == before[bcs_path]
+
+
+def test_prepare_inputs_rewrites_modified_files(tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    _prepare(sim)
+    nml_path = os.path.join(sim.get_sim_dir(), "glm3.nml")
+    with open(nml_path) as f:
+        expected = f.read()
+    with open(nml_path, "w") as f:
+        f.write("edited")
+    _prepare(sim)
+    with open(nml_path) as f:
+        assert f.read() == expected
+
+
+def test_prepare_inputs_without_manifest_starts_clean(tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    os.makedirs(sim.get_sim_dir())
+    stray = os.path.join(sim.get_sim_dir(), "stray.txt")
+    with open(stray, "w") as f:
+        f.write("stray")
+    _prepare(sim)
+    assert not os.path.exists(stray)
+
+
+def test_inputs_manifest_is_saved_once_per_step(tmp_path, monkeypatch):
+    saved = []
+    replace = os.replace
+
+    def _replace(src, dst):
+        if os.path.basename(dst) == INPUTS_MANIFEST:
+            saved.append(dst)
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", _replace)
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    _prepare(sim)
+    assert len(saved) == 2
+    with open(os.path.join(sim.get_sim_dir(), INPUTS_MANIFEST)) as f:
+        assert set(json.load(f)) == set(_mtimes(sim))
+    saved.clear()
+    _prepare(sim)
+    assert saved == []
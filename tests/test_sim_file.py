@@ -0,0 +1,49 @@
+import json
+import zipfile
+
+import pandas as pd
+import pytest
+
+from glmpy.example_sims import SparklingSim
+from glmpy.sim import GLMSim, SIM_FILE_FORMAT_VERSION
+
+
+def test_sim_file_round_trip(tmp_path):
+    sim = SparklingSim(outputs_dir=str(tmp_path))
+    sim.set_param_value("glm", "light", "Kw", 0.5)
+    path = str(tmp_path / "sim.glmpy")
+    sim.to_file(path)
+    with zipfile.ZipFile(path) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+    assert manifest["format_version"] == SIM_FILE_FORMAT_VERSION
+    loaded = GLMSim.from_file(path)
+    assert isinstance(loaded, SparklingSim)
+    assert loaded.sim_name == sim.sim_name
+    assert loaded.outputs_dir == sim.outputs_dir
+    assert loaded.get_param_value("glm", "light", "Kw") == 0.5
+    assert loaded.nml._to_dict() == sim.nml._to_dict()
+    pd.testing.assert_frame_equal(
+        loaded.bcs["nldas_driver"],
+        sim.bcs["nldas_driver"],
+        check_dtype=False,
+    )
+
+
+def test_sim_file_from_newer_version_raises(tmp_path):
+    path = str(tmp_path / "sim.glmpy")
+    SparklingSim().to_file(path)
+    with zipfile.ZipFile(path) as zf:
+        entries = {name: zf.read(name) for name in zf.namelist()}
+    manifest = json.loads(entries["manifest.json"])
+    manifest["format_version"] = SIM_FILE_FORMAT_VERSION + 1
+    entries["manifest.json"] = json.dumps(manifest)
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    with pytest.raises(ValueError, match="newer version"):
+        GLMSim.from_file(path)
+
+
+def test_sim_file_requires_glmpy_extension(tmp_path):
+    with pytest.raises(ValueError):
+        SparklingSim().to_file(str(tmp_path / "sim.zip"))
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from glmpy.example_sims import SparklingSim
+from glmpy.sensitivity import SobolSensitivity
+
+PARAMS = ["glm.light.Kw", "glm.mixing.coef_mix_hyp"]
+UNIT_BOUNDS = {path: (0.0, 1.0) for path in PARAMS}
+
+
+def test_sobol_indices_of_linear_function():
+    sobol = SobolSensitivity(SparklingSim(), PARAMS, bounds=UNIT_BOUNDS)
+    design = sobol.sample(1024, seed=1)
+    assert len(design) == 1024 * (len(PARAMS) + 2)
+    y = 4 * design[PARAMS[0]] + design[PARAMS[1]]
+    indices = sobol.analyze(y.to_numpy(), num_resamples=100, seed=1)
+    # Variance shares of the two terms are 16/17 and 1/17
+    assert indices.loc[PARAMS[0], "S1"] == pytest.approx(16 / 17, abs=0.05)
+    assert indices.loc[PARAMS[1], "S1"] == pytest.approx(1 / 17, abs=0.05)
+    assert indices.loc[PARAMS[0], "ST"] == pytest.approx(16 / 17, abs=0.05)
+    assert (indices["S1_low"] <= indices["S1_high"]).all()
+
+
+def test_sobol_drops_samples_with_missing_outputs():
+    sobol = SobolSensitivity(SparklingSim(), PARAMS, bounds=UNIT_BOUNDS)
+    design = sobol.sample(256, seed=1)
+    y = np.array(4 * design[PARAMS[0]] + design[PARAMS[1]])
+    y[3] = np.nan
+    indices = sobol.analyze(y, num_resamples=10, seed=1)
+    assert not indices["S1"].isna().any()
@@ -0,0 +1,67 @@
+import threading
+
+from glmpy.example_sims import SparklingSim
+from glmpy.sim import MultiSim
+from glmpy.tracing import Tracer
+
+
+def _spin(seconds: float):
+    end = threading.Event()
+    timer = threading.Timer(seconds, end.set)
+    timer.start()
+    while not end.is_set():
+        pass
+
+
+def test_span_cpu_time_excludes_other_threads():
+    tracer = Tracer()
+    busy = threading.Thread(target=_spin, args=(0.5,))
+    busy.start()
+    with tracer.span("idle"):
+        busy.join()
+    (span,) = tracer.spans
+    assert span.duration >= 0.4
+    assert span.attributes["cpu_time"] < 0.2
+
+
+def test_nested_spans_share_a_trace():
+    tracer = Tracer()
+    with tracer.span("run") as parent:
+        with tracer.span("glm") as child:
+            pass
+    assert child.trace_id == parent.trace_id
+    assert child.parent_id == parent.span_id
+    assert [span.name for span in tracer.trace(parent.trace_id)] == [
+        "glm",
+        "run",
+    ]
+
+
+def test_io_is_only_counted_with_count_io(tmp_path):
+    for count_io in (False, True):
+        tracer = Tracer(count_io=count_io)
+        with tracer.span("write", str(tmp_path)):
+            (tmp_path / f"{count_io}.txt").write_text("12345")
+        (span,) = tracer.spans
+        if count_io:
+            assert span.attributes["files_created"] == 1
+            assert span.attributes["bytes_written"] == 5
+        else:
+            assert "bytes_written" not in span.attributes
+
+
+def test_multi_sim_workers_count_io(fake_glm, tmp_path):
+    tracer = Tracer(count_io=True)
+    MultiSim([SparklingSim(outputs_dir=str(tmp_path))]).run(
+        glm_path=fake_glm,
+        executor="process",
+        cpu_count=1,
+        tracer=tracer,
+        time_sim=False,
+        time_multi_sim=False,
+    )
+    spans = {span.name: span for span in tracer.spans}
+    # lake.csv, output.nc and glm.log
+    assert spans["glm"].attributes["files_created"] == 3
+    assert spans["prepare_inputs"].attributes["files_created"] > 0
+    assert spans["glm"].parent_id is not None